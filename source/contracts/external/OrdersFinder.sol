@@ -5,12 +5,144 @@ import 'reporting/IMarket.sol';
 
 
 contract OrdersFinder {
+    struct OrderBook {
+        bytes32[] orderIds;
+        uint256[] outcomes;
+        uint256[] orderTypes;
+        uint256[] amounts;
+        uint256[] prices;
+        address[] creators;
+        uint256[] moneyEscrowed;
+        uint256[] sharesEscrowed;
+        uint256 count;
+    }
+
     IOrders public orders;
 
     function OrdersFinder(IOrders _orders) public {
         orders = _orders;
     }
 
+    // Reads a page of an order book, best order first.  Pass a zero _startOrderId for the first page and the returned _nextOrderId for the ones after it, which is zero once the end of the book is reached.
+    function getOrders(Order.Types _type, IMarket _market, uint256 _outcome, bytes32 _startOrderId, uint256 _maxCount) external view returns (bytes32[] _orderIds, bytes32 _nextOrderId) {
+        _orderIds = new bytes32[](_maxCount);
+        _nextOrderId = getStartOrderId(_type, _market, _outcome, _startOrderId);
+        uint256 _count = 0;
+        while (_nextOrderId != 0 && _count < _maxCount) {
+            _orderIds[_count] = _nextOrderId;
+            _count++;
+            _nextOrderId = orders.getWorseOrderId(_nextOrderId);
+        }
+        // Shrink the array to the orders found so only those are ABI encoded
+        assembly { mstore(_orderIds, _count) }
+        return (_orderIds, _nextOrderId);
+    }
+
+    // Same as getOrders but also returns the amount, price and creator of each order so callers don't have to look them up one call at a time
+    function getOrdersWithDetails(Order.Types _type, IMarket _market, uint256 _outcome, bytes32 _startOrderId, uint256 _maxCount) external view returns (bytes32[] _orderIds, uint256[] _amounts, uint256[] _prices, address[] _creators, bytes32 _nextOrderId) {
+        return readOrderDetails(getStartOrderId(_type, _market, _outcome, _startOrderId), _maxCount);
+    }
+
+    function readOrderDetails(bytes32 _orderId, uint256 _maxCount) private view returns (bytes32[] _orderIds, uint256[] _amounts, uint256[] _prices, address[] _creators, bytes32 _nextOrderId) {
+        _orderIds = new bytes32[](_maxCount);
+        _amounts = new uint256[](_maxCount);
+        _prices = new uint256[](_maxCount);
+        _creators = new address[](_maxCount);
+        _nextOrderId = _orderId;
+        uint256 _count = 0;
+        while (_nextOrderId != 0 && _count < _maxCount) {
+            _orderIds[_count] = _nextOrderId;
+            _amounts[_count] = orders.getAmount(_nextOrderId);
+            _prices[_count] = orders.getPrice(_nextOrderId);
+            _creators[_count] = orders.getOrderCreator(_nextOrderId);
+            _count++;
+            _nextOrderId = orders.getWorseOrderId(_nextOrderId);
+        }
+        assembly {
+            mstore(_orderIds, _count)
+            mstore(_amounts, _count)
+            mstore(_prices, _count)
+            mstore(_creators, _count)
+        }
+        return (_orderIds, _amounts, _prices, _creators, _nextOrderId);
+    }
+
+    function getStartOrderId(Order.Types _type, IMarket _market, uint256 _outcome, bytes32 _startOrderId) private view returns (bytes32) {
+        if (_startOrderId == bytes32(0)) {
+            return orders.getBestOrderId(_type, _market, _outcome);
+        }
+        // The cursor must still be an open order in this book.  If it was filled or canceled since the previous page the caller has to start over from the best order.
+        require(orders.getPrice(_startOrderId) != 0);
+        require(orders.getMarket(_startOrderId) == _market);
+        require(orders.getOutcome(_startOrderId) == _outcome);
+        require(orders.getOrderType(_startOrderId) == _type);
+        return _startOrderId;
+    }
+
+    // Reads every open order of a market in one call as parallel arrays.  Orders are grouped by outcome, then bids before asks, each book from its best order to its worst.
+    function getOrderBook(IMarket _market) external view returns (bytes32[] _orderIds, uint256[] _outcomes, uint256[] _orderTypes, uint256[] _amounts, uint256[] _prices, address[] _creators, uint256[] _moneyEscrowed, uint256[] _sharesEscrowed) {
+        OrderBook memory _orderBook = readOrderBook(_market);
+        // Copied one at a time as returning them all in a single tuple is too deep for the stack
+        _orderIds = _orderBook.orderIds;
+        _outcomes = _orderBook.outcomes;
+        _orderTypes = _orderBook.orderTypes;
+        _amounts = _orderBook.amounts;
+        _prices = _orderBook.prices;
+        _creators = _orderBook.creators;
+        _moneyEscrowed = _orderBook.moneyEscrowed;
+        _sharesEscrowed = _orderBook.sharesEscrowed;
+        return;
+    }
+
+    function readOrderBook(IMarket _market) private view returns (OrderBook memory _orderBook) {
+        uint256 _numberOfOutcomes = _market.getNumberOfOutcomes();
+        uint256 _numberOfOrders = 0;
+        for (uint256 _outcome = 0; _outcome < _numberOfOutcomes; _outcome++) {
+            _numberOfOrders += countOrders(Order.Types.Bid, _market, _outcome);
+            _numberOfOrders += countOrders(Order.Types.Ask, _market, _outcome);
+        }
+        _orderBook.orderIds = new bytes32[](_numberOfOrders);
+        _orderBook.outcomes = new uint256[](_numberOfOrders);
+        _orderBook.orderTypes = new uint256[](_numberOfOrders);
+        _orderBook.amounts = new uint256[](_numberOfOrders);
+        _orderBook.prices = new uint256[](_numberOfOrders);
+        _orderBook.creators = new address[](_numberOfOrders);
+        _orderBook.moneyEscrowed = new uint256[](_numberOfOrders);
+        _orderBook.sharesEscrowed = new uint256[](_numberOfOrders);
+        for (_outcome = 0; _outcome < _numberOfOutcomes; _outcome++) {
+            addOrders(_orderBook, Order.Types.Bid, _market, _outcome);
+            addOrders(_orderBook, Order.Types.Ask, _market, _outcome);
+        }
+        return _orderBook;
+    }
+
+    function countOrders(Order.Types _type, IMarket _market, uint256 _outcome) private view returns (uint256 _count) {
+        bytes32 _orderId = orders.getBestOrderId(_type, _market, _outcome);
+        while (_orderId != 0) {
+            _count++;
+            _orderId = orders.getWorseOrderId(_orderId);
+        }
+        return _count;
+    }
+
+    function addOrders(OrderBook memory _orderBook, Order.Types _type, IMarket _market, uint256 _outcome) private view returns (bool) {
+        bytes32 _orderId = orders.getBestOrderId(_type, _market, _outcome);
+        while (_orderId != 0) {
+            uint256 _index = _orderBook.count;
+            _orderBook.orderIds[_index] = _orderId;
+            _orderBook.outcomes[_index] = _outcome;
+            _orderBook.orderTypes[_index] = uint256(_type);
+            _orderBook.amounts[_index] = orders.getAmount(_orderId);
+            _orderBook.prices[_index] = orders.getPrice(_orderId);
+            _orderBook.creators[_index] = orders.getOrderCreator(_orderId);
+            _orderBook.moneyEscrowed[_index] = orders.getOrderMoneyEscrowed(_orderId);
+            _orderBook.sharesEscrowed[_index] = orders.getOrderSharesEscrowed(_orderId);
+            _orderBook.count++;
+            _orderId = orders.getWorseOrderId(_orderId);
+        }
+        return true;
+    }
+
     function getExistingOrders5(Order.Types _type, IMarket _market, uint256 _outcome) external view returns (bytes32[5] _results) {
         bytes32 _orderId = orders.getBestOrderId(_type, _market, _outcome);
         uint256 _index = 0;
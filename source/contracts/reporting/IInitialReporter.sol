@@ -2,6 +2,7 @@ pragma solidity 0.4.20;
 
 import 'reporting/IReportingParticipant.sol';
 import 'reporting/IMarket.sol';
+import 'reporting/IFeeWindow.sol';
 
 
 contract IInitialReporter is IReportingParticipant {
@@ -12,5 +13,6 @@ contract IInitialReporter is IReportingParticipant {
     function designatedReporterWasCorrect() public view returns (bool);
     function getDesignatedReporter() public view returns (address);
     function getReportTimestamp() public view returns (uint256);
+    function getFeeWindow() public view returns (IFeeWindow);
     function migrateREP() public returns (bool);
 }
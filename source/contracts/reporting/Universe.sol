@@ -12,6 +12,8 @@ import 'reporting/IMarket.sol';
 import 'reporting/IReputationToken.sol';
 import 'reporting/IFeeWindow.sol';
 import 'reporting/IFeeToken.sol';
+import 'reporting/IDisputeCrowdsourcer.sol';
+import 'reporting/IInitialReporter.sol';
 import 'reporting/Reporting.sol';
 import 'reporting/IRepPriceOracle.sol';
 import 'libraries/math/SafeMathUint256.sol';
@@ -453,17 +455,51 @@ contract Universe is DelegationTarget, ITyped, Initializable, IUniverse {
     }
 
     function redeemStake(IReportingParticipant[] _reportingParticipants, IFeeWindow[] _feeWindows) public onlyInGoodTimes returns (bool) {
+        // Entries with nothing to pay out to the sender are skipped with a balance check rather than a full redemption
         for (uint256 i=0; i < _reportingParticipants.length; i++) {
+            if (!isRedeemableBy(_reportingParticipants[i], msg.sender)) {
+                continue;
+            }
             _reportingParticipants[i].redeem(msg.sender);
         }
 
         for (uint256 k=0; k < _feeWindows.length; k++) {
+            if (_feeWindows[k].balanceOf(msg.sender) == 0 && _feeWindows[k].getFeeToken().balanceOf(msg.sender) == 0) {
+                continue;
+            }
             _feeWindows[k].redeem(msg.sender);
         }
 
         return true;
     }
 
+    function isRedeemableBy(IReportingParticipant _reportingParticipant, address _redeemer) private returns (bool) {
+        // A dispute crowdsourcer only pays out to holders of its tokens. An initial reporter has no balanceOf, so the probe fails for it, and it pays out to its owner whoever redeems it until its REP and fee tokens are gone.
+        bool _isDisputeCrowdsourcer;
+        uint256 _balance;
+        (_isDisputeCrowdsourcer, _balance) = probeBalanceOf(_reportingParticipant, _redeemer);
+        if (_isDisputeCrowdsourcer) {
+            return _balance > 0;
+        }
+        if (reputationToken.balanceOf(_reportingParticipant) > 0) {
+            return true;
+        }
+        return IInitialReporter(_reportingParticipant).getFeeWindow().getFeeToken().balanceOf(_reportingParticipant) > 0;
+    }
+
+    function probeBalanceOf(address _target, address _holder) private returns (bool _success, uint256 _balance) {
+        bytes4 _signature = bytes4(keccak256("balanceOf(address)"));
+        assembly {
+            //0x40 is the address where the next free memory slot is stored in Solidity
+            let _callDataMemoryOffset := mload(0x40)
+            mstore(_callDataMemoryOffset, _signature)
+            mstore(add(_callDataMemoryOffset, 0x04), _holder)
+            // A call that reverts only returns 0 here instead of reverting the redemption
+            _success := call(gas, _target, 0, _callDataMemoryOffset, 0x24, _callDataMemoryOffset, 0x20)
+            _balance := mload(_callDataMemoryOffset)
+        }
+    }
+
     function buyParticipationTokens(uint256 _attotokens) public onlyInGoodTimes returns (bool) {
         IFeeWindow _feeWindow = getOrCreateCurrentFeeWindow();
         _feeWindow.trustedUniverseBuy(msg.sender, _attotokens);
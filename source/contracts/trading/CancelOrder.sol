@@ -6,6 +6,7 @@ pragma solidity 0.4.20;
 
 
 import 'trading/ICancelOrder.sol';
+import 'IAugur.sol';
 import 'Controlled.sol';
 import 'libraries/ReentrancyGuard.sol';
 import 'libraries/CashAutoConverter.sol';
@@ -25,10 +26,26 @@ contract CancelOrder is CashAutoConverter, ReentrancyGuard, ICancelOrder {
      * @return true if successful; throw on failure
      */
     function cancelOrder(bytes32 _orderId) nonReentrant convertToAndFromCash external returns (bool) {
+        return cancelOrderInternal(IOrders(controller.lookup("Orders")), controller.getAugur(), _orderId);
+    }
+
+    /**
+     * @dev Cancels several orders in one transaction, looking up the contracts and converting cash once for the whole batch
+     * @return true if successful; throw on failure, in which case none of the orders are canceled
+     */
+    function cancelOrders(bytes32[] _orderIds) nonReentrant convertToAndFromCash external returns (bool) {
+        IOrders _orders = IOrders(controller.lookup("Orders"));
+        IAugur _augur = controller.getAugur();
+        for (uint256 _i = 0; _i < _orderIds.length; _i++) {
+            cancelOrderInternal(_orders, _augur, _orderIds[_i]);
+        }
+        return true;
+    }
+
+    function cancelOrderInternal(IOrders _orders, IAugur _augur, bytes32 _orderId) private returns (bool) {
         require(_orderId != bytes32(0));
 
         // Look up the order the sender wants to cancel
-        IOrders _orders = IOrders(controller.lookup("Orders"));
         uint256 _moneyEscrowed = _orders.getOrderMoneyEscrowed(_orderId);
         uint256 _sharesEscrowed = _orders.getOrderSharesEscrowed(_orderId);
         Order.Types _type = _orders.getOrderType(_orderId);
@@ -45,7 +62,7 @@ contract CancelOrder is CashAutoConverter, ReentrancyGuard, ICancelOrder {
         _orders.decrementTotalEscrowed(_market, _moneyEscrowed);
         _market.assertBalances();
 
-        controller.getAugur().logOrderCanceled(_market.getUniverse(), _market.getShareToken(_outcome), msg.sender, _orderId, _type, _moneyEscrowed, _sharesEscrowed);
+        _augur.logOrderCanceled(_market.getUniverse(), _market.getShareToken(_outcome), msg.sender, _orderId, _type, _moneyEscrowed, _sharesEscrowed);
 
         return true;
     }
@@ -21,7 +21,31 @@ contract CreateOrder is CashAutoConverter, ReentrancyGuard, MarketValidator {
         return _result;
     }
 
+    // Creates several orders on one market in a single transaction, paying for the market validation, cash conversion and balance assertion once rather than once per order. The arrays are indexed by order and must all be the same length.
+    function publicCreateOrders(IMarket _market, uint256[] _outcomes, Order.Types[] _types, uint256[] _attoshareAmounts, uint256[] _displayPrices, bytes32[] _betterOrderIds, bytes32[] _worseOrderIds, bytes32 _tradeGroupId) external payable marketIsLegit(_market) convertToAndFromCash onlyInGoodTimes nonReentrant returns (bytes32[]) {
+        bytes32[] memory _result = createOrdersInternal(msg.sender, _market, _outcomes, _types, _attoshareAmounts, _displayPrices, _betterOrderIds, _worseOrderIds, _tradeGroupId);
+        _market.assertBalances();
+        return _result;
+    }
+
     function createOrder(address _creator, Order.Types _type, uint256 _attoshares, uint256 _displayPrice, IMarket _market, uint256 _outcome, bytes32 _betterOrderId, bytes32 _worseOrderId, bytes32 _tradeGroupId) external onlyWhitelistedCallers nonReentrant returns (bytes32) {
+        return createOrderInternal(_creator, _type, _attoshares, _displayPrice, _market, _outcome, _betterOrderId, _worseOrderId, _tradeGroupId);
+    }
+
+    function createOrdersInternal(address _creator, IMarket _market, uint256[] _outcomes, Order.Types[] _types, uint256[] _attoshareAmounts, uint256[] _displayPrices, bytes32[] _betterOrderIds, bytes32[] _worseOrderIds, bytes32 _tradeGroupId) private returns (bytes32[] _orderIds) {
+        require(_types.length == _outcomes.length);
+        require(_attoshareAmounts.length == _outcomes.length);
+        require(_displayPrices.length == _outcomes.length);
+        require(_betterOrderIds.length == _outcomes.length);
+        require(_worseOrderIds.length == _outcomes.length);
+        _orderIds = new bytes32[](_outcomes.length);
+        for (uint256 _i = 0; _i < _outcomes.length; _i++) {
+            _orderIds[_i] = createOrderInternal(_creator, _types[_i], _attoshareAmounts[_i], _displayPrices[_i], _market, _outcomes[_i], _betterOrderIds[_i], _worseOrderIds[_i], _tradeGroupId);
+        }
+        return _orderIds;
+    }
+
+    function createOrderInternal(address _creator, Order.Types _type, uint256 _attoshares, uint256 _displayPrice, IMarket _market, uint256 _outcome, bytes32 _betterOrderId, bytes32 _worseOrderId, bytes32 _tradeGroupId) private returns (bytes32) {
         Order.Data memory _orderData = Order.create(controller, _creator, _outcome, _type, _attoshares, _displayPrice, _market, _betterOrderId, _worseOrderId);
         Order.escrowFunds(_orderData);
         require(_orderData.orders.getAmount(_orderData.getOrderId()) == 0);
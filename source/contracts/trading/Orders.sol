@@ -120,24 +120,16 @@ contract Orders is DelegationTarget, IOrders {
         bytes32 _worstOrderId = worstOrder[getBestOrderWorstOrderHash(_order.market, _order.outcome, _order.orderType)];
         IOrdersFetcher _ordersFetcher = IOrdersFetcher(controller.lookup("OrdersFetcher"));
         (_betterOrderId, _worseOrderId) = _ordersFetcher.findBoundingOrders(_order.orderType, _order.price, _bestOrderId, _worstOrderId, _betterOrderId, _worseOrderId);
-        if (_order.orderType == Order.Types.Bid) {
-            _bestOrderId = updateBestBidOrder(_order.id, _order.market, _order.price, _order.outcome);
-            _worstOrderId = updateWorstBidOrder(_order.id, _order.market, _order.price, _order.outcome);
+        // The best and worst orders follow from where the order was inserted.  Comparing prices instead leaves the worst order pointing above the tail when an order is appended behind one with the same price.
+        if (_betterOrderId == bytes32(0)) {
+            bestOrder[getBestOrderWorstOrderHash(_order.market, _order.outcome, _order.orderType)] = _order.id;
         } else {
-            _bestOrderId = updateBestAskOrder(_order.id, _order.market, _order.price, _order.outcome);
-            _worstOrderId = updateWorstAskOrder(_order.id, _order.market, _order.price, _order.outcome);
-        }
-        if (_bestOrderId == _order.id) {
-            _betterOrderId = bytes32(0);
-        }
-        if (_worstOrderId == _order.id) {
-            _worseOrderId = bytes32(0);
-        }
-        if (_betterOrderId != bytes32(0)) {
             orders[_betterOrderId].worseOrderId = _order.id;
             _order.betterOrderId = _betterOrderId;
         }
-        if (_worseOrderId != bytes32(0)) {
+        if (_worseOrderId == bytes32(0)) {
+            worstOrder[getBestOrderWorstOrderHash(_order.market, _order.outcome, _order.orderType)] = _order.id;
+        } else {
             orders[_worseOrderId].betterOrderId = _order.id;
             _order.worseOrderId = _worseOrderId;
         }
@@ -239,50 +231,6 @@ contract Orders is DelegationTarget, IOrders {
         return true;
     }
 
-    /**
-     * @dev If best bid is not set or price higher than best bid price, this order is the new best bid.
-     */
-    function updateBestBidOrder(bytes32 _orderId, IMarket _market, uint256 _price, uint256 _outcome) private returns (bytes32) {
-        bytes32 _bestBidOrderId = bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)];
-        if (_bestBidOrderId == bytes32(0) || _price > orders[_bestBidOrderId].price) {
-            bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)] = _orderId;
-        }
-        return bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)];
-    }
-
-    /**
-     * @dev If worst bid is not set or price lower than worst bid price, this order is the new worst bid.
-     */
-    function updateWorstBidOrder(bytes32 _orderId, IMarket _market, uint256 _price, uint256 _outcome) private returns (bytes32) {
-        bytes32 _worstBidOrderId = worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)];
-        if (_worstBidOrderId == bytes32(0) || _price < orders[_worstBidOrderId].price) {
-            worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)] = _orderId;
-        }
-        return worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Bid)];
-    }
-
-    /**
-     * @dev If best ask is not set or price lower than best ask price, this order is the new best ask.
-     */
-    function updateBestAskOrder(bytes32 _orderId, IMarket _market, uint256 _price, uint256 _outcome) private returns (bytes32) {
-        bytes32 _bestAskOrderId = bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)];
-        if (_bestAskOrderId == bytes32(0) || _price < orders[_bestAskOrderId].price) {
-            bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)] = _orderId;
-        }
-        return bestOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)];
-    }
-
-    /**
-     * @dev If worst ask is not set or price higher than worst ask price, this order is the new worst ask.
-     */
-    function updateWorstAskOrder(bytes32 _orderId, IMarket _market, uint256 _price, uint256 _outcome) private returns (bytes32) {
-        bytes32 _worstAskOrderId = worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)];
-        if (_worstAskOrderId == bytes32(0) || _price > orders[_worstAskOrderId].price) {
-            worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)] = _orderId;
-        }
-        return worstOrder[getBestOrderWorstOrderHash(_market, _outcome, Order.Types.Ask)];
-    }
-
     function getBestOrderWorstOrderHash(IMarket _market, uint256 _outcome, Order.Types _type) private pure returns (bytes32) {
         return sha256(_market, _outcome, _type);
     }
@@ -55,25 +55,9 @@ contract Trade is CashAutoConverter, ReentrancyGuard, MarketValidator {
     }
 
     function fillBestOrder(address _sender, Order.TradeDirections _direction, IMarket _market, uint256 _outcome, uint256 _fxpAmount, uint256 _price, bytes32 _tradeGroupId) internal nonReentrant returns (uint256 _bestFxpAmount) {
-        // we need to fill a BID if we want to SELL and we need to fill an ASK if we want to BUY
-        Order.Types _type = Order.getOrderTradingTypeFromFillerDirection(_direction);
-        IOrders _orders = IOrders(controller.lookup("Orders"));
-        bytes32 _orderId = _orders.getBestOrderId(_type, _market, _outcome);
-        _bestFxpAmount = _fxpAmount;
-
-        while (_orderId != 0 && _bestFxpAmount > 0 && msg.gas >= getFillOrderMinGasNeeded()) {
-            uint256 _orderPrice = _orders.getPrice(_orderId);
-            // If the price is acceptable relative to the trade type
-            if (_type == Order.Types.Bid ? _orderPrice >= _price : _orderPrice <= _price) {
-                bytes32 _nextOrderId = _orders.getWorseOrderId(_orderId);
-                _orders.setPrice(_market, _outcome, _orderPrice);
-                _bestFxpAmount = IFillOrder(controller.lookup("FillOrder")).fillOrder(_sender, _orderId, _bestFxpAmount, _tradeGroupId);
-                _orderId = _nextOrderId;
-            } else {
-                _orderId = bytes32(0);
-            }
-        }
-        if (_orderId != 0) {
+        bytes32 _nextOrderId;
+        (_bestFxpAmount, _nextOrderId) = fillBestOrders(_sender, _direction, _market, _outcome, _fxpAmount, _price, _tradeGroupId);
+        if (_nextOrderId != 0) {
             return 0;
         }
         return _bestFxpAmount;
@@ -136,6 +120,43 @@ contract Trade is CashAutoConverter, ReentrancyGuard, MarketValidator {
         return _bestFxpAmount;
     }
 
+    // Fills orders like publicFillBestOrder but when gas runs low it stops and returns what is left to fill instead of giving up. Filled orders leave the book, so calling again with _remainingFxpAmount carries on from the new best order. _nextOrderId is that order, or zero once there is nothing more to fill at this price.
+    function publicFillBestOrderResumable(Order.TradeDirections _direction, IMarket _market, uint256 _outcome, uint256 _fxpAmount, uint256 _price, bytes32 _tradeGroupId) external payable marketIsLegit(_market) convertToAndFromCash onlyInGoodTimes returns (uint256 _remainingFxpAmount, bytes32 _nextOrderId) {
+        (_remainingFxpAmount, _nextOrderId) = fillBestOrderResumable(msg.sender, _direction, _market, _outcome, _fxpAmount, _price, _tradeGroupId);
+        _market.assertBalances();
+        return (_remainingFxpAmount, _nextOrderId);
+    }
+
+    function fillBestOrderResumable(address _sender, Order.TradeDirections _direction, IMarket _market, uint256 _outcome, uint256 _fxpAmount, uint256 _price, bytes32 _tradeGroupId) internal nonReentrant returns (uint256 _remainingFxpAmount, bytes32 _nextOrderId) {
+        return fillBestOrders(_sender, _direction, _market, _outcome, _fxpAmount, _price, _tradeGroupId);
+    }
+
+    // Fills from the best order down until the price stops being acceptable, the amount is filled or gas runs low. _nextOrderId is non-zero only in the last case, and is then the order to carry on from.
+    function fillBestOrders(address _sender, Order.TradeDirections _direction, IMarket _market, uint256 _outcome, uint256 _fxpAmount, uint256 _price, bytes32 _tradeGroupId) private returns (uint256 _remainingFxpAmount, bytes32 _nextOrderId) {
+        // we need to fill a BID if we want to SELL and we need to fill an ASK if we want to BUY
+        Order.Types _type = Order.getOrderTradingTypeFromFillerDirection(_direction);
+        IOrders _orders = IOrders(controller.lookup("Orders"));
+        _nextOrderId = _orders.getBestOrderId(_type, _market, _outcome);
+        _remainingFxpAmount = _fxpAmount;
+
+        while (_nextOrderId != 0 && _remainingFxpAmount > 0 && msg.gas >= getFillOrderMinGasNeeded()) {
+            uint256 _orderPrice = _orders.getPrice(_nextOrderId);
+            // If the price is acceptable relative to the trade type
+            if (_type == Order.Types.Bid ? _orderPrice >= _price : _orderPrice <= _price) {
+                bytes32 _orderId = _nextOrderId;
+                _nextOrderId = _orders.getWorseOrderId(_orderId);
+                _orders.setPrice(_market, _outcome, _orderPrice);
+                _remainingFxpAmount = IFillOrder(controller.lookup("FillOrder")).fillOrder(_sender, _orderId, _remainingFxpAmount, _tradeGroupId);
+            } else {
+                _nextOrderId = bytes32(0);
+            }
+        }
+        if (_remainingFxpAmount == 0) {
+            _nextOrderId = bytes32(0);
+        }
+        return (_remainingFxpAmount, _nextOrderId);
+    }
+
     // COVERAGE: This is not covered and cannot be. We need to use a different minimum gas while running coverage since the additional logging make the cost rise a great deal
     function getFillOrderMinGasNeeded() internal pure returns (uint256) {
         return FILL_ORDER_MINIMUM_GAS_NEEDED;
@@ -25,6 +25,10 @@ app.generateCoverageEnvironment();
 
 app.instrumentTarget();
 
+// Each pytest process writes the logs it fires to its own ./allFiredEvents.<worker> shard
+const firedEventShards = () => fs.readdirSync('.').filter(filename => filename.startsWith('allFiredEvents.'));
+firedEventShards().forEach(filename => rimraf.sync('./' + filename));
+
 rimraf.sync('./coverageEnv/solidity_test_helpers');
 fs.mkdirSync('./coverageEnv/solidity_test_helpers')
 
@@ -43,6 +47,12 @@ try {
     console.log(err);
 }
 
+rimraf.sync('./allFiredEvents');
+firedEventShards().forEach(filename => {
+    fs.appendFileSync('./allFiredEvents', fs.readFileSync('./' + filename));
+    rimraf.sync('./' + filename);
+});
+
 app.generateReport();
 
 // Cleanup
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+
+from binascii import hexlify, unhexlify
+from ethereum.messages import Log
+from json import dumps, loads
+from sqlite3 import connect, Row
+from utils import normalizeAddress
+
+# Replays the events Augur.sol emits into SQLite tables so questions like "all open orders for an account" are an indexed query rather than a view call per market and outcome.  Token amounts routinely exceed SQLite's 64 bit integers so they are stored as decimal strings and converted back to longs when read.
+
+SHARE_TOKEN = 1
+CATEGORICAL = 1
+
+SCHEMA = """
+CREATE TABLE markets (market TEXT PRIMARY KEY, universe TEXT NOT NULL, creator TEXT NOT NULL, owner TEXT NOT NULL, topic TEXT NOT NULL, description TEXT NOT NULL, marketType INTEGER NOT NULL, numOutcomes INTEGER NOT NULL, minPrice TEXT NOT NULL, maxPrice TEXT NOT NULL, creationFee TEXT NOT NULL, finalized INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX marketsByUniverse ON markets (universe);
+CREATE INDEX marketsByCreator ON markets (creator);
+CREATE TABLE shareTokens (shareToken TEXT PRIMARY KEY, market TEXT NOT NULL);
+CREATE TABLE orders (orderId TEXT PRIMARY KEY, universe TEXT NOT NULL, shareToken TEXT NOT NULL, creator TEXT NOT NULL, orderType INTEGER NOT NULL, price TEXT NOT NULL, amount TEXT NOT NULL, moneyEscrowed TEXT NOT NULL, sharesEscrowed TEXT NOT NULL, tradeGroupId TEXT NOT NULL, open INTEGER NOT NULL);
+CREATE INDEX ordersByCreator ON orders (creator, open);
+CREATE INDEX ordersByShareToken ON orders (shareToken, orderType, open);
+CREATE TABLE balances (token TEXT NOT NULL, account TEXT NOT NULL, universe TEXT NOT NULL, tokenType INTEGER NOT NULL, market TEXT NOT NULL, balance TEXT NOT NULL, PRIMARY KEY (token, account));
+CREATE INDEX balancesByAccount ON balances (account);
+CREATE TABLE feeWindows (feeWindow TEXT PRIMARY KEY, universe TEXT NOT NULL, id TEXT NOT NULL, startTime INTEGER NOT NULL, endTime INTEGER NOT NULL);
+CREATE INDEX feeWindowsByUniverse ON feeWindows (universe, startTime);
+CREATE TABLE disputeCrowdsourcers (disputeCrowdsourcer TEXT PRIMARY KEY, universe TEXT NOT NULL, market TEXT NOT NULL, payoutNumerators TEXT NOT NULL, invalid INTEGER NOT NULL, size TEXT NOT NULL, completed INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX disputeCrowdsourcersByMarket ON disputeCrowdsourcers (market);
+CREATE TABLE participants (universe TEXT NOT NULL, market TEXT NOT NULL, reporter TEXT NOT NULL, disputeCrowdsourcer TEXT, amountStaked TEXT NOT NULL);
+CREATE INDEX participantsByMarket ON participants (market);
+CREATE INDEX participantsByReporter ON participants (reporter);
+"""
+
+# Columns holding uint256 values, converted to longs when rows are read back
+AMOUNT_COLUMNS = set(['minPrice', 'maxPrice', 'creationFee', 'price', 'amount', 'moneyEscrowed', 'sharesEscrowed', 'balance', 'id', 'size', 'amountStaked'])
+
+def toBytes32Column(value):
+    return hexlify(value)
+
+def fromBytes32Column(value):
+    return unhexlify(value)
+
+def rowToDict(row):
+    result = {}
+    for column in row.keys():
+        value = row[column]
+        if column in AMOUNT_COLUMNS:
+            value = long(value)
+        elif column in ('orderId', 'tradeGroupId', 'topic'):
+            value = fromBytes32Column(value)
+        elif column == 'payoutNumerators':
+            value = loads(value)
+        elif isinstance(value, unicode):
+            value = value.encode('utf-8')
+        result[column] = value
+    return result
+
+class AugurIndexer():
+    """
+    Maintains tables of markets, orders, balances, fee windows and reporting participants from Augur's logs.  Logs are either read from the chain's receipts
+
+        with AugurIndexer(fixture) as indexer:
+            createOrder.publicCreateOrder(...)
+        indexer.getOpenOrders(creator=tester.a1)
+
+    or replayed from a file of logs serialized with Log.to_dict(), one JSON object per line, as written to ./allFiredEvents in coverage mode.  Receipts only hold the logs of transactions that went through, so on a chain the tables only reflect transactions that went through, and each query inside the block first indexes the receipts added since the previous one.  Log files are written by a log listener, which also sees the logs of transactions that revert.  A reverted contract creation's address is reused by the next one, so replayed creation events overwrite an earlier row instead of failing.
+    """
+
+    def __init__(self, fixture, databasePath=':memory:'):
+        self.state = fixture.chain.head_state
+        self.augur = fixture.contracts['Augur']
+        self.augurAddress = normalizeAddress(self.augur.address)
+        self.db = connect(databasePath)
+        self.db.row_factory = Row
+        self.db.executescript(SCHEMA)
+        self.receiptCount = None
+        self.handlers = {
+            'MarketCreated': self.onMarketCreated,
+            'MarketFinalized': self.onMarketFinalized,
+            'MarketTransferred': self.onMarketTransferred,
+            'OrderCreated': self.onOrderCreated,
+            'OrderCanceled': self.onOrderCanceled,
+            'OrderFilled': self.onOrderFilled,
+            'TokensTransferred': self.onTokensTransferred,
+            'TokensMinted': self.onTokensMinted,
+            'TokensBurned': self.onTokensBurned,
+            'FeeWindowCreated': self.onFeeWindowCreated,
+            'InitialReportSubmitted': self.onInitialReportSubmitted,
+            'DisputeCrowdsourcerCreated': self.onDisputeCrowdsourcerCreated,
+            'DisputeCrowdsourcerContribution': self.onDisputeCrowdsourcerContribution,
+            'DisputeCrowdsourcerCompleted': self.onDisputeCrowdsourcerCompleted,
+        }
+
+    def __enter__(self):
+        self.receiptCount = len(self.state.receipts)
+        return self
+
+    def __exit__(self, *args):
+        if args[1]:
+            raise args[1]
+        self.sync()
+        self.receiptCount = None
+
+    def sync(self):
+        if self.receiptCount is None:
+            return
+        receipts = self.state.receipts
+        assert len(receipts) >= self.receiptCount, "The block followed by the indexer was mined or reverted past the point the indexer was entered"
+        for receipt in receipts[self.receiptCount:]:
+            for message in receipt.logs:
+                self.replayLog(message)
+        self.receiptCount = len(receipts)
+        self.db.commit()
+
+    def replayLog(self, message):
+        if normalizeAddress(message.address) != self.augurAddress or not message.topics:
+            return
+        eventData = self.augur.translator.event_data.get(message.topics[0])
+        if eventData and eventData['name'] in self.handlers:
+            log = self.augur.translator.listen(message)
+            self.handlers[log['_event_type']](log)
+
+    def replayLogFile(self, filePath):
+        with open(filePath) as logsFile:
+            for line in logsFile:
+                if not line.strip():
+                    continue
+                message = loads(line)
+                topics = [long(topic[2:] if topic.startswith('0x') else topic, 16) for topic in message['topics']]
+                data = message['data'][2:] if message['data'].startswith('0x') else message['data']
+                self.replayLog(Log(unhexlify(message['address'][-40:]), topics, unhexlify(data)))
+        self.db.commit()
+
+    ####
+    #### Handlers
+    ####
+
+    def onMarketCreated(self, log):
+        creator = normalizeAddress(log['marketCreator'])
+        # Only categorical markets log their outcomes, yes/no and scalar markets always have two
+        numOutcomes = len(log['outcomes']) if log['marketType'] == CATEGORICAL else 2
+        self.db.execute("INSERT OR REPLACE INTO markets (market, universe, creator, owner, topic, description, marketType, numOutcomes, minPrice, maxPrice, creationFee) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (normalizeAddress(log['market']), normalizeAddress(log['universe']), creator, creator, toBytes32Column(log['topic']), log['description'].decode('utf-8', 'replace'), log['marketType'], numOutcomes, str(log['minPrice']), str(log['maxPrice']), str(log['marketCreationFee'])))
+
+    def onMarketFinalized(self, log):
+        self.db.execute("UPDATE markets SET finalized = 1 WHERE market = ?", (normalizeAddress(log['market']),))
+
+    def onMarketTransferred(self, log):
+        self.db.execute("UPDATE markets SET owner = ? WHERE market = ?", (normalizeAddress(log['to']), normalizeAddress(log['market'])))
+
+    def onOrderCreated(self, log):
+        self.db.execute("INSERT OR REPLACE INTO orders (orderId, universe, shareToken, creator, orderType, price, amount, moneyEscrowed, sharesEscrowed, tradeGroupId, open) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)",
+            (toBytes32Column(log['orderId']), normalizeAddress(log['universe']), normalizeAddress(log['shareToken']), normalizeAddress(log['creator']), log['orderType'], str(log['price']), str(log['amount']), str(log['moneyEscrowed']), str(log['sharesEscrowed']), toBytes32Column(log['tradeGroupId'])))
+
+    def onOrderCanceled(self, log):
+        self.db.execute("UPDATE orders SET amount = '0', moneyEscrowed = '0', sharesEscrowed = '0', open = 0 WHERE orderId = ?", (toBytes32Column(log['orderId']),))
+
+    def onOrderFilled(self, log):
+        orderId = toBytes32Column(log['orderId'])
+        order = self.db.execute("SELECT amount, moneyEscrowed, sharesEscrowed FROM orders WHERE orderId = ?", (orderId,)).fetchone()
+        if order is None:
+            return
+        amount = long(order['amount']) - log['amountFilled']
+        self.db.execute("UPDATE orders SET amount = ?, moneyEscrowed = ?, sharesEscrowed = ?, open = ? WHERE orderId = ?",
+            (str(amount), str(long(order['moneyEscrowed']) - log['numCreatorTokens']), str(long(order['sharesEscrowed']) - log['numCreatorShares']), 1 if amount > 0 else 0, orderId))
+
+    def onTokensTransferred(self, log):
+        self.addToBalance(log, log['from'], -log['value'])
+        self.addToBalance(log, log['to'], log['value'])
+
+    def onTokensMinted(self, log):
+        self.addToBalance(log, log['target'], log['amount'])
+
+    def onTokensBurned(self, log):
+        self.addToBalance(log, log['target'], -log['amount'])
+
+    def addToBalance(self, log, account, delta):
+        token = normalizeAddress(log['token'])
+        account = normalizeAddress(account)
+        market = normalizeAddress(log['market'])
+        if log['tokenType'] == SHARE_TOKEN:
+            self.db.execute("INSERT OR IGNORE INTO shareTokens (shareToken, market) VALUES (?, ?)", (token, market))
+        row = self.db.execute("SELECT balance FROM balances WHERE token = ? AND account = ?", (token, account)).fetchone()
+        balance = (long(row['balance']) if row else 0) + delta
+        self.db.execute("INSERT OR REPLACE INTO balances (token, account, universe, tokenType, market, balance) VALUES (?, ?, ?, ?, ?, ?)",
+            (token, account, normalizeAddress(log['universe']), log['tokenType'], market, str(balance)))
+
+    def onFeeWindowCreated(self, log):
+        self.db.execute("INSERT OR REPLACE INTO feeWindows (feeWindow, universe, id, startTime, endTime) VALUES (?, ?, ?, ?, ?)",
+            (normalizeAddress(log['feeWindow']), normalizeAddress(log['universe']), str(log['id']), log['startTime'], log['endTime']))
+
+    def onInitialReportSubmitted(self, log):
+        self.db.execute("INSERT INTO participants (universe, market, reporter, disputeCrowdsourcer, amountStaked) VALUES (?, ?, ?, NULL, ?)",
+            (normalizeAddress(log['universe']), normalizeAddress(log['market']), normalizeAddress(log['reporter']), str(log['amountStaked'])))
+
+    def onDisputeCrowdsourcerCreated(self, log):
+        self.db.execute("INSERT OR REPLACE INTO disputeCrowdsourcers (disputeCrowdsourcer, universe, market, payoutNumerators, invalid, size) VALUES (?, ?, ?, ?, ?, ?)",
+            (normalizeAddress(log['disputeCrowdsourcer']), normalizeAddress(log['universe']), normalizeAddress(log['market']), dumps(log['payoutNumerators']), int(log['invalid']), str(log['size'])))
+
+    def onDisputeCrowdsourcerContribution(self, log):
+        self.db.execute("INSERT INTO participants (universe, market, reporter, disputeCrowdsourcer, amountStaked) VALUES (?, ?, ?, ?, ?)",
+            (normalizeAddress(log['universe']), normalizeAddress(log['market']), normalizeAddress(log['reporter']), normalizeAddress(log['disputeCrowdsourcer']), str(log['amountStaked'])))
+
+    def onDisputeCrowdsourcerCompleted(self, log):
+        self.db.execute("UPDATE disputeCrowdsourcers SET completed = 1 WHERE disputeCrowdsourcer = ?", (normalizeAddress(log['disputeCrowdsourcer']),))
+
+    ####
+    #### Queries
+    ####
+
+    def query(self, sql, parameters=()):
+        self.sync()
+        return [rowToDict(row) for row in self.db.execute(sql, parameters)]
+
+    def getMarkets(self, universe=None, creator=None):
+        conditions = []
+        parameters = []
+        if universe:
+            conditions.append("universe = ?")
+            parameters.append(normalizeAddress(universe))
+        if creator:
+            conditions.append("creator = ?")
+            parameters.append(normalizeAddress(creator))
+        return self.query("SELECT * FROM markets" + (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters)
+
+    def getOpenOrders(self, creator=None, shareToken=None, orderType=None):
+        # The market is only known once one of its share tokens has been moved, minted or burned
+        conditions = ["open = 1"]
+        parameters = []
+        if creator:
+            conditions.append("creator = ?")
+            parameters.append(normalizeAddress(creator))
+        if shareToken:
+            conditions.append("orders.shareToken = ?")
+            parameters.append(normalizeAddress(shareToken))
+        if orderType is not None:
+            conditions.append("orderType = ?")
+            parameters.append(orderType)
+        return self.query("SELECT orders.*, shareTokens.market FROM orders LEFT JOIN shareTokens ON orders.shareToken = shareTokens.shareToken WHERE " + " AND ".join(conditions), parameters)
+
+    def getBalance(self, token, account):
+        self.sync()
+        row = self.db.execute("SELECT balance FROM balances WHERE token = ? AND account = ?", (normalizeAddress(token), normalizeAddress(account))).fetchone()
+        return long(row['balance']) if row else 0
+
+    def getBalances(self, account):
+        return self.query("SELECT * FROM balances WHERE account = ? AND balance != '0'", (normalizeAddress(account),))
+
+    def getFeeWindows(self, universe):
+        return self.query("SELECT * FROM feeWindows WHERE universe = ? ORDER BY startTime", (normalizeAddress(universe),))
+
+    def getParticipants(self, market=None, reporter=None):
+        conditions = []
+        parameters = []
+        if market:
+            conditions.append("market = ?")
+            parameters.append(normalizeAddress(market))
+        if reporter:
+            conditions.append("reporter = ?")
+            parameters.append(normalizeAddress(reporter))
+        return self.query("SELECT * FROM participants" + (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters)
+
+    def getDisputeCrowdsourcers(self, market):
+        return self.query("SELECT * FROM disputeCrowdsourcers WHERE market = ?", (normalizeAddress(market),))
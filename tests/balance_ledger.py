@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+from ethereum.tools.tester import ABIContract
+from utils import normalizeAddress
+
+# Keeps per token and account balance changes from the TokensTransferred, TokensMinted and TokensBurned events Augur.sol emits for REP, shares, dispute crowdsourcers, fee windows and fee tokens, so a test can assert many balance deltas without a balanceOf call before and after each one.  Cash does not log through Augur and is not tracked.
+
+class BalanceLedger():
+    """
+    Tracks how much every Augur token balance has changed since the ledger was entered.
+
+        with BalanceLedger(fixture) as ledger:
+            with TokenDelta(reputationToken, -amount, tester.a1, "Disputing did not reduce REP balance correctly", ledger=ledger):
+                market.contribute([0, market.getNumTicks()], False, amount, sender=tester.k1)
+
+    Logs are read from the receipts of the block being built rather than from a log listener, since listeners also see the logs of transactions that revert.  Each read only decodes the receipts added since the previous one.  On exit every balance the ledger saw change is compared against balanceOf, with starting balances read from a copy of the state taken on entry.
+    """
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.state = fixture.chain.head_state
+        self.augur = fixture.contracts['Augur']
+        self.augurAddress = normalizeAddress(self.augur.address)
+        # Every Augur token has the ERC20 balanceOf, so one translator reads them all
+        self.tokenTranslator = fixture.contracts['Cash'].translator
+        self.deltas = {}
+        self.startingBalances = {}
+        self.startingState = None
+        self.receiptCount = None
+        self.handlers = {
+            'TokensTransferred': self.onTokensTransferred,
+            'TokensMinted': self.onTokensMinted,
+            'TokensBurned': self.onTokensBurned,
+        }
+
+    def __enter__(self):
+        self.state.commit()
+        self.startingState = self.state.ephemeral_clone()
+        self.receiptCount = len(self.state.receipts)
+        return self
+
+    def __exit__(self, *args):
+        if args[1]:
+            raise args[1]
+        self.assertMatchesChain()
+
+    def sync(self):
+        receipts = self.state.receipts
+        assert len(receipts) >= self.receiptCount, "The block followed by the ledger was mined or reverted past the point the ledger was entered"
+        for receipt in receipts[self.receiptCount:]:
+            for message in receipt.logs:
+                self.processLog(message)
+        self.receiptCount = len(receipts)
+
+    def processLog(self, message):
+        if normalizeAddress(message.address) != self.augurAddress or not message.topics:
+            return
+        eventData = self.augur.translator.event_data.get(message.topics[0])
+        if eventData and eventData['name'] in self.handlers:
+            log = self.augur.translator.listen(message)
+            self.handlers[log['_event_type']](log)
+
+    def onTokensTransferred(self, log):
+        self.addToDelta(log['token'], log['from'], -log['value'])
+        self.addToDelta(log['token'], log['to'], log['value'])
+
+    def onTokensMinted(self, log):
+        self.addToDelta(log['token'], log['target'], log['amount'])
+
+    def onTokensBurned(self, log):
+        self.addToDelta(log['token'], log['target'], -log['amount'])
+
+    def addToDelta(self, token, account, delta):
+        key = (normalizeAddress(token), normalizeAddress(account))
+        self.deltas[key] = self.deltas.get(key, 0) + delta
+
+    def getDelta(self, token, account):
+        self.sync()
+        return self.deltas.get((normalizeAddress(token), normalizeAddress(account)), 0)
+
+    def getBalance(self, token, account):
+        return self.getStartingBalances([(normalizeAddress(token), normalizeAddress(account))])[0] + self.getDelta(token, account)
+
+    def getStartingBalances(self, keys):
+        # The starting state never changes, so each balance is read from it once
+        missing = [key for key in keys if key not in self.startingBalances]
+        if missing:
+            results = self.fixture.batchRead([(ABIContract(self.fixture.chain, self.tokenTranslator, token), 'balanceOf', [account]) for token, account in missing], state=self.startingState)
+            self.startingBalances.update(zip(missing, results))
+        return [self.startingBalances[key] for key in keys]
+
+    def assertMatchesChain(self):
+        self.sync()
+        keys = sorted(self.deltas)
+        startingBalances = self.getStartingBalances(keys)
+        balances = self.fixture.batchRead([(ABIContract(self.fixture.chain, self.tokenTranslator, token), 'balanceOf', [account]) for token, account in keys])
+        for (token, account), startingBalance, balance in zip(keys, startingBalances, balances):
+            replayedBalance = startingBalance + self.deltas[(token, account)]
+            assert replayedBalance == balance, "Replayed balance of %s in token %s is %i but balanceOf is %i" % (account, token, replayedBalance, balance)
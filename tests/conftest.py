@@ -4,20 +4,30 @@ from ethereum.state import State
 from ethereum.tools import tester
 from ethereum.tools.tester import Chain
 from ethereum.abi import ContractTranslator
-from ethereum.tools.tester import ABIContract
+from ethereum.tools.tester import ABIContract, TransactionFailed
+from ethereum.messages import apply_message
 from ethereum.config import config_metropolis, Env
+from ethereum.db import EphemDB, OverlayDB
 from ethereum import utils
 from ethereum import vm
 import ethereum
 from io import open as io_open
 from json import dump as json_dump, load as json_load, dumps as json_dumps
-from os import path, walk, makedirs, listdir, remove as remove_file
+from os import path, walk, makedirs, listdir, fdopen, rename, remove as remove_file
+from multiprocessing import Pool, cpu_count
+from tempfile import mkstemp
+from fcntl import flock, LOCK_EX, LOCK_UN
+from time import time
 import pytest
 from re import findall
-from solc import compile_standard
+from solc import compile_standard, get_solc_version
+from solc.exceptions import SolcError
 from utils import bytesToHexString, bytesToLong, longToHexString, stringToBytes, garbageBytes20, garbageBytes32, twentyZeros, thirtyTwoZeros
 from copy import deepcopy
+from cPickle import dumps as pickle_dumps, load as pickle_load, HIGHEST_PROTOCOL
+from hashlib import sha256
 from reporting_utils import proceedToFork, finalizeFork
+from fork_scenarios import FORK_SCENARIOS
 
 # Make TXs free.
 ethereum.opcodes.GCONTRACTBYTE = 0
@@ -44,6 +54,124 @@ BASE_PATH = path.dirname(path.abspath(__file__))
 def resolveRelativePath(relativeFilePath):
     return path.abspath(path.join(BASE_PATH, relativeFilePath))
 COMPILATION_CACHE = resolveRelativePath('./compilation_cache')
+GAS_BASELINES_PATH = resolveRelativePath('./gas_baselines.json')
+
+# Gas measurements recorded by GasBenchmark during this process, keyed by scenario name
+GAS_MEASUREMENTS = {}
+
+SOLC_OPTIMIZER_SETTINGS = {
+    'enabled': True,
+    'runs': 200
+}
+
+SOLC_OUTPUT_SELECTION = {
+    "*": {
+        '*': [ 'metadata', 'evm.bytecode', 'evm.deployedBytecode', 'abi' ]
+    }
+}
+
+def writeCompilationCacheEntry(cachePath, contractPath, name, compilerOutput):
+    contractOutput = compilerOutput['contracts'][contractPath][name]
+    # Source maps refer to files by the id solc assigned them in this particular compilation, so keep the id to path mapping with the entry
+    sourceList = [None] * len(compilerOutput['sources'])
+    for sourcePath, source in compilerOutput['sources'].items():
+        sourceList[source['id']] = sourcePath
+    compiledContract = {
+        'name': name,
+        'bytecode': contractOutput['evm']['bytecode']['object'],
+        'sourceMap': contractOutput['evm']['bytecode'].get('sourceMap', ''),
+        'deployedBytecode': contractOutput['evm']['deployedBytecode']['object'],
+        'deployedSourceMap': contractOutput['evm']['deployedBytecode'].get('sourceMap', ''),
+        'sourceList': sourceList,
+        'abi': contractOutput['abi']
+    }
+    writeFileAtomically(cachePath, json_dumps(compiledContract))
+
+def writeFileAtomically(filePath, contents):
+    # Write to a temporary file and rename it into place so concurrent processes never observe a partially written file
+    fileDescriptor, temporaryPath = mkstemp(dir=path.dirname(filePath))
+    with fdopen(fileDescriptor, 'wb') as file:
+        file.write(contents)
+    rename(temporaryPath, filePath)
+
+def compileSoliditySources(absoluteFilePaths, remappings):
+    compilerParameter = {
+        'language': 'Solidity',
+        'sources': dict((absoluteFilePath, { 'urls': [ absoluteFilePath ] }) for absoluteFilePath in absoluteFilePaths),
+        'settings': {
+            'remappings': remappings,
+            'optimizer': SOLC_OPTIMIZER_SETTINGS,
+            'outputSelection': SOLC_OUTPUT_SELECTION
+        }
+    }
+    return compile_standard(compilerParameter, allow_paths=resolveRelativePath("../"))
+
+def compileContractBatch(batch):
+    # Runs in a worker process, so it must be a module level function.  Returns the contracts that could not be cached.
+    remappings, contracts = batch
+    try:
+        compilerOutput = compileSoliditySources([contractPath for contractPath, _ in contracts], remappings)
+    except SolcError:
+        return [contractPath for contractPath, _ in contracts]
+    failedContracts = []
+    for contractPath, cachePath in contracts:
+        name = path.splitext(path.basename(contractPath))[0]
+        if name not in compilerOutput['contracts'].get(contractPath, {}):
+            failedContracts.append(contractPath)
+            continue
+        writeCompilationCacheEntry(cachePath, contractPath, name, compilerOutput)
+    return failedContracts
+
+# Set by ContractsFixture.buildScenarioSnapshots for the worker processes it forks, so they inherit the fixture and the base snapshot instead of having them pickled across
+SCENARIO_BUILD = None
+
+def buildScenarioSnapshot(scenarioName):
+    # Runs in a worker process, so it must be a module level function.  The scenario's world gets back to the parent process through the snapshot disk cache.
+    fixture, baseSnapshot, scenarios = SCENARIO_BUILD
+    contracts = fixture.branchFromSnapshot(baseSnapshot)
+    scenarios[scenarioName](fixture, contracts)
+    snapshot = fixture.createSnapshot()
+    snapshot.update(contracts)
+    fixture.saveSnapshotToDisk(scenarioName, snapshot)
+
+class BufferedLogWriter():
+    # Coverage runs fire hundreds of thousands of logs, so they are serialized as compact JSON lines and written out in large chunks rather than reopening the file for every log
+
+    def __init__(self, filePath, bufferSize=1 << 20):
+        self.filePath = filePath
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.bufferedBytes = 0
+        if path.isfile(self.filePath):
+            remove_file(self.filePath)
+
+    def write(self, message):
+        line = json_dumps(message.to_dict(), separators=(',', ':')) + '\n'
+        self.buffer.append(line)
+        self.bufferedBytes += len(line)
+        if self.bufferedBytes >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.filePath, 'ab') as logsFile:
+            logsFile.write(''.join(self.buffer))
+        self.buffer = []
+        self.bufferedBytes = 0
+
+class FileLock():
+
+    def __init__(self, lockPath):
+        self.lockPath = lockPath
+
+    def __enter__(self):
+        self.lockFile = open(self.lockPath, 'a')
+        flock(self.lockFile, LOCK_EX)
+
+    def __exit__(self, *args):
+        flock(self.lockFile, LOCK_UN)
+        self.lockFile.close()
 
 class bcolors:
     WARN = '\033[93m'
@@ -56,15 +184,90 @@ CONTRACT_SIZE_WARN_LEVEL = CONTRACT_SIZE_LIMIT * 0.75
 def pytest_addoption(parser):
     parser.addoption("--cover", action="store_true", help="Use the coverage enabled contracts. Meant to be used with the tools/generateCoverageReport.js script")
     parser.addoption("--subFork", action="store_true", help="Use the coverage enabled contracts. Meant to be used with the tools/generateCoverageReport.js script")
+    parser.addoption("--rebuildSnapshots", action="store_true", help="Ignore the deployed world snapshots cached on disk and rebuild them")
+    parser.addoption("--gasBenchmark", action="store_true", help="Run the gas benchmark scenarios and compare them against tests/gas_baselines.json")
+    parser.addoption("--updateGasBaselines", action="store_true", help="Write the gas used by each benchmark scenario back to tests/gas_baselines.json instead of failing on regressions")
+    parser.addoption("--gasTolerance", action="store", type="float", default=0.01, help="Fraction by which a benchmark scenario may exceed its baseline before it is treated as a regression")
+    parser.addoption("--gasReport", action="store", default="./gas_report.json", help="Where to write the JSON report comparing benchmark gas usage with the baselines")
 
 def pytest_configure(config):
     # register an additional marker
     config.addinivalue_line("markers",
         "cover: use coverage contracts")
+    config.addinivalue_line("markers",
+        "gasBenchmark: gas benchmark scenario, only run when --gasBenchmark is passed")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("gasBenchmark"):
+        return
+    skipGasBenchmark = pytest.mark.skip(reason="gas benchmark, run with --gasBenchmark")
+    for item in items:
+        if "gasBenchmark" in item.keywords:
+            item.add_marker(skipGasBenchmark)
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not config.getoption("gasBenchmark"):
+        return
+    reportPath = config.getoption("gasReport")
+    # xdist workers hand their measurements to the master process through a shard file next to the report
+    slaveInput = getattr(config, 'slaveinput', None)
+    if slaveInput is not None:
+        if GAS_MEASUREMENTS:
+            writeFileAtomically(path.abspath('%s.%s' % (reportPath, slaveInput['slaveid'])), json_dumps(GAS_MEASUREMENTS))
+        return
+    measurements = dict(GAS_MEASUREMENTS)
+    reportDirectory = path.dirname(path.abspath(reportPath))
+    reportName = path.basename(reportPath)
+    for filename in listdir(reportDirectory):
+        if not filename.startswith(reportName + '.'):
+            continue
+        shardPath = path.join(reportDirectory, filename)
+        with io_open(shardPath, 'rb') as file:
+            measurements.update(json_load(file))
+        remove_file(shardPath)
+    baselines = loadGasBaselines()
+    writeFileAtomically(path.abspath(reportPath), json_dumps(generateGasReport(measurements, baselines, config.getoption("gasTolerance")), indent=4, sort_keys=True, separators=(',', ': ')))
+    if config.getoption("updateGasBaselines") and measurements:
+        baselines.update(measurements)
+        writeFileAtomically(GAS_BASELINES_PATH, json_dumps(baselines, indent=4, sort_keys=True, separators=(',', ': ')) + '\n')
+
+def loadGasBaselines():
+    if not path.isfile(GAS_BASELINES_PATH):
+        return {}
+    with io_open(GAS_BASELINES_PATH, 'rb') as file:
+        return json_load(file)
+
+def getGasStatus(gasUsed, baseline, tolerance):
+    if baseline is None:
+        return 'new'
+    if gasUsed is None:
+        return 'notRun'
+    if gasUsed > baseline * (1 + tolerance):
+        return 'regressed'
+    if gasUsed < baseline:
+        return 'improved'
+    return 'unchanged'
+
+def generateGasReport(measurements, baselines, tolerance):
+    report = {}
+    for scenario in set(measurements) | set(baselines):
+        gasUsed = measurements.get(scenario)
+        baseline = baselines.get(scenario)
+        report[scenario] = {
+            'gasUsed': gasUsed,
+            'baseline': baseline,
+            'delta': gasUsed - baseline if gasUsed is not None and baseline is not None else None,
+            'status': getGasStatus(gasUsed, baseline, tolerance)
+        }
+    return report
 
 class ContractsFixture:
     signatures = {}
     compiledCode = {}
+    compiledContracts = {}
+    translators = {}
+    solcVersion = None
 
     ####
     #### Static Methods
@@ -75,94 +278,149 @@ class ContractsFixture:
         if not path.exists(COMPILATION_CACHE):
             makedirs(COMPILATION_CACHE)
 
-    def generateSignature(self, relativeFilePath):
+    @staticmethod
+    def lockCache(lockName):
+        # Serializes work on the shared cache directory across processes, e.g. pytest-xdist workers, so only one of them does it and the others reuse the result
+        ContractsFixture.ensureCacheDirectoryExists()
+        return FileLock(path.join(COMPILATION_CACHE, lockName + '.lock'))
+
+    @staticmethod
+    def getSolcVersion():
+        if ContractsFixture.solcVersion is None:
+            ContractsFixture.solcVersion = str(get_solc_version())
+        return ContractsFixture.solcVersion
+
+    def getCompilationCacheKey(self, relativeFilePath, dependencySet):
+        # The key covers everything that can change the compiler output: the full transitive source set, the compiler version, the optimizer settings and the requested outputs.  File contents are hashed rather than relying on mtimes so that a fresh checkout or a restored CI cache can reuse the previous output.
+        hasher = sha256()
+        hasher.update(ContractsFixture.getSolcVersion())
+        hasher.update(json_dumps(SOLC_OPTIMIZER_SETTINGS, sort_keys=True))
+        hasher.update(json_dumps(SOLC_OUTPUT_SELECTION, sort_keys=True))
+        hasher.update(path.relpath(relativeFilePath, BASE_PATH))
+        for dependencyPath in sorted(dependencySet):
+            hasher.update(path.relpath(dependencyPath, BASE_PATH))
+            with io_open(dependencyPath, mode='rb') as file:
+                hasher.update(sha256(file.read()).digest())
+        return hasher.hexdigest()
+
+    def getCompilationCachePath(self, relativeFilePath, dependencySet=None):
+        # Fills dependencySet, when given, with the transitive source set the key was computed from
+        dependencySet = set() if dependencySet is None else dependencySet
+        self.getAllDependencies(relativeFilePath, dependencySet)
         ContractsFixture.ensureCacheDirectoryExists()
+        return path.join(COMPILATION_CACHE, self.getCompilationCacheKey(relativeFilePath, dependencySet) + '.json')
+
+    def getCompiledContract(self, relativeFilePath):
+        if relativeFilePath in ContractsFixture.compiledContracts:
+            return ContractsFixture.compiledContracts[relativeFilePath]
         filename = path.basename(relativeFilePath)
         name = path.splitext(filename)[0]
-        outputPath = path.join(COMPILATION_CACHE,  name + 'Signature')
-        lastCompilationTime = path.getmtime(outputPath) if path.isfile(outputPath) else 0
-        if path.getmtime(relativeFilePath) > lastCompilationTime:
-            print('generating signature for ' + name)
-            extension = path.splitext(filename)[1]
-            signature = None
-            if extension == '.sol':
-                signature = self.compileSolidity(relativeFilePath)['abi']
-            else:
-                raise
-            with open(outputPath, mode='w') as file:
-                json_dump(signature, file)
-        else:
-            pass#print('using cached signature for ' + name)
-        with open(outputPath, 'r') as file:
-            signature = json_load(file)
-        return(signature)
+        extension = path.splitext(filename)[1]
+        if extension != '.sol':
+            raise Exception("Unable to compile %s, only solidity contracts are supported" % relativeFilePath)
+        cachePath = self.getCompilationCachePath(relativeFilePath)
+        if not path.isfile(cachePath):
+            print('compiling ' + name + '...')
+            writeCompilationCacheEntry(cachePath, resolveRelativePath(relativeFilePath), name, self.compileSolidity(relativeFilePath))
+        with open(cachePath, 'r') as file:
+            compiledContract = json_load(file)
+        ContractsFixture.compiledContracts[relativeFilePath] = compiledContract
+        return compiledContract
+
+    def generateSignature(self, relativeFilePath):
+        return self.getCompiledContract(relativeFilePath)['abi']
 
     def getCompiledCode(self, relativeFilePath):
         filename = path.basename(relativeFilePath)
         name = path.splitext(filename)[0]
         if name in ContractsFixture.compiledCode:
             return ContractsFixture.compiledCode[name]
-        dependencySet = set()
-        self.getAllDependencies(relativeFilePath, dependencySet)
-        ContractsFixture.ensureCacheDirectoryExists()
-        compiledOutputPath = path.join(COMPILATION_CACHE, name)
-        lastCompilationTime = path.getmtime(compiledOutputPath) if path.isfile(compiledOutputPath) else 0
-        needsRecompile = False
-        for dependencyPath in dependencySet:
-            if (path.getmtime(dependencyPath) > lastCompilationTime):
-                needsRecompile = True
-                break
-        if (needsRecompile):
-            print('compiling ' + name + '...')
-            extension = path.splitext(filename)[1]
-            compiledCode = None
-            if extension == '.sol':
-                compiledCode = bytearray.fromhex(self.compileSolidity(relativeFilePath)['evm']['bytecode']['object'])
-            else:
-                raise
-            with io_open(compiledOutputPath, mode='wb') as file:
-                file.write(compiledCode)
-        else:
-            pass#print('using cached compilation for ' + name)
-        with io_open(compiledOutputPath, mode='rb') as file:
-            compiledCode = file.read()
-            contractSize = len(compiledCode)
-            if (contractSize >= CONTRACT_SIZE_LIMIT):
-                print('%sContract %s is OVER the size limit by %d bytes%s' % (bcolors.FAIL, name, contractSize - CONTRACT_SIZE_LIMIT, bcolors.ENDC))
-            elif (contractSize >= CONTRACT_SIZE_WARN_LEVEL):
-                print('%sContract %s is under size limit by only %d bytes%s' % (bcolors.WARN, name, CONTRACT_SIZE_LIMIT - contractSize, bcolors.ENDC))
-            elif (contractSize > 0):
-                pass#print('Size: %i' % contractSize)
-            ContractsFixture.compiledCode[name] = compiledCode
-            return(compiledCode)
+        compiledCode = str(bytearray.fromhex(self.getCompiledContract(relativeFilePath)['bytecode']))
+        contractSize = len(compiledCode)
+        if (contractSize >= CONTRACT_SIZE_LIMIT):
+            print('%sContract %s is OVER the size limit by %d bytes%s' % (bcolors.FAIL, name, contractSize - CONTRACT_SIZE_LIMIT, bcolors.ENDC))
+        elif (contractSize >= CONTRACT_SIZE_WARN_LEVEL):
+            print('%sContract %s is under size limit by only %d bytes%s' % (bcolors.WARN, name, CONTRACT_SIZE_LIMIT - contractSize, bcolors.ENDC))
+        elif (contractSize > 0):
+            pass#print('Size: %i' % contractSize)
+        ContractsFixture.compiledCode[name] = compiledCode
+        return(compiledCode)
 
     def compileSolidity(self, relativeFilePath):
         absoluteFilePath = resolveRelativePath(relativeFilePath)
-        filename = path.basename(relativeFilePath)
-        contractName = path.splitext(filename)[0]
         print absoluteFilePath
-        compilerParameter = {
-            'language': 'Solidity',
-            'sources': {
-                absoluteFilePath: {
-                    'urls': [ absoluteFilePath ]
-                }
-            },
-            'settings': {
-                # TODO: Remove 'remappings' line below and update 'sources' line above
-                'remappings': [ '=%s/' % resolveRelativePath(self.relativeContractsPath), 'TEST=%s/' % resolveRelativePath(self.relativeTestContractsPath) ],
-                'optimizer': {
-                    'enabled': True,
-                    'runs': 200
-                },
-                'outputSelection': {
-                    "*": {
-                        '*': [ 'metadata', 'evm.bytecode', 'evm.sourceMap', 'abi' ]
-                    }
-                }
-            }
-        }
-        return compile_standard(compilerParameter, allow_paths=resolveRelativePath("../"))['contracts'][absoluteFilePath][contractName]
+        return self.compileSoliditySources([absoluteFilePath])
+
+    def compileSoliditySources(self, absoluteFilePaths):
+        return compileSoliditySources(absoluteFilePaths, self.getCompilerRemappings())
+
+    def getCompilerRemappings(self):
+        # TODO: Remove 'remappings' and pass the import paths as sources instead
+        return [ '=%s/' % resolveRelativePath(self.relativeContractsPath), 'TEST=%s/' % resolveRelativePath(self.relativeTestContractsPath) ]
+
+    def getBulkCompilationPaths(self):
+        # Mirrors the directory filters used by uploadAllContracts, uploadAllMockContracts and uploadExternalContracts
+        contractPaths = set()
+        for directory, _, filenames in walk(resolveRelativePath(self.relativeContractsPath)):
+            if 'legacy_reputation' in directory: continue
+            for filename in filenames:
+                name = path.splitext(filename)[0]
+                extension = path.splitext(filename)[1]
+                if extension != '.sol': continue
+                if 'external' in directory and name != 'OrdersFinder': continue
+                contractPaths.add(path.join(directory, filename))
+        for directory, _, filenames in walk(resolveRelativePath(self.relativeTestContractsPath)):
+            for filename in filenames:
+                name = path.splitext(filename)[0]
+                extension = path.splitext(filename)[1]
+                if extension != '.sol': continue
+                if not name.startswith('Mock') and name not in ['TestController', 'TestTrade', 'Constants']: continue
+                contractPaths.add(path.join(directory, filename))
+        return contractPaths
+
+    def compileAllContracts(self):
+        with ContractsFixture.lockCache('compilation'):
+            self.compileUncachedContracts()
+
+    def compileUncachedContracts(self):
+        # Compile everything that is missing from the cache up front, fanning the work out over one process per core
+        uncompiledContracts = {}
+        for contractPath in self.getBulkCompilationPaths():
+            dependencySet = set()
+            cachePath = self.getCompilationCachePath(contractPath, dependencySet)
+            if not path.isfile(cachePath):
+                uncompiledContracts[contractPath] = (cachePath, dependencySet)
+        if not uncompiledContracts:
+            return
+        batches = self.partitionCompilationBatches(uncompiledContracts, cpu_count())
+        print('compiling %i contracts in %i batches...' % (len(uncompiledContracts), len(batches)))
+        if len(batches) == 1:
+            failedContracts = compileContractBatch(batches[0])
+        else:
+            pool = Pool(len(batches))
+            try:
+                failedContracts = sum(pool.map(compileContractBatch, batches), [])
+            finally:
+                pool.close()
+                pool.join()
+        if failedContracts:
+            # Leave these uncached, they will be compiled individually on upload and report their own errors
+            print('%sBulk compilation failed for %i contracts, falling back to compiling them individually%s' % (bcolors.WARN, len(failedContracts), bcolors.ENDC))
+
+    def partitionCompilationBatches(self, uncompiledContracts, batchCount):
+        # Each batch is compiled in a single solc invocation, so contracts that import the same files are grouped together to avoid parsing shared dependencies in several processes.  The largest dependency sets are placed first so the batches end up roughly balanced.
+        batches = []
+        for contractPath in sorted(uncompiledContracts, key=lambda contractPath: -len(uncompiledContracts[contractPath][1])):
+            cachePath, dependencySet = uncompiledContracts[contractPath]
+            if len(batches) < batchCount:
+                batches.append({ 'contracts': [], 'dependencies': set() })
+                bestBatch = batches[-1]
+            else:
+                bestBatch = min(batches, key=lambda batch: (len(dependencySet - batch['dependencies']) + len(batch['dependencies'])))
+            bestBatch['contracts'].append((contractPath, cachePath))
+            bestBatch['dependencies'] |= dependencySet
+        remappings = self.getCompilerRemappings()
+        return [(remappings, batch['contracts']) for batch in batches]
 
     def getAllDependencies(self, filePath, knownDependencies):
         knownDependencies.add(filePath)
@@ -207,17 +465,27 @@ class ContractsFixture:
 
         self.chain = Chain(env=Env(config=config_metropolis))
         self.contracts = {}
+        self.deployments = {}
         self.testerAddress = self.generateTesterMap('a')
         self.testerKey = self.generateTesterMap('k')
         self.testerAddressToKey = dict(zip(self.testerAddress.values(), self.testerKey.values()))
-        if path.isfile('./allFiredEvents'):
-            remove_file('./allFiredEvents')
         self.relativeContractsPath = '../source/contracts'
         self.relativeTestContractsPath = 'solidity_test_helpers'
         self.externalContractsPath = '../source/contracts/external'
         self.coverageMode = pytest.config.option.cover
         self.subFork = pytest.config.option.subFork
+        self.rebuildSnapshots = pytest.config.option.rebuildSnapshots
+        self.startTime = time()
+        self.deployedWorldHash = None
+        self.sessionSnapshots = {}
+        self.updateGasBaselines = pytest.config.option.updateGasBaselines
+        self.gasTolerance = pytest.config.option.gasTolerance
+        self.gasBaselines = loadGasBaselines()
+        self.logWriter = None
         if self.coverageMode:
+            # Each xdist worker writes its own shard, tools/generateCoverageReport.js merges them into ./allFiredEvents
+            slaveInput = getattr(pytest.config, 'slaveinput', None)
+            self.logWriter = BufferedLogWriter('./allFiredEvents.%s' % (slaveInput['slaveid'] if slaveInput else 'master'))
             self.chain.head_state.log_listeners.append(self.writeLogToFile)
             self.relativeContractsPath = '../coverageEnv/contracts'
             self.relativeTestContractsPath = '../coverageEnv/solidity_test_helpers'
@@ -225,8 +493,22 @@ class ContractsFixture:
 
 
     def writeLogToFile(self, message):
-        with open('./allFiredEvents', 'a') as logsFile:
-            logsFile.write(json_dumps(message.to_dict()) + '\n')
+        self.logWriter.write(message)
+
+    def flushLogs(self):
+        if self.logWriter:
+            self.logWriter.flush()
+
+    def recordGasUsed(self, scenario, gasUsed):
+        GAS_MEASUREMENTS[scenario] = gasUsed
+        baseline = self.gasBaselines.get(scenario)
+        if baseline is None:
+            print "GAS USED WITH %s : %i. NO BASELINE" % (scenario, gasUsed)
+            assert self.updateGasBaselines, "%s has no baseline in tests/gas_baselines.json. Run with --updateGasBaselines to record one" % scenario
+            return
+        print "GAS USED WITH %s : %i. BASELINE: %i DELTA: %i" % (scenario, gasUsed, baseline, gasUsed - baseline)
+        if not self.updateGasBaselines:
+            assert getGasStatus(gasUsed, baseline, self.gasTolerance) != 'regressed', "%s used %i gas, more than %.2f%% over its baseline of %i. Run with --updateGasBaselines if this is expected" % (scenario, gasUsed, self.gasTolerance * 100, baseline)
 
     def distributeRep(self, universe):
         # Get the reputation token for this universe and migrate legacy REP to it
@@ -244,12 +526,17 @@ class ContractsFixture:
         contract = self.upload(relativeFilePath, lookupKey, signatureKey, constructorArgs)
         if not contract: return None
         self.contracts['Controller'].registerContract(lookupKey.ljust(32, '\x00'), contract.address, garbageBytes20, garbageBytes32)
+        self.deployments[lookupKey] = dict(self.deployments[lookupKey], registered = True)
         return(contract)
 
-    def upload(self, relativeFilePath, lookupKey = None, signatureKey = None, constructorArgs=[]):
+    def resolveUploadPath(self, relativeFilePath):
         resolvedPath = resolveRelativePath(relativeFilePath)
         if self.coverageMode:
             resolvedPath = resolvedPath.replace("tests", "coverageEnv").replace("source/", "coverageEnv/")
+        return resolvedPath
+
+    def upload(self, relativeFilePath, lookupKey = None, signatureKey = None, constructorArgs=[]):
+        resolvedPath = self.resolveUploadPath(relativeFilePath)
         lookupKey = lookupKey if lookupKey else path.splitext(path.basename(resolvedPath))[0]
         signatureKey = signatureKey if signatureKey else lookupKey
         if lookupKey in self.contracts:
@@ -264,8 +551,9 @@ class ContractsFixture:
             return None
         if signatureKey not in ContractsFixture.signatures:
             ContractsFixture.signatures[signatureKey] = self.generateSignature(resolvedPath)
-        signature = ContractsFixture.signatures[signatureKey]
-        contractTranslator = ContractTranslator(signature)
+        contractTranslator = ContractsFixture.getTranslator(signatureKey)
+        # Remember how each contract was deployed so redeployChangedContracts can repeat it
+        self.deployments[lookupKey] = dict(path = relativeFilePath, signatureKey = signatureKey, interface = signatureKey, constructorArgs = constructorArgs, bytecodeHash = sha256(compiledCode).hexdigest(), registered = False)
         if len(constructorArgs) > 0:
             compiledCode += contractTranslator.encode_constructor_arguments(constructorArgs)
         contractAddress = bytesToHexString(self.chain.contract(compiledCode, language='evm'))
@@ -273,12 +561,23 @@ class ContractsFixture:
         self.contracts[lookupKey] = contract
         return(contract)
 
+    @staticmethod
+    def getTranslator(signatureName):
+        # Parsing an ABI and computing its selectors and event topics is expensive, so each signature gets one translator per process.  It is rebuilt if the signature has been replaced since.
+        signature = ContractsFixture.signatures[signatureName]
+        if signatureName in ContractsFixture.translators:
+            cachedSignature, translator = ContractsFixture.translators[signatureName]
+            if cachedSignature is signature:
+                return translator
+        translator = ContractTranslator(signature)
+        ContractsFixture.translators[signatureName] = (signature, translator)
+        return translator
+
     def applySignature(self, signatureName, address):
         assert address
         if type(address) is long:
             address = longToHexString(address)
-        translator = ContractTranslator(ContractsFixture.signatures[signatureName])
-        contract = ABIContract(self.chain, translator, address)
+        contract = ABIContract(self.chain, ContractsFixture.getTranslator(signatureName), address)
         return contract
 
     def createSnapshot(self):
@@ -287,19 +586,191 @@ class ContractsFixture:
         contractsCopy = {}
         for contractName in self.contracts:
             contractsCopy[contractName] = dict(translator = self.contracts[contractName].translator, address = self.contracts[contractName].address)
-        return  { 'state': self.chain.head_state.to_snapshot(), 'contracts': contractsCopy }
+        return  { 'state': self.chain.head_state.to_snapshot(), 'contracts': contractsCopy, 'deployments': dict(self.deployments) }
 
     def resetToSnapshot(self, snapshot):
         if not 'state' in snapshot: raise "snapshot is missing 'state'"
         if not 'contracts' in snapshot: raise "snapshot is missing 'contracts'"
-        self.chain = Chain(genesis=snapshot['state'], env=Env(config=config_metropolis))
+        if not 'copyOnWriteBase' in snapshot:
+            # Materialize the snapshot's state trie once.  Each reset layers a fresh overlay on top of it so the base is never written to and a reset only costs what the test goes on to touch.
+            baseState = State.from_snapshot(snapshot['state'], Env(EphemDB(), config=config_metropolis), executing_on_head=True)
+            snapshot['copyOnWriteBase'] = dict(db = baseState.db, rootSnapshot = baseState.to_snapshot(root_only=True))
+        base = snapshot['copyOnWriteBase']
+        self.chain = Chain(genesis=State.from_snapshot(base['rootSnapshot'], Env(OverlayDB(base['db']), config=config_metropolis), executing_on_head=True))
         if self.coverageMode:
             self.chain.head_state.log_listeners.append(self.writeLogToFile)
         self.contracts = {}
+        self.deployments = dict(snapshot.get('deployments', {}))
         for contractName in snapshot['contracts']:
             contract = snapshot['contracts'][contractName]
             self.contracts[contractName] = ABIContract(self.chain, contract['translator'], contract['address'])
 
+    def branchFromSnapshot(self, snapshot):
+        # Resets to the snapshot and returns the contracts stored in it, e.g. its universe and markets, bound to the new chain
+        self.resetToSnapshot(snapshot)
+        return dict((key, ABIContract(self.chain, value.translator, value.address)) for key, value in snapshot.items() if isinstance(value, ABIContract))
+
+    def getFixtureSourceHash(self):
+        # Identifies how the world is deployed, as opposed to what is deployed: the python code that drives the deployment, the options that change it and the set of contract files it walks
+        hasher = sha256()
+        hasher.update(json_dumps([self.coverageMode, self.subFork]))
+        hasher.update(json_dumps(sorted(path.relpath(contractPath, BASE_PATH) for contractPath in self.getBulkCompilationPaths())))
+        for fixtureSourcePath in ['conftest.py', 'utils.py', 'reporting_utils.py', 'dispute_planner.py', 'fork_scenarios.py']:
+            with io_open(resolveRelativePath(fixtureSourcePath), mode='rb') as file:
+                hasher.update(file.read())
+        return hasher.hexdigest()
+
+    def getDeployedWorldHash(self):
+        # Identifies everything a cached snapshot depends on: the fixture sources plus the bytecode and ABI of every contract the fixtures can deploy
+        if self.deployedWorldHash:
+            return self.deployedWorldHash
+        self.compileAllContracts()
+        hasher = sha256()
+        hasher.update(self.getFixtureSourceHash())
+        for contractPath in sorted(self.getBulkCompilationPaths()):
+            compiledContract = self.getCompiledContract(contractPath)
+            hasher.update(path.relpath(contractPath, BASE_PATH))
+            hasher.update(compiledContract['bytecode'])
+            hasher.update(json_dumps(compiledContract['abi'], sort_keys=True))
+        self.deployedWorldHash = hasher.hexdigest()
+        return self.deployedWorldHash
+
+    def getSnapshotCachePath(self, snapshotName, worldHash=None):
+        ContractsFixture.ensureCacheDirectoryExists()
+        return path.join(COMPILATION_CACHE, '%s-%s.snapshot' % (snapshotName, worldHash if worldHash else self.getDeployedWorldHash()))
+
+    def getLatestSnapshotPointerPath(self, snapshotName):
+        ContractsFixture.ensureCacheDirectoryExists()
+        return path.join(COMPILATION_CACHE, '%s-latest' % snapshotName)
+
+    def saveSnapshotToDisk(self, snapshotName, snapshot):
+        # ABIContracts hold a reference to the chain so only their translator and address are persisted
+        serializedSnapshot = { 'signatures': ContractsFixture.signatures, 'abiContracts': {}, 'fixtureSourceHash': self.getFixtureSourceHash() }
+        for key, value in snapshot.items():
+            if key == 'copyOnWriteBase':
+                continue
+            elif isinstance(value, ABIContract):
+                serializedSnapshot['abiContracts'][key] = dict(translator = value.translator, address = value.address)
+            else:
+                serializedSnapshot[key] = value
+        if self.coverageMode:
+            # A world restored from disk skips the transactions that deployed it, and with them the logs coverage is computed from, so coverage runs only reuse snapshots built earlier in the same session
+            self.sessionSnapshots[snapshotName] = serializedSnapshot
+            return snapshot
+        writeFileAtomically(self.getSnapshotCachePath(snapshotName), pickle_dumps(serializedSnapshot, HIGHEST_PROTOCOL))
+        writeFileAtomically(self.getLatestSnapshotPointerPath(snapshotName), self.getDeployedWorldHash())
+        return snapshot
+
+    def loadSnapshotFromDisk(self, snapshotName):
+        if self.coverageMode:
+            serializedSnapshot = self.sessionSnapshots.get(snapshotName)
+            return self.restoreSerializedSnapshot(dict(serializedSnapshot)) if serializedSnapshot else None
+        snapshotPath = self.getSnapshotCachePath(snapshotName)
+        if not path.isfile(snapshotPath):
+            return None
+        # When rebuilding, only accept snapshots published by another worker during this run
+        if self.rebuildSnapshots and path.getmtime(snapshotPath) < self.startTime:
+            return None
+        with io_open(snapshotPath, mode='rb') as file:
+            serializedSnapshot = pickle_load(file)
+        return self.restoreSerializedSnapshot(serializedSnapshot)
+
+    def loadLatestSnapshotFromDisk(self, snapshotName):
+        # Loads the most recently saved copy of a snapshot even if its contracts are out of date, as long as it was deployed by the same fixture code.  Used as the starting point for redeployChangedContracts.
+        if self.rebuildSnapshots or self.coverageMode:
+            return None
+        pointerPath = self.getLatestSnapshotPointerPath(snapshotName)
+        if not path.isfile(pointerPath):
+            return None
+        with open(pointerPath, 'r') as file:
+            snapshotPath = self.getSnapshotCachePath(snapshotName, file.read().strip())
+        if not path.isfile(snapshotPath):
+            return None
+        with io_open(snapshotPath, mode='rb') as file:
+            serializedSnapshot = pickle_load(file)
+        if serializedSnapshot.get('fixtureSourceHash') != self.getFixtureSourceHash():
+            return None
+        return self.restoreSerializedSnapshot(serializedSnapshot)
+
+    def restoreSerializedSnapshot(self, serializedSnapshot):
+        serializedSnapshot.pop('fixtureSourceHash', None)
+        ContractsFixture.signatures.update(serializedSnapshot.pop('signatures'))
+        abiContracts = serializedSnapshot.pop('abiContracts')
+        snapshot = serializedSnapshot
+        # Leave the fixture in the same state as if the snapshot had just been built
+        self.resetToSnapshot(snapshot)
+        for key, contract in abiContracts.items():
+            snapshot[key] = ABIContract(self.chain, contract['translator'], contract['address'])
+        return snapshot
+
+    def getScenarioSnapshots(self, baseSnapshot, scenarios):
+        # Each scenario is a function that takes the fixture and the base snapshot's contracts and plays out a world on top of them.  The resulting worlds are cached on disk under the scenario's name like the kitchen sink, and the ones missing from the cache are built side by side since they don't depend on each other.
+        with self.lockCache('scenarios'):
+            snapshots = dict((scenarioName, self.loadSnapshotFromDisk(scenarioName)) for scenarioName in scenarios)
+            missingScenarios = sorted(scenarioName for scenarioName, snapshot in snapshots.items() if snapshot is None)
+            if missingScenarios:
+                self.buildScenarioSnapshots(baseSnapshot, dict((scenarioName, scenarios[scenarioName]) for scenarioName in missingScenarios))
+                for scenarioName in missingScenarios:
+                    snapshots[scenarioName] = self.loadSnapshotFromDisk(scenarioName)
+        return snapshots
+
+    def buildScenarioSnapshots(self, baseSnapshot, scenarios):
+        global SCENARIO_BUILD
+        # Workers save under the deployed world hash, so compute it once here rather than in every worker
+        self.getDeployedWorldHash()
+        scenarioNames = sorted(scenarios)
+        print('building %i scenario snapshots...' % len(scenarioNames))
+        SCENARIO_BUILD = (self, baseSnapshot, scenarios)
+        try:
+            # Coverage logs are buffered in this process and would be lost in a worker, so coverage runs build the scenarios one after the other
+            if len(scenarioNames) == 1 or self.coverageMode:
+                for scenarioName in scenarioNames:
+                    buildScenarioSnapshot(scenarioName)
+            else:
+                pool = Pool(min(len(scenarioNames), cpu_count()))
+                try:
+                    pool.map(buildScenarioSnapshot, scenarioNames)
+                finally:
+                    pool.close()
+                    pool.join()
+        finally:
+            SCENARIO_BUILD = None
+
+    def redeployChangedContracts(self):
+        # Brings the currently loaded world up to date by uploading only the contracts whose bytecode changed and repeating just the setup steps that involve them.  Returns False if the changes can't be applied in place and the world has to be deployed from scratch.
+        changedContracts = []
+        for lookupKey, deployment in self.deployments.items():
+            resolvedPath = self.resolveUploadPath(deployment['path'])
+            ContractsFixture.signatures[deployment['signatureKey']] = self.generateSignature(resolvedPath)
+            if sha256(self.getCompiledCode(resolvedPath)).hexdigest() != deployment['bytecodeHash']:
+                changedContracts.append(lookupKey)
+        for lookupKey in changedContracts:
+            # Other contracts hold the addresses of these directly rather than looking them up in the Controller
+            if lookupKey == 'Controller' or self.deployments[lookupKey]['signatureKey'] == 'delegator':
+                return False
+            # Controller.registerContract refuses to replace a registered key, only TestController lets us point it at the new upload
+            if self.deployments[lookupKey]['registered'] and path.basename(self.deployments['Controller']['path']) != 'TestController.sol':
+                return False
+        if not changedContracts:
+            return True
+        print('redeploying %i changed contracts: %s' % (len(changedContracts), ', '.join(sorted(changedContracts))))
+        for lookupKey in changedContracts:
+            deployment = self.deployments[lookupKey]
+            del self.contracts[lookupKey]
+            self.upload(deployment['path'], lookupKey, deployment['signatureKey'], deployment['constructorArgs'])
+            if deployment['registered']:
+                self.contracts['Controller'].registerContract(lookupKey.ljust(32, '\x00'), self.contracts[lookupKey].address, garbageBytes20, garbageBytes32)
+            self.deployments[lookupKey] = dict(self.deployments[lookupKey], registered = deployment['registered'], interface = deployment['interface'])
+        # Pick up ABI changes for everything, including delegators whose targets were replaced
+        for lookupKey, deployment in self.deployments.items():
+            self.contracts[lookupKey] = self.applySignature(deployment['interface'], self.contracts[lookupKey].address)
+        if 'Augur' in changedContracts:
+            self.contracts['Augur'].setController(self.contracts['Controller'].address)
+            self.approveCentralAuthority()
+        self.initializeAllContracts(changedContracts)
+        self.whitelistTradingContracts(changedContracts)
+        return True
+
     ####
     #### Bulk Operations
     ####
@@ -322,6 +793,7 @@ class ContractsFixture:
                     self.uploadAndAddToController(path.join(directory, filename), delegationTargetName, name)
                     self.uploadAndAddToController("../source/contracts/libraries/Delegator.sol", name, "delegator", constructorArgs=[self.contracts['Controller'].address, delegationTargetName.ljust(32, '\x00')])
                     self.contracts[name] = self.applySignature(name, self.contracts[name].address)
+                    self.deployments[name] = dict(self.deployments[name], interface = name)
                 elif name == "TimeControlled":
                     self.uploadAndAddToController(path.join(directory, filename), lookupKey = "Time", signatureKey = "TimeControlled")
                 elif name == "Trade":
@@ -356,18 +828,20 @@ class ContractsFixture:
                 if name == "OrdersFinder": constructorArgs = [self.contracts["Orders"].address]
                 self.upload(path.join(directory, filename), constructorArgs=constructorArgs)
 
-    def whitelistTradingContracts(self):
+    def whitelistTradingContracts(self, contractNames=None):
         for filename in listdir(resolveRelativePath('../source/contracts/trading')):
             name = path.splitext(filename)[0]
             extension = path.splitext(filename)[1]
             if extension != '.sol': continue
             if name == "ShareToken": continue
             if not name in self.contracts: continue
+            if contractNames is not None and not name in contractNames: continue
             self.contracts['Controller'].addToWhitelist(self.contracts[name].address)
 
-    def initializeAllContracts(self):
+    def initializeAllContracts(self, contractNames=None):
         contractsToInitialize = ['CompleteSets','CreateOrder','FillOrder','CancelOrder','Trade','ClaimTradingProceeds','OrdersFetcher', 'Time']
         for contractName in contractsToInitialize:
+            if contractNames is not None and not contractName in contractNames: continue
             if getattr(self.contracts[contractName], "setController", None):
                 self.contracts[contractName].setController(self.contracts['Controller'].address)
             elif getattr(self.contracts[contractName], "initialize", None):
@@ -379,6 +853,31 @@ class ContractsFixture:
     #### Helpers
     ####
 
+    def batchRead(self, calls, sender=tester.a0, state=None):
+        # Runs each (contract, methodName, args) against the current head state, or the given one, and rolls it back before the next one.  Unlike an ABIContract call this skips signing a transaction and taking a chain snapshot for every read.
+        state = state or self.chain.head_state
+        snapshot = state.snapshot()
+        results = []
+        try:
+            for contract, methodName, args in calls:
+                evmData = contract.translator.encode(methodName, args)
+                message = vm.Message(sender, utils.normalize_address(contract.address), 0, tester.STARTGAS, vm.CallData([utils.safe_ord(byte) for byte in evmData]))
+                output = apply_message(state, message)
+                state.revert(snapshot)
+                if output is None:
+                    raise TransactionFailed("Batched read of %s failed" % methodName)
+                results.append(self.decodeOutput(contract, methodName, output))
+        finally:
+            state.revert(snapshot)
+        return results
+
+    def decodeOutput(self, contract, methodName, output):
+        # Mirrors how ABIContract unwraps return values
+        if output == b'':
+            return None
+        decoded = contract.translator.decode(methodName, output)
+        return decoded[0] if len(decoded) == 1 else decoded
+
     def getSeededCash(self):
         cash = self.contracts['Cash']
         cash.depositEther(value = 1, sender = tester.k9)
@@ -397,6 +896,7 @@ class ContractsFixture:
         augur = self.upload("../source/contracts/Augur.sol")
         self.contracts["Augur"].setController(self.contracts['Controller'].address)
         self.contracts['Controller'].registerContract("Augur".ljust(32, '\x00'), augur.address, garbageBytes20, garbageBytes32)
+        self.deployments['Augur'] = dict(self.deployments['Augur'], registered = True)
         return augur
 
     def uploadShareToken(self, controllerAddress = None):
@@ -415,21 +915,21 @@ class ContractsFixture:
     def getShareToken(self, market, outcome):
         shareTokenAddress = market.getShareToken(outcome)
         assert shareTokenAddress
-        shareToken = ABIContract(self.chain, ContractTranslator(ContractsFixture.signatures['ShareToken']), shareTokenAddress)
+        shareToken = self.applySignature('ShareToken', shareTokenAddress)
         return shareToken
 
     def getOrCreateChildUniverse(self, parentUniverse, market, payoutDistribution):
         assert payoutDistributionHash
         childUniverseAddress = parentUniverse.getOrCreateChildUniverse(payoutDistribution, False)
         assert childUniverseAddress
-        childUniverse = ABIContract(self.chain, ContractTranslator(ContractsFixture.signatures['Universe']), childUniverseAddress)
+        childUniverse = self.applySignature('Universe', childUniverseAddress)
         return childUniverse
 
     def createYesNoMarket(self, universe, endTime, feePerEthInWei, denominationToken, designatedReporterAddress, sender=tester.k0, topic="", description="description", extraInfo=""):
         marketCreationFee = universe.getOrCacheMarketCreationCost()
         marketAddress = universe.createYesNoMarket(endTime, feePerEthInWei, denominationToken.address, designatedReporterAddress, topic, description, extraInfo, value = marketCreationFee, sender=sender)
         assert marketAddress
-        market = ABIContract(self.chain, ContractTranslator(ContractsFixture.signatures['Market']), marketAddress)
+        market = self.applySignature('Market', marketAddress)
         return market
 
     def createCategoricalMarket(self, universe, numOutcomes, endTime, feePerEthInWei, denominationToken, designatedReporterAddress, sender=tester.k0, topic="", description="description", extraInfo=""):
@@ -437,14 +937,14 @@ class ContractsFixture:
         outcomes = [" "] * numOutcomes
         marketAddress = universe.createCategoricalMarket(endTime, feePerEthInWei, denominationToken.address, designatedReporterAddress, outcomes, topic, description, extraInfo, value = marketCreationFee, sender=sender)
         assert marketAddress
-        market = ABIContract(self.chain, ContractTranslator(ContractsFixture.signatures['Market']), marketAddress)
+        market = self.applySignature('Market', marketAddress)
         return market
 
     def createScalarMarket(self, universe, endTime, feePerEthInWei, denominationToken, maxPrice, minPrice, numTicks, designatedReporterAddress, sender=tester.k0, description="description", extraInfo=""):
         marketCreationFee = universe.getOrCacheMarketCreationCost()
         marketAddress = universe.createScalarMarket(endTime, feePerEthInWei, denominationToken.address, designatedReporterAddress, minPrice, maxPrice, numTicks, "", description, extraInfo, value = marketCreationFee, sender=sender)
         assert marketAddress
-        market = ABIContract(self.chain, ContractTranslator(ContractsFixture.signatures['Market']), marketAddress)
+        market = self.applySignature('Market', marketAddress)
         return market
 
     def createReasonableYesNoMarket(self, universe, denominationToken, sender=tester.k0, topic="", description="description", extraInfo=""):
@@ -482,8 +982,10 @@ class ContractsFixture:
             sender = sender)
 
 @pytest.fixture(scope="session")
-def fixture():
-    return ContractsFixture()
+def fixture(request):
+    fixture = ContractsFixture()
+    request.addfinalizer(fixture.flushLogs)
+    return fixture
 
 @pytest.fixture(scope="session")
 def baseSnapshot(fixture):
@@ -491,21 +993,30 @@ def baseSnapshot(fixture):
 
 @pytest.fixture(scope="session")
 def controllerSnapshot(fixture, baseSnapshot):
-    fixture.resetToSnapshot(baseSnapshot)
-    controller = fixture.upload('solidity_test_helpers/TestController.sol', lookupKey="Controller")
-    assert fixture.contracts['Controller'].owner() == bytesToHexString(tester.a0)
-    return fixture.createSnapshot()
+    with fixture.lockCache('controller'):
+        snapshot = fixture.loadSnapshotFromDisk('controller')
+        if snapshot: return snapshot
+        fixture.resetToSnapshot(baseSnapshot)
+        controller = fixture.upload('solidity_test_helpers/TestController.sol', lookupKey="Controller")
+        assert fixture.contracts['Controller'].owner() == bytesToHexString(tester.a0)
+        return fixture.saveSnapshotToDisk('controller', fixture.createSnapshot())
 
 @pytest.fixture(scope="session")
 def augurInitializedSnapshot(fixture, controllerSnapshot):
-    fixture.resetToSnapshot(controllerSnapshot)
-    fixture.uploadAugur()
-    fixture.uploadAllContracts()
-    fixture.initializeAllContracts()
-    fixture.whitelistTradingContracts()
-    fixture.approveCentralAuthority()
-    fixture.uploadExternalContracts()
-    return fixture.createSnapshot()
+    with fixture.lockCache('augurInitialized'):
+        snapshot = fixture.loadSnapshotFromDisk('augurInitialized')
+        if snapshot: return snapshot
+        if fixture.loadLatestSnapshotFromDisk('augurInitialized') and fixture.redeployChangedContracts():
+            return fixture.saveSnapshotToDisk('augurInitialized', fixture.createSnapshot())
+        fixture.resetToSnapshot(controllerSnapshot)
+        fixture.compileAllContracts()
+        fixture.uploadAugur()
+        fixture.uploadAllContracts()
+        fixture.initializeAllContracts()
+        fixture.whitelistTradingContracts()
+        fixture.approveCentralAuthority()
+        fixture.uploadExternalContracts()
+        return fixture.saveSnapshotToDisk('augurInitialized', fixture.createSnapshot())
 
 @pytest.fixture(scope="session")
 def augurInitializedWithMocksSnapshot(fixture, augurInitializedSnapshot):
@@ -518,38 +1029,45 @@ def augurInitializedWithMocksSnapshot(fixture, augurInitializedSnapshot):
 
 @pytest.fixture(scope="session")
 def kitchenSinkSnapshot(fixture, augurInitializedSnapshot):
-    fixture.resetToSnapshot(augurInitializedSnapshot)
-    # TODO: remove assignments to the fixture as they don't get rolled back, so can bleed across tests.  We should be accessing things via `fixture.contracts[...]`
-    legacyReputationToken = fixture.contracts['LegacyReputationToken']
-    legacyReputationToken.faucet(11 * 10**6 * 10**18)
-    universe = fixture.createUniverse()
-    cash = fixture.getSeededCash()
-    augur = fixture.contracts['Augur']
-    fixture.distributeRep(universe)
-
-    if fixture.subFork:
-        forkingMarket = fixture.createReasonableYesNoMarket(universe, cash)
-        proceedToFork(fixture, forkingMarket, universe)
-        fixture.contracts["Time"].setTimestamp(universe.getForkEndTime() + 1)
-        reputationToken = fixture.applySignature('ReputationToken', universe.getReputationToken())
-        yesPayoutNumerators = [0, forkingMarket.getNumTicks()]
-        reputationToken.migrateOutByPayout(yesPayoutNumerators, False, reputationToken.balanceOf(tester.a0))
-        universe = fixture.applySignature('Universe', universe.createChildUniverse(yesPayoutNumerators, False))
-
-    yesNoMarket = fixture.createReasonableYesNoMarket(universe, cash)
-    startingGas = fixture.chain.head_state.gas_used
-    categoricalMarket = fixture.createReasonableCategoricalMarket(universe, 3, cash)
-    print 'Gas Used: %s' % (fixture.chain.head_state.gas_used - startingGas)
-    scalarMarket = fixture.createReasonableScalarMarket(universe, 30, -10, 400000, cash)
-    fixture.uploadAndAddToController("solidity_test_helpers/Constants.sol")
-    snapshot = fixture.createSnapshot()
-    snapshot['universe'] = universe
-    snapshot['cash'] = cash
-    snapshot['augur'] = augur
-    snapshot['yesNoMarket'] = yesNoMarket
-    snapshot['categoricalMarket'] = categoricalMarket
-    snapshot['scalarMarket'] = scalarMarket
-    return snapshot
+    with fixture.lockCache('kitchenSink'):
+        snapshot = fixture.loadSnapshotFromDisk('kitchenSink')
+        if snapshot: return snapshot
+        fixture.resetToSnapshot(augurInitializedSnapshot)
+        # TODO: remove assignments to the fixture as they don't get rolled back, so can bleed across tests.  We should be accessing things via `fixture.contracts[...]`
+        legacyReputationToken = fixture.contracts['LegacyReputationToken']
+        legacyReputationToken.faucet(11 * 10**6 * 10**18)
+        universe = fixture.createUniverse()
+        cash = fixture.getSeededCash()
+        augur = fixture.contracts['Augur']
+        fixture.distributeRep(universe)
+
+        if fixture.subFork:
+            forkingMarket = fixture.createReasonableYesNoMarket(universe, cash)
+            proceedToFork(fixture, forkingMarket, universe)
+            fixture.contracts["Time"].setTimestamp(universe.getForkEndTime() + 1)
+            reputationToken = fixture.applySignature('ReputationToken', universe.getReputationToken())
+            yesPayoutNumerators = [0, forkingMarket.getNumTicks()]
+            reputationToken.migrateOutByPayout(yesPayoutNumerators, False, reputationToken.balanceOf(tester.a0))
+            universe = fixture.applySignature('Universe', universe.createChildUniverse(yesPayoutNumerators, False))
+
+        yesNoMarket = fixture.createReasonableYesNoMarket(universe, cash)
+        startingGas = fixture.chain.head_state.gas_used
+        categoricalMarket = fixture.createReasonableCategoricalMarket(universe, 3, cash)
+        print 'Gas Used: %s' % (fixture.chain.head_state.gas_used - startingGas)
+        scalarMarket = fixture.createReasonableScalarMarket(universe, 30, -10, 400000, cash)
+        fixture.uploadAndAddToController("solidity_test_helpers/Constants.sol")
+        snapshot = fixture.createSnapshot()
+        snapshot['universe'] = universe
+        snapshot['cash'] = cash
+        snapshot['augur'] = augur
+        snapshot['yesNoMarket'] = yesNoMarket
+        snapshot['categoricalMarket'] = categoricalMarket
+        snapshot['scalarMarket'] = scalarMarket
+        return fixture.saveSnapshotToDisk('kitchenSink', snapshot)
+
+@pytest.fixture(scope="session")
+def forkScenarioSnapshots(fixture, kitchenSinkSnapshot):
+    return fixture.getScenarioSnapshots(kitchenSinkSnapshot, FORK_SCENARIOS)
 
 @pytest.fixture
 def kitchenSinkFixture(fixture, kitchenSinkSnapshot):
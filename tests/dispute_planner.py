@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+from collections import namedtuple
+from ethereum.tools import tester
+
+# Plans a market's remaining dispute rounds off chain.  Market.contribute sizes each new DisputeCrowdsourcer at 2 * getParticipantStake() - 3 * getStakeInOutcome(payout), a filled crowdsourcer becomes the winning participant, and the market forks once a filled crowdsourcer is at least Universe.getDisputeThresholdForFork().  Otherwise the market moves to the fee window after the one the round completed in, and Universe fee windows start on multiples of the dispute round duration, so every round lands one duration after the previous one.  Given the participants so far the whole schedule follows without reading anything back from the chain between rounds.
+
+DisputeRound = namedtuple('DisputeRound', ['timestamp', 'payoutNumerators', 'invalid', 'amount', 'forks'])
+
+def getNextFeeWindowStartTime(timestamp, disputeRoundDuration):
+    # Universe.getOrCreateNextFeeWindow
+    return (timestamp + disputeRoundDuration) / disputeRoundDuration * disputeRoundDuration
+
+def planDisputeRounds(participants, payouts, feeWindowStartTime, disputeRoundDuration, disputeThresholdForFork, maxRounds=None):
+    """
+    Returns the DisputeRounds that take a market from its current participants to a fork, or through maxRounds rounds if that comes first.
+
+    participants are (payoutDistributionHash, stake) pairs in the order the market holds them, so the last one is winning.  payouts are the (payoutDistributionHash, payoutNumerators, invalid) candidates disputed in turn; each round disputes in favour of the first one that is not currently winning, like proceedToNextRound.  feeWindowStartTime is the start of the market's current fee window.  Each round's timestamp is one second into its fee window, the earliest time it can be contributed.
+
+    The plan assumes each round's crowdsourcer is filled by its own contribution, i.e. no other crowdsourcer for the payout is partially filled.
+    """
+    totalStake = sum(stake for _, stake in participants)
+    stakeInOutcome = {}
+    for payoutDistributionHash, stake in participants:
+        stakeInOutcome[payoutDistributionHash] = stakeInOutcome.get(payoutDistributionHash, 0) + stake
+    winningPayoutDistributionHash = participants[-1][0]
+    timestamp = feeWindowStartTime + 1
+    rounds = []
+    while maxRounds is None or len(rounds) < maxRounds:
+        payoutDistributionHash, payoutNumerators, invalid = next(payout for payout in payouts if payout[0] != winningPayoutDistributionHash)
+        amount = 2 * totalStake - 3 * stakeInOutcome.get(payoutDistributionHash, 0)
+        forks = amount >= disputeThresholdForFork
+        rounds.append(DisputeRound(timestamp, payoutNumerators, invalid, amount, forks))
+        if forks:
+            break
+        totalStake += amount
+        stakeInOutcome[payoutDistributionHash] = stakeInOutcome.get(payoutDistributionHash, 0) + amount
+        winningPayoutDistributionHash = payoutDistributionHash
+        timestamp = getNextFeeWindowStartTime(timestamp, disputeRoundDuration) + 1
+    return rounds
+
+def planDisputeRoundsForMarket(fixture, market, payouts=None, maxRounds=None):
+    # Reads everything the plan depends on in three batches, however many rounds the market has been through.  By default the market is disputed back and forth between its first and last outcome winning outright, as proceedToNextRound does.
+    if payouts is None:
+        payoutNumerators = [0] * market.getNumberOfOutcomes()
+        payoutNumerators[0] = market.getNumTicks()
+        payouts = [(payoutNumerators, False), (payoutNumerators[::-1], False)]
+    universe = fixture.applySignature('Universe', market.getUniverse())
+    numParticipants, feeWindowAddress = fixture.batchRead([(market, 'getNumParticipants', []), (market, 'getFeeWindow', [])])
+    feeWindow = fixture.applySignature('FeeWindow', feeWindowAddress)
+    participantAddresses = fixture.batchRead([(market, 'getReportingParticipant', [i]) for i in range(numParticipants)])
+    # InitialReporter has the same getters as DisputeCrowdsourcer through BaseReportingParticipant
+    participantContracts = [fixture.applySignature('DisputeCrowdsourcer', participantAddress) for participantAddress in participantAddresses]
+    reads = [(universe, 'getDisputeThresholdForFork', []), (universe, 'getDisputeRoundDurationInSeconds', []), (feeWindow, 'getStartTime', [])]
+    reads += [(market, 'derivePayoutDistributionHash', [payoutNumerators, invalid]) for payoutNumerators, invalid in payouts]
+    for participant in participantContracts:
+        reads += [(participant, 'getPayoutDistributionHash', []), (participant, 'getStake', [])]
+    results = fixture.batchRead(reads)
+    disputeThresholdForFork, disputeRoundDuration, feeWindowStartTime = results[:3]
+    payoutDistributionHashes = results[3:3 + len(payouts)]
+    participantResults = results[3 + len(payouts):]
+    participants = zip(participantResults[0::2], participantResults[1::2])
+    candidates = [(payoutDistributionHash, payoutNumerators, invalid) for payoutDistributionHash, (payoutNumerators, invalid) in zip(payoutDistributionHashes, payouts)]
+    return planDisputeRounds(participants, candidates, feeWindowStartTime, disputeRoundDuration, disputeThresholdForFork, maxRounds)
+
+def submitDisputeRounds(fixture, market, rounds, contributor=tester.k0):
+    for disputeRound in rounds:
+        fixture.contracts["Time"].setTimestamp(disputeRound.timestamp)
+        assert market.contribute(disputeRound.payoutNumerators, disputeRound.invalid, disputeRound.amount, sender=contributor)
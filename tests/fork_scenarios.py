@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+from reporting_utils import proceedToNextRound, proceedToFork
+
+# Worlds that several tests start from once the kitchen sink's yes/no market has disputed its way into a fork.  Reaching a fork takes every dispute round up to the fork threshold, so each scenario is run once, cached on disk as a named snapshot and branched from by the tests.  Each scenario gets the fixture and the kitchen sink's contracts, keyed as they are in its snapshot, bound to the chain being built.
+
+def forkYesNoMarket(fixture, contracts):
+    proceedToFork(fixture, contracts['yesNoMarket'], contracts['universe'])
+
+def disputeCategoricalMarketThenFork(fixture, contracts):
+    # The categorical market is left with an open dispute round when the fork begins
+    proceedToNextRound(fixture, contracts['categoricalMarket'])
+    proceedToNextRound(fixture, contracts['categoricalMarket'])
+    forkYesNoMarket(fixture, contracts)
+
+def finalizeCategoricalMarketThenFork(fixture, contracts):
+    categoricalMarket = contracts['categoricalMarket']
+    proceedToNextRound(fixture, categoricalMarket)
+    feeWindow = fixture.applySignature('FeeWindow', categoricalMarket.getFeeWindow())
+    fixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
+    assert categoricalMarket.finalize()
+    forkYesNoMarket(fixture, contracts)
+
+FORK_SCENARIOS = {
+    'forked': forkYesNoMarket,
+    'disputedCategoricalForked': disputeCategoricalMarketThenFork,
+    'finalizedCategoricalForked': finalizeCategoricalMarketThenFork,
+}
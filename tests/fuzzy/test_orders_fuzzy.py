@@ -1,9 +1,11 @@
 from ethereum.tools import tester
+from ethereum.tools.tester import TransactionFailed
 import numpy as np
 from os import getenv
-from pytest import fixture, mark
+from pytest import fixture, mark, raises
 from utils import fix, longTo32Bytes
 from constants import BID, ASK
+from orders_model import OrderBookModel, OrderBookModelRevert, NULL_ORDER_ID
 
 ATTOSHARES = 0
 DISPLAY_PRICE = 1
@@ -134,3 +136,77 @@ def test_randomSorting(market, orderType, numOrders, withBoundingOrders, deadOrd
             assert(orderId == worstOrderId), "Should be the worst order Id"
     for orderId in orderIds:
         assert(orders.removeOrder(orderIdsToBytesMapping[orderId]) == 1), "Remove order from list"
+
+# Each sequence costs one transaction per operation, `npm run test:fuzz:orders` sets ORDERS_FUZZ_SEQUENCES to run a thousand of them
+@mark.parametrize('seed', range(int(getenv('ORDERS_FUZZ_SEQUENCES', 50))))
+def test_differentialOrderBook(seed, fixture, kitchenSinkSnapshot):
+    market = fixture.branchFromSnapshot(kitchenSinkSnapshot)['yesNoMarket']
+    orders = fixture.contracts['Orders']
+    outcome = 1
+    numTicks = market.getNumTicks()
+    model = OrderBookModel(numTicks)
+    random = np.random.RandomState(seed)
+    # Few distinct prices so that equal priced orders and their placement are exercised constantly
+    priceLevels = np.linspace(1, numTicks - 1, random.randint(3, 12)).astype(int)
+    createdOrderIds = { BID: [], ASK: [] }
+    nextAmount = 1
+
+    def expectSameOutcome(modelOperation, contractOperation):
+        try:
+            expected = modelOperation()
+        except OrderBookModelRevert:
+            with raises(TransactionFailed):
+                contractOperation()
+            return
+        assert contractOperation() == expected
+
+    def pickHint(orderType, price):
+        liveOrderIds = sorted(model.getLiveOrderIds(orderType, market.address, outcome))
+        choice = random.randint(4)
+        if choice == 0 or not liveOrderIds:
+            return NULL_ORDER_ID
+        if choice == 1:
+            # Possibly removed or filled, which the contracts treat as no hint
+            return createdOrderIds[orderType][random.randint(len(createdOrderIds[orderType]))]
+        return liveOrderIds[random.randint(len(liveOrderIds))]
+
+    for step in range(int(getenv('ORDERS_FUZZ_STEPS', 100))):
+        orderType = int(random.choice([BID, ASK]))
+        liveOrderIds = sorted(model.getLiveOrderIds(orderType, market.address, outcome))
+        operation = random.choice(['save', 'save', 'remove', 'fill']) if liveOrderIds else 'save'
+        if operation == 'save':
+            price = int(random.choice(priceLevels))
+            amount = nextAmount
+            nextAmount += 1
+            betterOrderId = pickHint(orderType, price)
+            worseOrderId = pickHint(orderType, price)
+            orderId = fixture.batchRead([(orders, 'getOrderId', [orderType, market.address, amount, price, tester.a1, fixture.chain.head_state.block_number, outcome, 0, amount])])[0]
+            expectSameOutcome(
+                lambda: model.saveOrder(orderId, orderType, market.address, amount, price, tester.a1, outcome, 0, amount, betterOrderId, worseOrderId),
+                lambda: orders.saveOrder(orderType, market.address, amount, price, tester.a1, outcome, 0, amount, betterOrderId, worseOrderId, "0"))
+            if orderId in model.orders:
+                createdOrderIds[orderType].append(orderId)
+        elif operation == 'remove':
+            orderId = liveOrderIds[random.randint(len(liveOrderIds))]
+            expectSameOutcome(lambda: model.removeOrder(orderId), lambda: orders.removeOrder(orderId))
+        else:
+            orderId = liveOrderIds[random.randint(len(liveOrderIds))]
+            sharesFilled = int(random.randint(1, model.getOrder(orderId)['amount'] + 1))
+            expectSameOutcome(lambda: model.recordFillOrder(orderId, sharesFilled, 0), lambda: orders.recordFillOrder(orderId, sharesFilled, 0))
+        model.assertInvariants(BID, market.address, outcome)
+        model.assertInvariants(ASK, market.address, outcome)
+        if step % 25 == 24:
+            assertContractMatchesModel(fixture, orders, model, market, outcome, createdOrderIds[BID] + createdOrderIds[ASK])
+    assertContractMatchesModel(fixture, orders, model, market, outcome, createdOrderIds[BID] + createdOrderIds[ASK])
+
+def assertContractMatchesModel(fixture, orders, model, market, outcome, orderIds):
+    reads = []
+    expected = []
+    for orderType in [BID, ASK]:
+        reads += [(orders, 'getBestOrderId', [orderType, market.address, outcome]), (orders, 'getWorstOrderId', [orderType, market.address, outcome])]
+        expected += [model.getBestOrderId(orderType, market.address, outcome), model.getWorstOrderId(orderType, market.address, outcome)]
+    for orderId in orderIds:
+        order = model.getOrder(orderId)
+        reads += [(orders, method, [orderId]) for method in ['getBetterOrderId', 'getWorseOrderId', 'getPrice', 'getAmount', 'getOrderSharesEscrowed']]
+        expected += [order['betterOrderId'], order['worseOrderId'], order['price'], order['amount'], order['sharesEscrowed']]
+    assert fixture.batchRead(reads) == expected
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+from ethereum.tools import tester
+from ethereum.tools.tester import ABIContract, TransactionFailed
+from hypothesis import settings, note, HealthCheck
+from hypothesis.stateful import RuleBasedStateMachine, Bundle, rule, precondition, run_state_machine_as_test
+from hypothesis.strategies import integers, sampled_from
+from os import getenv
+from utils import fix, longTo32Bytes, bytesToHexString
+from constants import BID, ASK, LONG, SHORT
+from trading.test_claimTradingProceeds import finalizeMarket
+
+TRADERS = [(tester.a1, tester.k1), (tester.a2, tester.k2), (tester.a3, tester.k3)]
+TRADE_GROUP_ID = "42"
+
+traders = sampled_from(range(len(TRADERS)))
+amounts = integers(min_value=1, max_value=10).map(lambda amount: fix(amount) / 100)
+# Percentages of the market's numTicks
+prices = integers(min_value=1, max_value=99)
+
+# Every example resets to the kitchen sink snapshot, which only layers a fresh overlay over the snapshot's state, so examples are cheap and the snapshot is built once per run.  TRADING_FUZZ_EXAMPLES and TRADING_FUZZ_STEPS scale the run.
+def test_tradingLifecycle(fixture, kitchenSinkSnapshot):
+    class TradingLifecycle(RuleBasedStateMachine):
+        orderIds = Bundle('orderIds')
+
+        def __init__(self):
+            super(TradingLifecycle, self).__init__()
+            fixture.resetToSnapshot(kitchenSinkSnapshot)
+            self.cash = ABIContract(fixture.chain, kitchenSinkSnapshot['cash'].translator, kitchenSinkSnapshot['cash'].address)
+            self.market = ABIContract(fixture.chain, kitchenSinkSnapshot['categoricalMarket'].translator, kitchenSinkSnapshot['categoricalMarket'].address)
+            self.numTicks = self.market.getNumTicks()
+            self.numOutcomes = self.market.getNumberOfOutcomes()
+            self.shareTokens = [fixture.getShareToken(self.market, outcome) for outcome in range(self.numOutcomes)]
+            self.finalized = False
+            self.payoutNumerators = None
+            self.createdOrderIds = []
+            self.etherHolders = [address for address, _ in TRADERS] + [self.cash.address]
+            self.totalEther = self.getTotalEther()
+
+        def getTotalEther(self):
+            return sum(fixture.chain.head_state.get_balance(address) for address in self.etherHolders)
+
+        def transact(self, description, method, *args, **kwargs):
+            # Actions are drawn without modelling every precondition of the contracts, so a rejected transaction is a valid step.  It must not have changed anything, which the invariants check.
+            note(description)
+            try:
+                result = method(*args, **kwargs)
+            except TransactionFailed:
+                note("    reverted")
+                result = None
+            self.assertInvariants()
+            return result
+
+        @precondition(lambda self: not self.finalized)
+        @rule(trader=traders, amount=amounts)
+        def buyCompleteSets(self, trader, amount):
+            address, key = TRADERS[trader]
+            self.transact("buy %i complete sets as trader %i" % (amount, trader), fixture.contracts['CompleteSets'].publicBuyCompleteSets, self.market.address, amount, sender=key, value=amount * self.numTicks)
+
+        @precondition(lambda self: not self.finalized)
+        @rule(trader=traders, amount=amounts)
+        def sellCompleteSets(self, trader, amount):
+            address, key = TRADERS[trader]
+            amount = min([amount] + [shareToken.balanceOf(address) for shareToken in self.shareTokens])
+            if amount == 0:
+                return
+            self.transact("sell %i complete sets as trader %i" % (amount, trader), fixture.contracts['CompleteSets'].publicSellCompleteSets, self.market.address, amount, sender=key)
+
+        @precondition(lambda self: not self.finalized)
+        @rule(target=orderIds, trader=traders, orderType=sampled_from([BID, ASK]), outcome=integers(min_value=0, max_value=2), amount=amounts, price=prices)
+        def createOrder(self, trader, orderType, outcome, amount, price):
+            address, key = TRADERS[trader]
+            price = price * self.numTicks / 100
+            orderId = self.transact("trader %i creates %s of %i at %i on outcome %i" % (trader, 'bid' if orderType == BID else 'ask', amount, price, outcome), fixture.contracts['CreateOrder'].publicCreateOrder, orderType, amount, price, self.market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), TRADE_GROUP_ID, sender=key, value=amount * self.numTicks)
+            if orderId:
+                self.createdOrderIds.append(orderId)
+            return orderId or longTo32Bytes(0)
+
+        @precondition(lambda self: not self.finalized)
+        @rule(orderId=orderIds, trader=traders, amount=amounts)
+        def fillOrder(self, orderId, trader, amount):
+            address, key = TRADERS[trader]
+            self.transact("trader %i fills %i of order %s" % (trader, amount, orderId.encode('hex')), fixture.contracts['FillOrder'].publicFillOrder, orderId, amount, TRADE_GROUP_ID, sender=key, value=amount * self.numTicks)
+
+        @rule(orderId=orderIds)
+        def cancelOrder(self, orderId):
+            creator = fixture.contracts['Orders'].getOrderCreator(orderId)
+            keys = [key for address, key in TRADERS if bytesToHexString(address) == creator]
+            if not keys:
+                return
+            self.transact("cancel order %s" % orderId.encode('hex'), fixture.contracts['CancelOrder'].cancelOrder, orderId, sender=keys[0])
+
+        @precondition(lambda self: not self.finalized)
+        @rule(trader=traders, direction=sampled_from([LONG, SHORT]), outcome=integers(min_value=0, max_value=2), amount=amounts, price=prices)
+        def trade(self, trader, direction, outcome, amount, price):
+            address, key = TRADERS[trader]
+            price = price * self.numTicks / 100
+            self.transact("trader %i trades %s %i at %i on outcome %i" % (trader, 'long' if direction == LONG else 'short', amount, price, outcome), fixture.contracts['Trade'].publicTrade, direction, self.market.address, outcome, amount, price, longTo32Bytes(0), longTo32Bytes(0), TRADE_GROUP_ID, sender=key, value=amount * self.numTicks)
+
+        @precondition(lambda self: not self.finalized)
+        @rule(winningOutcome=integers(min_value=0, max_value=2))
+        def finalize(self, winningOutcome):
+            note("finalize with outcome %i winning" % winningOutcome)
+            self.payoutNumerators = [self.numTicks if outcome == winningOutcome else 0 for outcome in range(self.numOutcomes)]
+            finalizeMarket(fixture, self.market, self.payoutNumerators)
+            self.finalized = True
+            self.assertInvariants()
+
+        @precondition(lambda self: self.finalized)
+        @rule(trader=traders)
+        def claimTradingProceeds(self, trader):
+            address, key = TRADERS[trader]
+            self.transact("trader %i claims proceeds" % trader, fixture.contracts['ClaimTradingProceeds'].claimTradingProceeds, self.market.address, address, sender=key)
+
+        def assertInvariants(self):
+            orders = fixture.contracts['Orders']
+            holders = [address for address, _ in TRADERS] + [self.market.address]
+            reads = [(self.cash, 'totalSupply', []), (self.cash, 'balanceOf', [self.market.address]), (orders, 'getTotalEscrowed', [self.market.address])]
+            reads += [(orders, 'getOrderMoneyEscrowed', [orderId]) for orderId in self.createdOrderIds]
+            for shareToken in self.shareTokens:
+                reads += [(shareToken, 'totalSupply', [])] + [(shareToken, 'balanceOf', [holder]) for holder in holders]
+            results = fixture.batchRead(reads)
+            cashSupply, marketCash, totalEscrowed = results[:3]
+            moneyEscrowed = results[3:3 + len(self.createdOrderIds)]
+            shareBalances = results[3 + len(self.createdOrderIds):]
+
+            # Ether only moves between the traders and the ether backing Cash, gas is free in these tests
+            assert self.getTotalEther() == self.totalEther, "Ether was created or destroyed"
+            assert fixture.chain.head_state.get_balance(self.cash.address) == cashSupply, "Cash is fully backed by ether"
+            assert sum(moneyEscrowed) == totalEscrowed, "Orders.getTotalEscrowed matches the money escrowed in the market's open orders"
+
+            shareSupplies = []
+            for outcome in range(self.numOutcomes):
+                supply = shareBalances[outcome * (len(holders) + 1)]
+                balances = shareBalances[outcome * (len(holders) + 1) + 1:(outcome + 1) * (len(holders) + 1)]
+                assert sum(balances) == supply, "Every share of outcome %i is held by a trader or escrowed by the market" % outcome
+                shareSupplies.append(supply)
+            if self.finalized:
+                assert marketCash >= totalEscrowed + sum(supply * payout for supply, payout in zip(shareSupplies, self.payoutNumerators)), "The market can pay out every remaining share and order"
+            else:
+                assert len(set(shareSupplies)) == 1, "Shares are only created and destroyed as complete sets"
+                assert marketCash >= totalEscrowed + shareSupplies[0] * self.numTicks, "The market can pay out every complete set and order"
+
+    run_state_machine_as_test(TradingLifecycle, settings=settings(
+        max_examples=int(getenv('TRADING_FUZZ_EXAMPLES', 10)),
+        stateful_step_count=int(getenv('TRADING_FUZZ_STEPS', 30)),
+        deadline=None,
+        suppress_health_check=[HealthCheck.too_slow, HealthCheck.filter_too_much]))
@@ -91,11 +91,12 @@ def execute(fixture, snapshot, universe, market, orderType, orderSize, orderPric
     fillerBalance = fixture.chain.head_state.get_balance(fillerAddress)
 
     # Validate order
-    assert orders.getAmount(orderId) == orderSize
-    assert orders.getPrice(orderId) == orderPrice
-    assert orders.getOrderCreator(orderId) == bytesToHexString(creatorAddress)
-    assert orders.getOrderMoneyEscrowed(orderId) == creatorTokens
-    assert orders.getOrderSharesEscrowed(orderId) == creatorLongShares or creatorShortShares
+    amount, price, creator, moneyEscrowed, sharesEscrowed = fixture.batchRead([(orders, method, [orderId]) for method in ['getAmount', 'getPrice', 'getOrderCreator', 'getOrderMoneyEscrowed', 'getOrderSharesEscrowed']])
+    assert amount == orderSize
+    assert price == orderPrice
+    assert creator == bytesToHexString(creatorAddress)
+    assert moneyEscrowed == creatorTokens
+    assert sharesEscrowed == creatorLongShares or creatorShortShares
 
     # Acquire shares for filler
     fillerEthRequiredLong = 0 if fillerLongShares == 0 else fillerLongShares * numTicks
@@ -0,0 +1,232 @@
+from binascii import hexlify
+from bisect import bisect_right
+from collections import defaultdict
+from ethereum.abi import ContractTranslator
+from ethereum.slogging import TRACE
+from ethereum import vm
+from io import open as io_open
+from logging import Handler
+from os import path
+
+# Opcodes whose cost is worth calling out on its own, everything else is reported as OTHER
+OPCODE_CLASSES = {
+    'SSTORE': 'SSTORE',
+    'SLOAD': 'SLOAD',
+    'CALL': 'CALL',
+    'CALLCODE': 'CALL',
+    'DELEGATECALL': 'CALL',
+    'STATICCALL': 'CALL',
+    'LOG0': 'LOG',
+    'LOG1': 'LOG',
+    'LOG2': 'LOG',
+    'LOG3': 'LOG',
+    'LOG4': 'LOG',
+    'CREATE': 'CREATE',
+    'CREATE2': 'CREATE',
+}
+
+def getOpcodeClass(op):
+    return OPCODE_CLASSES.get(op, 'OTHER')
+
+def getInstructionIndexes(code):
+    # Source maps are indexed by instruction rather than by program counter, so walk the code skipping over PUSH data
+    instructionIndexes = {}
+    pc = 0
+    instructionIndex = 0
+    while pc < len(code):
+        instructionIndexes[pc] = instructionIndex
+        opcode = ord(code[pc])
+        if 0x60 <= opcode <= 0x7f:
+            pc += opcode - 0x5f
+        pc += 1
+        instructionIndex += 1
+    return instructionIndexes
+
+def decompressSourceMap(sourceMap):
+    # Each entry is s:l:f:j where an empty field repeats the value from the previous entry
+    entries = []
+    previous = ['', '', '', '']
+    for entry in sourceMap.split(';') if sourceMap else []:
+        fields = entry.split(':')
+        current = [fields[i] if i < len(fields) and fields[i] != '' else previous[i] for i in range(4)]
+        entries.append((int(current[0] or -1), int(current[1] or -1), int(current[2] or -1)))
+        previous = current
+    return entries
+
+class CallFrame():
+
+    def __init__(self, stack, sourceLocator):
+        self.stack = stack
+        self.sourceLocator = sourceLocator
+        self.pendingOperation = None
+        self.childGasUsed = 0
+
+class SourceLocator():
+
+    def __init__(self, profiler, compiledContract, code, isCreate):
+        self.profiler = profiler
+        self.compiledContract = compiledContract
+        self.instructionIndexes = getInstructionIndexes(code)
+        self.sourceMap = decompressSourceMap(compiledContract['sourceMap' if isCreate else 'deployedSourceMap']) if compiledContract else []
+
+    def getSourceLine(self, pc):
+        instructionIndex = self.instructionIndexes.get(pc)
+        if instructionIndex is None or instructionIndex >= len(self.sourceMap):
+            return None
+        offset, _, fileIndex = self.sourceMap[instructionIndex]
+        sourceList = self.compiledContract.get('sourceList', [])
+        if offset < 0 or fileIndex < 0 or fileIndex >= len(sourceList):
+            return None
+        return self.profiler.getSourceLine(sourceList[fileIndex], offset)
+
+class OperationTraceHandler(Handler):
+
+    def __init__(self, profiler):
+        Handler.__init__(self, TRACE)
+        self.profiler = profiler
+
+    def emit(self, record):
+        operation = getattr(record, 'kwargs', {})
+        if 'op' in operation:
+            self.profiler.recordOperation(operation['op'], int(operation['pc']), int(operation['gas']))
+
+class GasProfiler():
+    """
+    Attributes the gas used by the calls made inside the block to call frames (contract and function), to opcode classes and to Solidity source lines.
+
+        with GasProfiler(fixture) as profiler:
+            fillOrder.publicFillOrder(...)
+        profiler.writeCollapsedStacks('fillOrder.folded')
+
+    The collapsed stacks can be fed to flamegraph.pl or speedscope.  Execution is traced opcode by opcode so expect the profiled calls to run much slower than usual.  Gas refunds and the intrinsic transaction cost are not attributed to any frame.
+    """
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.frames = []
+        self.stackGas = defaultdict(int)
+        self.opcodeClassGas = defaultdict(int)
+        self.sourceLineGas = defaultdict(int)
+        self.lineOffsets = {}
+        self.sourceLocators = {}
+        self.selectorNames = {}
+        self.runtimeContracts = {}
+        self.creationContracts = []
+        for compiledContract in fixture.compiledContracts.values():
+            if compiledContract['bytecode']:
+                self.creationContracts.append(compiledContract)
+            if compiledContract.get('deployedBytecode'):
+                self.runtimeContracts[str(bytearray.fromhex(compiledContract['deployedBytecode']))] = compiledContract
+
+    def __enter__(self):
+        self.startingGas = self.fixture.chain.head_state.gas_used
+        self.originalVmExecute = vm.vm_execute
+        vm.vm_execute = self.vmExecute
+        self.traceHandler = OperationTraceHandler(self)
+        self.originalLevel = vm.log_vm_op.level
+        self.originalPropagate = vm.log_vm_op.propagate
+        vm.log_vm_op.addHandler(self.traceHandler)
+        vm.log_vm_op.setLevel(TRACE)
+        vm.log_vm_op.propagate = False
+        return self
+
+    def __exit__(self, *args):
+        vm.vm_execute = self.originalVmExecute
+        vm.log_vm_op.removeHandler(self.traceHandler)
+        vm.log_vm_op.setLevel(self.originalLevel)
+        vm.log_vm_op.propagate = self.originalPropagate
+        self.gasUsed = self.fixture.chain.head_state.gas_used - self.startingGas
+        if args[1]:
+            raise args[1]
+
+    def vmExecute(self, ext, msg, code):
+        isCreate = getattr(msg, 'is_create', False)
+        compiledContract = self.getCompiledContract(code, isCreate)
+        parentStack = self.frames[-1].stack if self.frames else ()
+        frame = CallFrame(parentStack + (self.getFrameLabel(msg, compiledContract, isCreate),), self.getSourceLocator(compiledContract, code, isCreate))
+        self.frames.append(frame)
+        try:
+            result = self.originalVmExecute(ext, msg, code)
+        finally:
+            self.frames.pop()
+        gasRemaining = result[1]
+        self.finishOperation(frame, gasRemaining)
+        if self.frames:
+            self.frames[-1].childGasUsed += msg.gas - gasRemaining
+        return result
+
+    def recordOperation(self, op, pc, gasBefore):
+        if not self.frames:
+            return
+        frame = self.frames[-1]
+        self.finishOperation(frame, gasBefore)
+        frame.pendingOperation = (op, pc, gasBefore)
+
+    def finishOperation(self, frame, gasAfter):
+        # The gas an operation used is only known once the next one starts.  Gas spent by any frame the operation called is subtracted so it is only counted in the callee.
+        if frame.pendingOperation is None:
+            return
+        op, pc, gasBefore = frame.pendingOperation
+        gasUsed = gasBefore - gasAfter - frame.childGasUsed
+        frame.pendingOperation = None
+        frame.childGasUsed = 0
+        opcodeClass = getOpcodeClass(op)
+        self.stackGas[frame.stack + (opcodeClass,)] += gasUsed
+        self.opcodeClassGas[opcodeClass] += gasUsed
+        sourceLine = frame.sourceLocator.getSourceLine(pc)
+        if sourceLine:
+            self.sourceLineGas[sourceLine] += gasUsed
+
+    def getCompiledContract(self, code, isCreate):
+        if not isCreate:
+            return self.runtimeContracts.get(code)
+        # Creation code is followed by the ABI encoded constructor arguments
+        matches = [compiledContract for compiledContract in self.creationContracts if code.startswith(str(bytearray.fromhex(compiledContract['bytecode'])))]
+        return max(matches, key=lambda compiledContract: len(compiledContract['bytecode'])) if matches else None
+
+    def getSourceLocator(self, compiledContract, code, isCreate):
+        key = (code, isCreate)
+        if key not in self.sourceLocators:
+            self.sourceLocators[key] = SourceLocator(self, compiledContract, code, isCreate)
+        return self.sourceLocators[key]
+
+    def getFrameLabel(self, msg, compiledContract, isCreate):
+        contractName = compiledContract['name'] if compiledContract else '0x' + hexlify(msg.to)
+        if isCreate:
+            return contractName + '.constructor'
+        selector = msg.data.extract_all()[:4]
+        if len(selector) < 4:
+            return contractName + '.fallback'
+        return contractName + '.' + self.getSelectorNames(compiledContract).get(selector, '0x' + hexlify(selector))
+
+    def getSelectorNames(self, compiledContract):
+        if compiledContract is None:
+            return {}
+        if compiledContract['name'] not in self.selectorNames:
+            translator = ContractTranslator(compiledContract['abi'])
+            self.selectorNames[compiledContract['name']] = dict((('%08x' % functionData['prefix']).decode('hex'), functionName) for functionName, functionData in translator.function_data.items())
+        return self.selectorNames[compiledContract['name']]
+
+    def getSourceLine(self, sourcePath, offset):
+        if sourcePath not in self.lineOffsets:
+            lineOffsets = [0]
+            if path.isfile(sourcePath):
+                with io_open(sourcePath, mode='rb') as file:
+                    for line in file:
+                        lineOffsets.append(lineOffsets[-1] + len(line))
+            self.lineOffsets[sourcePath] = lineOffsets
+        return '%s:%i' % (sourcePath, bisect_right(self.lineOffsets[sourcePath], offset))
+
+    def getCollapsedStacks(self):
+        return ['%s %i' % (';'.join(stack), gasUsed) for stack, gasUsed in sorted(self.stackGas.items()) if gasUsed > 0]
+
+    def writeCollapsedStacks(self, filePath):
+        with open(filePath, 'w') as file:
+            file.write('\n'.join(self.getCollapsedStacks()) + '\n')
+
+    def printSummary(self, topSourceLines=10):
+        print "GAS USED: %i" % self.gasUsed
+        for opcodeClass, gasUsed in sorted(self.opcodeClassGas.items(), key=lambda item: -item[1]):
+            print "    %s: %i" % (opcodeClass, gasUsed)
+        for sourceLine, gasUsed in sorted(self.sourceLineGas.items(), key=lambda item: -item[1])[:topSourceLines]:
+            print "    %s: %i" % (sourceLine, gasUsed)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from constants import BID
+from orders_model import NULL_ORDER_ID
+from utils import normalizeAddress
+
+# Off chain mirror of the order books kept by source/contracts/trading/Orders.sol, built only from the OrderCreated, OrderCanceled and OrderFilled logs that Augur emits.  It hands out the exact betterOrderId/worseOrderId pair an order will be linked between, so OrdersFetcher.findBoundingOrders accepts the hints without walking the list.
+
+class OrderBook():
+    """
+    One market/outcome/type book.  Orders are grouped into price levels whose keys are kept in a sorted list, so finding where a price goes is a bisect.  Within a level orders are kept in an OrderedDict in the order they were created, which is where the contract puts them when created with the hints this mirror hands out, and which lets an order be removed without scanning its level.
+    """
+
+    def __init__(self, orderType):
+        self.orderType = orderType
+        self.levelKeys = []
+        self.levels = {}
+
+    def getLevelKey(self, price):
+        # The best order comes first, that is the highest bid or the lowest ask
+        return -price if self.orderType == BID else price
+
+    def addOrder(self, orderId, price):
+        levelKey = self.getLevelKey(price)
+        if levelKey not in self.levels:
+            insort(self.levelKeys, levelKey)
+            self.levels[levelKey] = OrderedDict()
+        self.levels[levelKey][orderId] = True
+
+    def removeOrder(self, orderId, price):
+        levelKey = self.getLevelKey(price)
+        level = self.levels[levelKey]
+        del level[orderId]
+        if not level:
+            del self.levels[levelKey]
+            del self.levelKeys[bisect_right(self.levelKeys, levelKey) - 1]
+
+    def getBoundingOrders(self, price):
+        # A new order goes after every order with the same price or a better one
+        index = bisect_right(self.levelKeys, self.getLevelKey(price))
+        betterOrderId = next(reversed(self.levels[self.levelKeys[index - 1]])) if index > 0 else NULL_ORDER_ID
+        worseOrderId = next(iter(self.levels[self.levelKeys[index]])) if index < len(self.levelKeys) else NULL_ORDER_ID
+        return (betterOrderId, worseOrderId)
+
+    def getOrderIds(self):
+        return [orderId for levelKey in self.levelKeys for orderId in self.levels[levelKey]]
+
+class OrderBookMirror():
+    """
+    Tracks every order book from Augur's logs since the mirror was entered and computes the hints for new orders off chain.
+
+        with OrderBookMirror(fixture) as mirror:
+            betterOrderId, worseOrderId = mirror.getBoundingOrders(BID, price, market, outcome)
+            createOrder.publicCreateOrder(BID, amount, price, market.address, outcome, betterOrderId, worseOrderId, tradeGroupId)
+
+    Logs are read from the receipts of the block being built rather than from a log listener, since listeners also see the logs of transactions that revert.  Each lookup first decodes the receipts added since the previous one.  Orders created with other hints (or none) into a price level that already has orders are linked after the first order of that level, in which case hints within that level point at orders that are not adjacent and the contract falls back to a short walk through the level.
+    """
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.state = fixture.chain.head_state
+        self.augur = fixture.contracts['Augur']
+        self.books = {}
+        self.orders = {}
+        self.shareTokens = {}
+        self.receiptCount = None
+
+    def __enter__(self):
+        self.receiptCount = len(self.state.receipts)
+        return self
+
+    def __exit__(self, *args):
+        if args[1]:
+            raise args[1]
+
+    def sync(self):
+        receipts = self.state.receipts
+        assert len(receipts) >= self.receiptCount, "The block followed by the mirror was mined or reverted past the point the mirror was entered"
+        for receipt in receipts[self.receiptCount:]:
+            for message in receipt.logs:
+                self.replayLog(message)
+        self.receiptCount = len(receipts)
+
+    def replayLog(self, message):
+        if normalizeAddress(message.address) != normalizeAddress(self.augur.address) or not message.topics:
+            return
+        eventData = self.augur.translator.event_data.get(message.topics[0])
+        if eventData and eventData['name'] in ('OrderCreated', 'OrderCanceled', 'OrderFilled'):
+            self.processLog(self.augur.translator.listen(message))
+
+    def processLog(self, log):
+        eventType = log['_event_type']
+        if eventType == 'OrderCreated':
+            shareToken = normalizeAddress(log['shareToken'])
+            self.orders[log['orderId']] = dict(shareToken=shareToken, orderType=log['orderType'], price=log['price'], amount=log['amount'])
+            self.getBook(shareToken, log['orderType']).addOrder(log['orderId'], log['price'])
+        elif eventType == 'OrderCanceled':
+            self.removeOrder(log['orderId'])
+        elif eventType == 'OrderFilled':
+            order = self.orders.get(log['orderId'])
+            if order:
+                order['amount'] -= log['amountFilled']
+                if order['amount'] == 0:
+                    self.removeOrder(log['orderId'])
+
+    def removeOrder(self, orderId):
+        order = self.orders.pop(orderId, None)
+        if order:
+            self.getBook(order['shareToken'], order['orderType']).removeOrder(orderId, order['price'])
+
+    def getBook(self, shareToken, orderType):
+        key = (shareToken, orderType)
+        if key not in self.books:
+            self.books[key] = OrderBook(orderType)
+        return self.books[key]
+
+    def getShareToken(self, market, outcome):
+        # Logs identify a book by its share token, look each one up once
+        key = (normalizeAddress(market.address), outcome)
+        if key not in self.shareTokens:
+            self.shareTokens[key] = normalizeAddress(market.getShareToken(outcome))
+        return self.shareTokens[key]
+
+    def getBoundingOrders(self, orderType, price, market, outcome):
+        self.sync()
+        return self.getBook(self.getShareToken(market, outcome), orderType).getBoundingOrders(price)
+
+    def getOrderIds(self, orderType, market, outcome):
+        self.sync()
+        return self.getBook(self.getShareToken(market, outcome), orderType).getOrderIds()
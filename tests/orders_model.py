@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+
+import numpy as np
+from constants import BID, ASK
+
+# Python reference model of the order lists kept by source/contracts/trading/Orders.sol and the bounding order search in OrdersFetcher.sol.  It follows the contracts step for step, including how hints are validated and where orders with equal prices end up, so a differential test can compare the complete book after every operation.
+
+NULL_ORDER_ID = '\x00' * 32
+
+class OrderBookModelRevert(Exception):
+    pass
+
+def require(condition):
+    if not condition:
+        raise OrderBookModelRevert()
+
+def emptyOrder():
+    return { 'orderType': BID, 'market': None, 'outcome': 0, 'price': 0, 'amount': 0, 'creator': None, 'moneyEscrowed': 0, 'sharesEscrowed': 0, 'betterOrderId': NULL_ORDER_ID, 'worseOrderId': NULL_ORDER_ID }
+
+class OrderBookModel():
+
+    def __init__(self, numTicks):
+        self.numTicks = numTicks
+        self.orders = {}
+        self.bestOrder = {}
+        self.worstOrder = {}
+
+    ####
+    #### Orders.sol
+    ####
+
+    def getOrder(self, orderId):
+        return self.orders.get(orderId) or emptyOrder()
+
+    def getPrice(self, orderId):
+        return self.getOrder(orderId)['price']
+
+    def getBetterOrderId(self, orderId):
+        return self.getOrder(orderId)['betterOrderId']
+
+    def getWorseOrderId(self, orderId):
+        return self.getOrder(orderId)['worseOrderId']
+
+    def getBestOrderId(self, orderType, market, outcome):
+        return self.bestOrder.get((market, outcome, orderType), NULL_ORDER_ID)
+
+    def getWorstOrderId(self, orderType, market, outcome):
+        return self.worstOrder.get((market, outcome, orderType), NULL_ORDER_ID)
+
+    def isBetterPrice(self, orderType, price, orderId):
+        if orderType == BID:
+            return price > self.getPrice(orderId)
+        return price < self.getPrice(orderId)
+
+    def isWorsePrice(self, orderType, price, orderId):
+        if orderType == BID:
+            return price < self.getPrice(orderId)
+        return price > self.getPrice(orderId)
+
+    def saveOrder(self, orderId, orderType, market, amount, price, creator, outcome, moneyEscrowed, sharesEscrowed, betterOrderId, worseOrderId):
+        # Orders.sol writes the order before searching for its position, and any revert rolls the write back
+        previousOrder = self.orders.get(orderId)
+        order = dict(previousOrder or emptyOrder())
+        order.update(orderType=orderType, market=market, outcome=outcome, price=price, amount=amount, creator=creator, moneyEscrowed=moneyEscrowed, sharesEscrowed=sharesEscrowed)
+        self.orders[orderId] = order
+        try:
+            betterOrderId, worseOrderId = self.findBoundingOrders(orderType, price, self.getBestOrderId(orderType, market, outcome), self.getWorstOrderId(orderType, market, outcome), betterOrderId, worseOrderId)
+        except OrderBookModelRevert:
+            if previousOrder is None:
+                del self.orders[orderId]
+            else:
+                self.orders[orderId] = previousOrder
+            raise
+        key = (market, outcome, orderType)
+        if betterOrderId == NULL_ORDER_ID:
+            self.bestOrder[key] = orderId
+        else:
+            self.setField(betterOrderId, 'worseOrderId', orderId)
+            order['betterOrderId'] = betterOrderId
+        if worseOrderId == NULL_ORDER_ID:
+            self.worstOrder[key] = orderId
+        else:
+            self.setField(worseOrderId, 'betterOrderId', orderId)
+            order['worseOrderId'] = worseOrderId
+        return orderId
+
+    def removeOrder(self, orderId):
+        self.removeOrderFromList(orderId)
+        self.orders.pop(orderId, None)
+        return True
+
+    def recordFillOrder(self, orderId, sharesFilled, tokensFilled):
+        order = self.getOrder(orderId)
+        require(orderId != NULL_ORDER_ID)
+        require(sharesFilled <= order['sharesEscrowed'])
+        require(tokensFilled <= order['moneyEscrowed'])
+        require(order['price'] <= self.numTicks)
+        if order['orderType'] == BID:
+            require(order['price'] > 0)
+            fill = sharesFilled + tokensFilled // order['price']
+        else:
+            require(self.numTicks - order['price'] > 0)
+            fill = sharesFilled + tokensFilled // (self.numTicks - order['price'])
+        require(fill <= order['amount'])
+        if fill == order['amount']:
+            require(order['moneyEscrowed'] == tokensFilled)
+            require(order['sharesEscrowed'] == sharesFilled)
+        order = self.orders.setdefault(orderId, order)
+        order['amount'] -= fill
+        order['moneyEscrowed'] -= tokensFilled
+        order['sharesEscrowed'] -= sharesFilled
+        if order['amount'] == 0:
+            self.removeOrderFromList(orderId)
+            order['price'] = 0
+            order['creator'] = None
+        return True
+
+    def removeOrderFromList(self, orderId):
+        order = self.getOrder(orderId)
+        key = (order['market'], order['outcome'], order['orderType'])
+        betterOrderId = order['betterOrderId']
+        worseOrderId = order['worseOrderId']
+        if self.bestOrder.get(key, NULL_ORDER_ID) == orderId:
+            self.bestOrder[key] = worseOrderId
+        if self.worstOrder.get(key, NULL_ORDER_ID) == orderId:
+            self.worstOrder[key] = betterOrderId
+        if betterOrderId != NULL_ORDER_ID:
+            self.setField(betterOrderId, 'worseOrderId', worseOrderId)
+        if worseOrderId != NULL_ORDER_ID:
+            self.setField(worseOrderId, 'betterOrderId', betterOrderId)
+        if orderId in self.orders:
+            self.orders[orderId]['betterOrderId'] = NULL_ORDER_ID
+            self.orders[orderId]['worseOrderId'] = NULL_ORDER_ID
+        return True
+
+    def setField(self, orderId, field, value):
+        # Writing to an order that was never saved creates it in the contract's storage as well
+        self.orders.setdefault(orderId, emptyOrder())[field] = value
+
+    ####
+    #### OrdersFetcher.sol
+    ####
+
+    def ascendOrderList(self, orderType, price, lowestOrderId):
+        worseOrderId = lowestOrderId
+        if orderType == BID:
+            isWorstPrice = price <= self.getPrice(worseOrderId)
+        else:
+            isWorstPrice = price >= self.getPrice(worseOrderId)
+        if isWorstPrice:
+            return (worseOrderId, self.getWorseOrderId(worseOrderId))
+        isBetterPrice = self.isBetterPrice(orderType, price, worseOrderId)
+        while isBetterPrice and self.getBetterOrderId(worseOrderId) != NULL_ORDER_ID and price != self.getPrice(self.getBetterOrderId(worseOrderId)):
+            betterOrderId = self.getBetterOrderId(worseOrderId)
+            isBetterPrice = self.isBetterPrice(orderType, price, betterOrderId)
+            if isBetterPrice:
+                worseOrderId = self.getBetterOrderId(worseOrderId)
+        return (self.getBetterOrderId(worseOrderId), worseOrderId)
+
+    def descendOrderList(self, orderType, price, highestOrderId):
+        betterOrderId = highestOrderId
+        if orderType == BID:
+            isBestPrice = price > self.getPrice(betterOrderId)
+        else:
+            isBestPrice = price < self.getPrice(betterOrderId)
+        if isBestPrice:
+            return (NULL_ORDER_ID, betterOrderId)
+        if price == self.getPrice(betterOrderId):
+            return (betterOrderId, self.getWorseOrderId(betterOrderId))
+        isWorsePrice = self.isWorsePrice(orderType, price, betterOrderId)
+        while isWorsePrice and self.getWorseOrderId(betterOrderId) != NULL_ORDER_ID:
+            worseOrderId = self.getWorseOrderId(betterOrderId)
+            isWorsePrice = self.isWorsePrice(orderType, price, worseOrderId)
+            if isWorsePrice or price == self.getPrice(self.getWorseOrderId(betterOrderId)):
+                betterOrderId = self.getWorseOrderId(betterOrderId)
+        return (betterOrderId, self.getWorseOrderId(betterOrderId))
+
+    def findBoundingOrders(self, orderType, price, bestOrderId, worstOrderId, betterOrderId, worseOrderId):
+        if bestOrderId == worstOrderId:
+            if bestOrderId == NULL_ORDER_ID:
+                return (NULL_ORDER_ID, NULL_ORDER_ID)
+            elif self.isBetterPrice(orderType, price, bestOrderId):
+                return (NULL_ORDER_ID, bestOrderId)
+            else:
+                return (bestOrderId, NULL_ORDER_ID)
+        if betterOrderId != NULL_ORDER_ID:
+            if self.getPrice(betterOrderId) == 0:
+                betterOrderId = NULL_ORDER_ID
+            else:
+                require(not self.isBetterPrice(orderType, price, betterOrderId))
+        if worseOrderId != NULL_ORDER_ID:
+            if self.getPrice(worseOrderId) == 0:
+                worseOrderId = NULL_ORDER_ID
+            else:
+                require(not self.isWorsePrice(orderType, price, worseOrderId))
+        if betterOrderId == NULL_ORDER_ID and worseOrderId == NULL_ORDER_ID:
+            return self.descendOrderList(orderType, price, bestOrderId)
+        elif betterOrderId == NULL_ORDER_ID:
+            return self.ascendOrderList(orderType, price, worseOrderId)
+        elif worseOrderId == NULL_ORDER_ID:
+            return self.descendOrderList(orderType, price, betterOrderId)
+        if self.getWorseOrderId(betterOrderId) != worseOrderId:
+            return self.descendOrderList(orderType, price, betterOrderId)
+        elif self.getBetterOrderId(worseOrderId) != betterOrderId:
+            return self.ascendOrderList(orderType, price, worseOrderId)
+        return (betterOrderId, worseOrderId)
+
+    ####
+    #### Book inspection
+    ####
+
+    def getOrderIds(self, orderType, market, outcome):
+        # Walks the list from the best order, stopping if it loops so a corrupted book fails the invariant check instead of hanging
+        orderIds = []
+        orderId = self.getBestOrderId(orderType, market, outcome)
+        while orderId != NULL_ORDER_ID and len(orderIds) <= len(self.orders):
+            orderIds.append(orderId)
+            orderId = self.getWorseOrderId(orderId)
+        return orderIds
+
+    def getLiveOrderIds(self, orderType, market, outcome):
+        return set(orderId for orderId, order in self.orders.items() if order['orderType'] == orderType and order['market'] == market and order['outcome'] == outcome and order['price'] > 0)
+
+    def assertInvariants(self, orderType, market, outcome):
+        orderIds = self.getOrderIds(orderType, market, outcome)
+        assert set(orderIds) == self.getLiveOrderIds(orderType, market, outcome), "Every live order is in the list exactly once"
+        assert len(set(orderIds)) == len(orderIds), "The list has no cycles"
+        if not orderIds:
+            assert self.getWorstOrderId(orderType, market, outcome) == NULL_ORDER_ID
+            return
+        assert self.getBestOrderId(orderType, market, outcome) == orderIds[0], "The best order is the head of the list"
+        assert self.getWorstOrderId(orderType, market, outcome) == orderIds[-1], "The worst order is the tail of the list"
+        assert self.getBetterOrderId(orderIds[0]) == NULL_ORDER_ID, "Nothing is better than the best order"
+        betterOrderIds = [self.getBetterOrderId(orderId) for orderId in orderIds[1:]]
+        assert betterOrderIds == orderIds[:-1], "Better and worse links agree"
+        priceSteps = np.diff(np.array([self.getPrice(orderId) for orderId in orderIds], dtype=object))
+        if orderType == BID:
+            assert np.all(priceSteps <= 0), "Bids are ordered by descending price"
+        else:
+            assert np.all(priceSteps >= 0), "Asks are ordered by ascending price"
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+from collections import namedtuple
+from ethereum.tools.tester import TransactionFailed
+from ethereum.utils import privtoaddr
+from utils import bytesToHexString, longToHexString
+
+# Plans Universe.redeemStake calls for an account.  Candidates are the account's dispute crowdsourcer tokens and initial reports in the given markets and its participation or fee tokens in the universe's recent fee windows.  Each candidate is redeemed alone against a chain snapshot to find what it pays out and what it costs; the ones that pay nothing or revert are dropped and the rest are packed into as few redeemStake transactions as fit a gas budget.
+
+DEFAULT_FEE_WINDOW_LOOKBACK = 52
+
+RedemptionResult = namedtuple('RedemptionResult', ['gas', 'ether', 'reputation'])
+RedemptionEntry = namedtuple('RedemptionEntry', ['address', 'isFeeWindow', 'gas', 'ether', 'reputation'])
+
+class RedemptionBatch():
+
+    def __init__(self, overheadGas):
+        self.gas = overheadGas
+        self.entries = []
+
+    def addEntry(self, entry):
+        self.entries.append(entry)
+        self.gas += entry.gas
+
+    def popEntry(self):
+        entry = self.entries.pop()
+        self.gas -= entry.gas
+        return entry
+
+    def getReportingParticipants(self):
+        return [entry.address for entry in self.entries if not entry.isFeeWindow]
+
+    def getFeeWindows(self):
+        return [entry.address for entry in self.entries if entry.isFeeWindow]
+
+def simulateRedemption(fixture, universe, sender, reportingParticipants, feeWindows, startgas=None):
+    # Redeems against a snapshot that is always rolled back.  Returns None if the redemption reverts, e.g. a market that can't be finalized yet or a fee window that isn't over.
+    account = privtoaddr(sender)
+    reputationToken = fixture.applySignature('ReputationToken', universe.getReputationToken())
+    snapshot = fixture.chain.snapshot()
+    try:
+        startingReputation = reputationToken.balanceOf(account)
+        startingEther = fixture.chain.head_state.get_balance(account)
+        startingGas = fixture.chain.head_state.gas_used
+        kwargs = dict(sender=sender) if startgas is None else dict(sender=sender, startgas=startgas)
+        universe.redeemStake(reportingParticipants, feeWindows, **kwargs)
+        gasUsed = fixture.chain.head_state.gas_used - startingGas
+        return RedemptionResult(gasUsed, fixture.chain.head_state.get_balance(account) - startingEther, reputationToken.balanceOf(account) - startingReputation)
+    except TransactionFailed:
+        return None
+    finally:
+        fixture.chain.revert(snapshot)
+
+def getRedemptionCandidates(fixture, universe, account, markets, feeWindowLookback=DEFAULT_FEE_WINDOW_LOOKBACK):
+    # Returns (address, isFeeWindow) pairs worth simulating, found with a few batched reads.  An initial report pays out to its owner and a dispute crowdsourcer to holders of its tokens.
+    account = bytesToHexString(account)
+    candidates = []
+    marketResults = fixture.batchRead([(market, methodName, []) for market in markets for methodName in ['getNumParticipants', 'getInitialReporterAddress']])
+    participantAddresses = fixture.batchRead([(market, 'getReportingParticipant', [i]) for market, numParticipants in zip(markets, marketResults[0::2]) for i in range(numParticipants)])
+    initialReporterAddresses = set(marketResults[1::2])
+    participantReads = []
+    for participantAddress in participantAddresses:
+        if participantAddress in initialReporterAddresses:
+            participantReads.append((fixture.applySignature('InitialReporter', participantAddress), 'getOwner', []))
+        else:
+            participantReads.append((fixture.applySignature('DisputeCrowdsourcer', participantAddress), 'balanceOf', [account]))
+    for participantAddress, result in zip(participantAddresses, fixture.batchRead(participantReads)):
+        if (result == account) if participantAddress in initialReporterAddresses else (result > 0):
+            candidates.append((participantAddress, False))
+
+    currentFeeWindowId = universe.getFeeWindowId(fixture.contracts["Time"].getTimestamp())
+    feeWindowIds = range(max(currentFeeWindowId - feeWindowLookback, 0), currentFeeWindowId + 1)
+    feeWindowAddresses = [feeWindowAddress for feeWindowAddress in fixture.batchRead([(universe, 'getFeeWindow', [feeWindowId]) for feeWindowId in feeWindowIds]) if feeWindowAddress != longToHexString(0)]
+    feeWindows = [fixture.applySignature('FeeWindow', feeWindowAddress) for feeWindowAddress in feeWindowAddresses]
+    feeWindowResults = fixture.batchRead([(feeWindow, methodName, args) for feeWindow in feeWindows for methodName, args in [('balanceOf', [account]), ('getFeeToken', [])]])
+    feeTokenBalances = fixture.batchRead([(fixture.applySignature('FeeToken', feeTokenAddress), 'balanceOf', [account]) for feeTokenAddress in feeWindowResults[1::2]])
+    for feeWindowAddress, participationTokens, feeTokens in zip(feeWindowAddresses, feeWindowResults[0::2], feeTokenBalances):
+        if participationTokens > 0 or feeTokens > 0:
+            candidates.append((feeWindowAddress, True))
+    return candidates
+
+def packRedemptionBatches(fixture, universe, sender, entries, overheadGas, gasBudget):
+    # Each batch takes the most expensive entries that still fit.  Gas used is measured after refunds, so a batch can need more gas to start with than its entries add up to; every batch is redeemed once with the budget as its gas limit and handed back entries until it succeeds.
+    pending = sorted(entries, key=lambda entry: -entry.gas)
+    batches = []
+    while pending:
+        batch = RedemptionBatch(overheadGas)
+        leftover = []
+        for entry in pending:
+            if batch.gas + entry.gas <= gasBudget:
+                batch.addEntry(entry)
+            else:
+                leftover.append(entry)
+        while batch.entries and simulateRedemption(fixture, universe, sender, batch.getReportingParticipants(), batch.getFeeWindows(), startgas=gasBudget) is None:
+            leftover.insert(0, batch.popEntry())
+        if not batch.entries:
+            raise Exception("Redeeming %s alone does not fit in a gas budget of %i" % (leftover[0].address, gasBudget))
+        batches.append(batch)
+        pending = leftover
+    return batches
+
+def planRedemption(fixture, universe, sender, markets, gasBudget, feeWindowLookback=DEFAULT_FEE_WINDOW_LOOKBACK):
+    overheadGas = simulateRedemption(fixture, universe, sender, [], []).gas
+    entries = []
+    for address, isFeeWindow in getRedemptionCandidates(fixture, universe, privtoaddr(sender), markets, feeWindowLookback):
+        result = simulateRedemption(fixture, universe, sender, [] if isFeeWindow else [address], [address] if isFeeWindow else [])
+        if result is None or (result.ether == 0 and result.reputation == 0):
+            continue
+        entries.append(RedemptionEntry(address, isFeeWindow, result.gas - overheadGas, result.ether, result.reputation))
+    return packRedemptionBatches(fixture, universe, sender, entries, overheadGas, gasBudget)
+
+def redeemBatches(universe, sender, batches, gasBudget):
+    for batch in batches:
+        assert universe.redeemStake(batch.getReportingParticipants(), batch.getFeeWindows(), sender=sender, startgas=gasBudget)
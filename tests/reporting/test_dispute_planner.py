@@ -0,0 +1,44 @@
+from ethereum.tools import tester
+from dispute_planner import planDisputeRounds, planDisputeRoundsForMarket, submitDisputeRounds
+from reporting_utils import proceedToNextRound
+from utils import longToHexString
+
+def test_planDisputeRounds():
+    payouts = [('first', [1, 0], False), ('second', [0, 1], False)]
+    rounds = planDisputeRounds([('first', 10)], payouts, 700, 100, 1000)
+
+    assert [disputeRound.amount for disputeRound in rounds] == [20, 30, 60, 120, 240, 480, 960, 1920]
+    assert [disputeRound.timestamp for disputeRound in rounds] == [701 + 100 * i for i in range(8)]
+    assert [disputeRound.payoutNumerators for disputeRound in rounds] == [[0, 1], [1, 0]] * 4
+    assert [disputeRound.forks for disputeRound in rounds] == [False] * 7 + [True]
+
+    assert planDisputeRounds([('first', 10)], payouts, 700, 100, 1000, maxRounds=3) == rounds[:3]
+
+def test_planMatchesRoundByRoundDisputes(kitchenSinkFixture, universe, market):
+    proceedToNextRound(kitchenSinkFixture, market)
+    rounds = planDisputeRoundsForMarket(kitchenSinkFixture, market)
+    assert rounds[-1].forks
+
+    for disputeRound in rounds:
+        feeWindow = kitchenSinkFixture.applySignature('FeeWindow', market.getFeeWindow())
+        assert feeWindow.getStartTime() + 1 == disputeRound.timestamp
+        assert market.getForkingMarket() == longToHexString(0)
+        proceedToNextRound(kitchenSinkFixture, market)
+        participant = kitchenSinkFixture.applySignature('DisputeCrowdsourcer', market.getWinningReportingParticipant())
+        assert participant.getStake() == disputeRound.amount
+        assert participant.getPayoutDistributionHash() == market.derivePayoutDistributionHash(disputeRound.payoutNumerators, disputeRound.invalid)
+
+    assert market.getForkingMarket() == market.address
+
+def test_submitDisputeRounds(kitchenSinkFixture, universe, market):
+    proceedToNextRound(kitchenSinkFixture, market)
+
+    submitDisputeRounds(kitchenSinkFixture, market, planDisputeRoundsForMarket(kitchenSinkFixture, market, maxRounds=3), contributor=tester.k0)
+    assert market.getNumParticipants() == 4
+    assert market.getForkingMarket() == longToHexString(0)
+
+    # Planning again from the chain picks up where the first plan stopped
+    rounds = planDisputeRoundsForMarket(kitchenSinkFixture, market)
+    submitDisputeRounds(kitchenSinkFixture, market, rounds)
+    assert market.getNumParticipants() == 4 + len(rounds)
+    assert market.getForkingMarket() == market.address
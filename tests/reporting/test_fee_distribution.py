@@ -2,9 +2,10 @@ from ethereum.tools import tester
 from ethereum.tools.tester import TransactionFailed, ABIContract
 from pytest import fixture, mark, raises
 from utils import longTo32Bytes, bytesToHexString, TokenDelta, EtherDelta, longToHexString, PrintGasUsed, AssertLog
+from balance_ledger import BalanceLedger
 from reporting_utils import generateFees, proceedToNextRound, finalizeFork, getExpectedFees
 
-def test_initial_report_and_participation_fee_collection(localFixture, universe, market, categoricalMarket, scalarMarket, cash, reputationToken):
+def test_initial_report_and_participation_fee_collection(localFixture, universe, market, categoricalMarket, scalarMarket, cash, reputationToken, ledger):
     feeWindow = localFixture.applySignature('FeeWindow', market.getFeeWindow())
     constants = localFixture.contracts["Constants"]
 
@@ -18,8 +19,8 @@ def test_initial_report_and_participation_fee_collection(localFixture, universe,
     # We'll make the window active then purchase some participation tokens
     localFixture.contracts["Time"].setTimestamp(feeWindow.getStartTime() + 1)
     feeWindowAmount = 100
-    with TokenDelta(reputationToken, -feeWindowAmount, tester.a0, "Buying participation tokens didn't deduct REP correctly"):
-        with TokenDelta(feeWindow, feeWindowAmount, tester.a0, "Buying participation tokens didn't increase participation token balance correctly"):
+    with TokenDelta(reputationToken, -feeWindowAmount, tester.a0, "Buying participation tokens didn't deduct REP correctly", ledger=ledger):
+        with TokenDelta(feeWindow, feeWindowAmount, tester.a0, "Buying participation tokens didn't increase participation token balance correctly", ledger=ledger):
             assert feeWindow.buy(feeWindowAmount)
 
     # As other testers we'll buy some more
@@ -49,18 +50,18 @@ def test_initial_report_and_participation_fee_collection(localFixture, universe,
     expectedParticipationFees = reporterFees * feeWindowAmount / totalStake
 
     # Cashing out Participation tokens will awards fees proportional to the total winning stake in the window
-    with TokenDelta(reputationToken, feeWindowAmount, tester.a0, "Redeeming participation tokens didn't refund REP"):
-        with TokenDelta(feeWindow, -feeWindowAmount, tester.a0, "Redeeming participation tokens didn't decrease participation token balance correctly"):
+    with TokenDelta(reputationToken, feeWindowAmount, tester.a0, "Redeeming participation tokens didn't refund REP", ledger=ledger):
+        with TokenDelta(feeWindow, -feeWindowAmount, tester.a0, "Redeeming participation tokens didn't decrease participation token balance correctly", ledger=ledger):
             with EtherDelta(expectedParticipationFees, tester.a0, localFixture.chain, "Redeeming participation tokens didn't increase ETH correctly"):
                 assert feeWindow.redeem(tester.a0)
 
-    with TokenDelta(reputationToken, feeWindowAmount, tester.a1, "Redeeming participation tokens didn't refund REP"):
-        with TokenDelta(feeWindow, -feeWindowAmount, tester.a1, "Redeeming participation tokens didn't decrease participation token balance correctly"):
+    with TokenDelta(reputationToken, feeWindowAmount, tester.a1, "Redeeming participation tokens didn't refund REP", ledger=ledger):
+        with TokenDelta(feeWindow, -feeWindowAmount, tester.a1, "Redeeming participation tokens didn't decrease participation token balance correctly", ledger=ledger):
             with EtherDelta(expectedParticipationFees, tester.a1, localFixture.chain, "Redeeming participation tokens didn't increase ETH correctly"):
                 assert feeWindow.redeem(tester.a1)
 
-    with TokenDelta(reputationToken, feeWindowAmount, tester.a2, "Redeeming participation tokens didn't refund REP"):
-        with TokenDelta(feeWindow, -feeWindowAmount, tester.a2, "Redeeming participation tokens didn't decrease participation token balance correctly"):
+    with TokenDelta(reputationToken, feeWindowAmount, tester.a2, "Redeeming participation tokens didn't refund REP", ledger=ledger):
+        with TokenDelta(feeWindow, -feeWindowAmount, tester.a2, "Redeeming participation tokens didn't decrease participation token balance correctly", ledger=ledger):
             with EtherDelta(expectedParticipationFees, tester.a2, localFixture.chain, "Redeeming participation tokens didn't increase ETH correctly"):
                 assert feeWindow.redeem(tester.a2)
 
@@ -76,13 +77,13 @@ def test_initial_report_and_participation_fee_collection(localFixture, universe,
         "market": market.address
     }
     with AssertLog(localFixture, "InitialReporterRedeemed", initialReporterRedeemedLog):
-        with TokenDelta(reputationToken, marketStake, tester.a0, "Redeeming didn't refund REP"):
+        with TokenDelta(reputationToken, marketStake, tester.a0, "Redeeming didn't refund REP", ledger=ledger):
             with EtherDelta(expectedFees, tester.a0, localFixture.chain, "Redeeming didn't increase ETH correctly"):
                 assert marketInitialReport.redeem(tester.a0)
 
     categoricalMarketStake = categoricalInitialReport.getStake()
     expectedFees = reporterFees * categoricalMarketStake / totalStake
-    with TokenDelta(reputationToken, categoricalMarketStake, tester.a0, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, categoricalMarketStake, tester.a0, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedFees, tester.a0, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert categoricalInitialReport.redeem(tester.a0)
 
@@ -90,7 +91,7 @@ def test_initial_report_and_participation_fee_collection(localFixture, universe,
     True,
     False,
 ])
-def test_failed_crowdsourcer_fees(finalize, localFixture, universe, market, cash, reputationToken):
+def test_failed_crowdsourcer_fees(finalize, localFixture, universe, market, cash, reputationToken, ledger):
     feeWindow = localFixture.applySignature('FeeWindow', market.getFeeWindow())
 
     # generate some fees
@@ -108,10 +109,10 @@ def test_failed_crowdsourcer_fees(finalize, localFixture, universe, market, cash
     # confirm we can contribute 0
     assert market.contribute([1, market.getNumTicks()-1], False, 0, sender=tester.k1)
 
-    with TokenDelta(reputationToken, -amount + 1, tester.a1, "Disputing did not reduce REP balance correctly"):
+    with TokenDelta(reputationToken, -amount + 1, tester.a1, "Disputing did not reduce REP balance correctly", ledger=ledger):
         assert market.contribute([1, market.getNumTicks()-1], False, amount - 1, sender=tester.k1)
 
-    with TokenDelta(reputationToken, -amount + 1, tester.a2, "Disputing did not reduce REP balance correctly"):
+    with TokenDelta(reputationToken, -amount + 1, tester.a2, "Disputing did not reduce REP balance correctly", ledger=ledger):
         assert market.contribute([1, market.getNumTicks()-1], False, amount - 1, sender=tester.k2)
 
     assert market.getFeeWindow() == feeWindow.address
@@ -134,15 +135,15 @@ def test_failed_crowdsourcer_fees(finalize, localFixture, universe, market, cash
         localFixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
         expectedTotalFees = getExpectedFees(localFixture, cash, failedCrowdsourcer, 1)
 
-    with TokenDelta(reputationToken, amount - 1, tester.a1, "Redeeming did not refund REP"):
+    with TokenDelta(reputationToken, amount - 1, tester.a1, "Redeeming did not refund REP", ledger=ledger):
         with EtherDelta(expectedTotalFees / 2, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert failedCrowdsourcer.redeem(tester.a1)
 
-    with TokenDelta(reputationToken, amount - 1, tester.a2, "Redeeming did not refund REP"):
+    with TokenDelta(reputationToken, amount - 1, tester.a2, "Redeeming did not refund REP", ledger=ledger):
         with EtherDelta(cash.balanceOf(failedCrowdsourcer.address), tester.a2, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert failedCrowdsourcer.redeem(tester.a2)
 
-def test_one_round_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken):
+def test_one_round_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken, ledger):
     feeWindow = localFixture.applySignature('FeeWindow', market.getFeeWindow())
     constants = localFixture.contracts["Constants"]
 
@@ -154,7 +155,7 @@ def test_one_round_crowdsourcer_fees(localFixture, universe, market, cash, reput
 
     # We'll have testers push markets into the next round by funding dispute crowdsourcers
     amount = 2 * market.getParticipantStake()
-    with TokenDelta(reputationToken, -amount, tester.a1, "Disputing did not reduce REP balance correctly"):
+    with TokenDelta(reputationToken, -amount, tester.a1, "Disputing did not reduce REP balance correctly", ledger=ledger):
         assert market.contribute([0, market.getNumTicks()], False, amount, sender=tester.k1)
 
     newFeeWindowAddress = market.getFeeWindow()
@@ -188,17 +189,17 @@ def test_one_round_crowdsourcer_fees(localFixture, universe, market, cash, reput
         "market": market.address
     }
     with AssertLog(localFixture, "DisputeCrowdsourcerRedeemed", disputeCrowdsourcerRedeemedLog):
-        with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't refund REP"):
+        with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't refund REP", ledger=ledger):
             with EtherDelta(expectedFees, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
                 assert marketDisputeCrowdsourcer.redeem(tester.a1, sender=tester.k1)
 
     # The initial reporter gets fees even though they were not correct. They do not get their REP back though
     expectedFees = cash.balanceOf(feeWindow.address) + cash.balanceOf(universe.getOrCreateFeeWindowBefore(feeWindow.address))
-    with TokenDelta(reputationToken, 0, tester.a0, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, 0, tester.a0, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedFees, tester.a0, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert initialReporter.redeem(tester.a0)
 
-def test_multiple_round_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken):
+def test_multiple_round_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken, ledger):
     constants = localFixture.contracts["Constants"]
 
     # Initial Report disputed
@@ -234,38 +235,38 @@ def test_multiple_round_crowdsourcer_fees(localFixture, universe, market, cash,
     # The initial reporter locked in REP for 5 rounds.
     expectedInitialReporterFees = getExpectedFees(localFixture, cash, initialReporter, 5)
     expectedRep = long(initialReporter.getStake() + initialReporter.getStake() / 2)
-    with TokenDelta(reputationToken, expectedRep, tester.a0, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, expectedRep, tester.a0, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedInitialReporterFees, tester.a0, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert initialReporter.redeem(tester.a0)
 
     # The first winning dispute crowdsourcer will get fees for 4 rounds
     expectedWinningDisputeCrowdsourcer1Fees = getExpectedFees(localFixture, cash, winningDisputeCrowdsourcer1, 4)
     expectedRep = long(winningDisputeCrowdsourcer1.getStake() + winningDisputeCrowdsourcer1.getStake() / 2)
-    with TokenDelta(reputationToken, expectedRep, tester.a2, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, expectedRep, tester.a2, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedWinningDisputeCrowdsourcer1Fees, tester.a2, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert winningDisputeCrowdsourcer1.redeem(tester.a2)
 
     # The final winning dispute crowdsourcer will get fees for 2 rounds
     expectedWinningDisputeCrowdsourcer2Fees = getExpectedFees(localFixture, cash, winningDisputeCrowdsourcer2, 2)
     expectedRep = long(winningDisputeCrowdsourcer2.getStake() + winningDisputeCrowdsourcer2.getStake() / 2)
-    with TokenDelta(reputationToken, expectedRep, tester.a3, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, expectedRep, tester.a3, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedWinningDisputeCrowdsourcer2Fees, tester.a3, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert winningDisputeCrowdsourcer2.redeem(tester.a3)
 
     # The losing reports get fees as well but no REP
     # The first losing bond has fees from 5 rounds
     expectedLosingDisputeCrowdsourcer1Fees = getExpectedFees(localFixture, cash, losingDisputeCrowdsourcer1, 5)
-    with TokenDelta(reputationToken, 0, tester.a1, "Redeeming refunded REP"):
+    with TokenDelta(reputationToken, 0, tester.a1, "Redeeming refunded REP", ledger=ledger):
         with EtherDelta(expectedLosingDisputeCrowdsourcer1Fees, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert losingDisputeCrowdsourcer1.redeem(tester.a1)
 
     # The second losing bond has fees from 3 rounds
     expectedLosingDisputeCrowdsourcer2Fees = getExpectedFees(localFixture, cash, losingDisputeCrowdsourcer2, 3)
-    with TokenDelta(reputationToken, 0, tester.a1, "Redeeming refunded REP"):
+    with TokenDelta(reputationToken, 0, tester.a1, "Redeeming refunded REP", ledger=ledger):
         with EtherDelta(expectedLosingDisputeCrowdsourcer2Fees, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert losingDisputeCrowdsourcer2.redeem(tester.a1)
 
-def test_multiple_contributors_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken):
+def test_multiple_contributors_crowdsourcer_fees(localFixture, universe, market, cash, reputationToken, ledger):
     feeWindow = localFixture.applySignature('FeeWindow', market.getFeeWindow())
 
     # We'll make the window active
@@ -276,9 +277,9 @@ def test_multiple_contributors_crowdsourcer_fees(localFixture, universe, market,
 
     # We'll have testers push markets into the next round by funding dispute crowdsourcers
     amount = market.getParticipantStake()
-    with TokenDelta(reputationToken, -amount, tester.a1, "Disputing did not reduce REP balance correctly"):
+    with TokenDelta(reputationToken, -amount, tester.a1, "Disputing did not reduce REP balance correctly", ledger=ledger):
         assert market.contribute([0, market.getNumTicks()], False, amount, sender=tester.k1)
-    with TokenDelta(reputationToken, -amount, tester.a2, "Disputing did not reduce REP balance correctly"):
+    with TokenDelta(reputationToken, -amount, tester.a2, "Disputing did not reduce REP balance correctly", ledger=ledger):
         assert market.contribute([0, market.getNumTicks()], False, amount, sender=tester.k2)
 
     newFeeWindowAddress = market.getFeeWindow()
@@ -299,15 +300,15 @@ def test_multiple_contributors_crowdsourcer_fees(localFixture, universe, market,
     expectedFees = expectedFees / 3 * 2
 
     expectedRep = long(amount + amount / 2)
-    with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedFees / 2, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert marketDisputeCrowdsourcer.redeem(tester.a1)
 
-    with TokenDelta(reputationToken, expectedRep + 1, tester.a2, "Redeeming didn't refund REP"):
+    with TokenDelta(reputationToken, expectedRep + 1, tester.a2, "Redeeming didn't refund REP", ledger=ledger):
         with EtherDelta(expectedFees - expectedFees / 2, tester.a2, localFixture.chain, "Redeeming didn't increase ETH correctly"):
             assert marketDisputeCrowdsourcer.redeem(tester.a2)
 
-def test_forkAndRedeem(localFixture, universe, market, categoricalMarket, cash, reputationToken):
+def test_forkAndRedeem(localFixture, universe, market, categoricalMarket, cash, reputationToken, ledger):
     # Let's do some initial disputes for the categorical market
     proceedToNextRound(localFixture, categoricalMarket, tester.k1, moveTimeForward = False)
 
@@ -334,7 +335,7 @@ def test_forkAndRedeem(localFixture, universe, market, categoricalMarket, cash,
     expectedRep = categoricalDisputeCrowdsourcer.getStake()
     expectedEth = getExpectedFees(localFixture, cash, categoricalDisputeCrowdsourcer, 2)
     with EtherDelta(expectedEth, tester.a1, localFixture.chain, "Redeeming didn't increase ETH correctly"):
-        with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't increase REP correctly"):
+        with TokenDelta(reputationToken, expectedRep, tester.a1, "Redeeming didn't increase REP correctly", ledger=ledger):
             categoricalDisputeCrowdsourcer.redeem(tester.a1)
 
     noPayoutNumerators = [0] * market.getNumberOfOutcomes()
@@ -354,7 +355,7 @@ def test_forkAndRedeem(localFixture, universe, market, categoricalMarket, cash,
         expectedRep += expectedRep / localFixture.contracts["Constants"].FORK_MIGRATION_PERCENTAGE_BONUS_DIVISOR()
         expectedRep += reportingParticipant.getStake() / 2
         repToken = noUniverseReputationToken if i % 2 == 0 else yesUniverseReputationToken
-        with TokenDelta(repToken, expectedRep, account, "Redeeming didn't increase REP correctly for " + str(i)):
+        with TokenDelta(repToken, expectedRep, account, "Redeeming didn't increase REP correctly for " + str(i), ledger=ledger):
             assert reportingParticipant.forkAndRedeem(sender=key)
 
 @fixture(scope="session")
@@ -387,6 +388,12 @@ def localFixture(fixture, localSnapshot):
     fixture.resetToSnapshot(localSnapshot)
     return fixture
 
+@fixture
+def ledger(localFixture):
+    # REP and participation token deltas are read from the ledger, which checks every balance it replayed against the chain once the test is done
+    with BalanceLedger(localFixture) as ledger:
+        yield ledger
+
 @fixture
 def reputationToken(localFixture, kitchenSinkSnapshot, universe):
     return localFixture.applySignature('ReputationToken', universe.getReputationToken())
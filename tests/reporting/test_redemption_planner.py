@@ -0,0 +1,67 @@
+from ethereum.tools import tester
+from utils import TokenDelta, EtherDelta
+from reporting_utils import proceedToNextRound
+from redemption_planner import planRedemption, redeemBatches, simulateRedemption
+
+def disputeAndFinalize(fixture, market):
+    # Initial Report, then four dispute rounds that leave the initial report winning
+    for i in range(5):
+        proceedToNextRound(fixture, market, doGenerateFees = True)
+    feeWindow = fixture.applySignature("FeeWindow", market.getFeeWindow())
+    fixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
+    assert market.finalize()
+
+def test_planRedemption(kitchenSinkFixture, universe, market):
+    reputationToken = kitchenSinkFixture.applySignature("ReputationToken", universe.getReputationToken())
+    disputeAndFinalize(kitchenSinkFixture, market)
+
+    batches = planRedemption(kitchenSinkFixture, universe, tester.k0, [market], tester.STARTGAS)
+    assert len(batches) == 1
+    entries = batches[0].entries
+    for winningParticipant in [0, 2, 4]:
+        assert market.getReportingParticipant(winningParticipant) in batches[0].getReportingParticipants()
+    assert all(entry.reputation > 0 or entry.ether > 0 for entry in entries)
+
+    expectedEther = sum(entry.ether for entry in entries)
+    startingEther = kitchenSinkFixture.chain.head_state.get_balance(tester.a0)
+    with TokenDelta(reputationToken, sum(entry.reputation for entry in entries), tester.a0, "Redeeming the planned batch didn't refund the simulated REP"):
+        redeemBatches(universe, tester.k0, batches, tester.STARTGAS)
+    # Fees are split by the share of the remaining supply so redeeming together can differ from redeeming alone by rounding
+    assert abs(kitchenSinkFixture.chain.head_state.get_balance(tester.a0) - startingEther - expectedEther) <= len(entries)
+
+    # Nothing is left to redeem, and redeeming the same entries again skips them instead of reverting
+    assert planRedemption(kitchenSinkFixture, universe, tester.k0, [market], tester.STARTGAS) == []
+    assert universe.redeemStake(batches[0].getReportingParticipants(), batches[0].getFeeWindows())
+
+def test_planRedemptionWithinGasBudget(kitchenSinkFixture, universe, market):
+    disputeAndFinalize(kitchenSinkFixture, market)
+
+    entries = planRedemption(kitchenSinkFixture, universe, tester.k0, [market], tester.STARTGAS)[0].entries
+    overheadGas = simulateRedemption(kitchenSinkFixture, universe, tester.k0, [], []).gas
+    gasBudget = overheadGas + 2 * max(entry.gas for entry in entries)
+
+    batches = planRedemption(kitchenSinkFixture, universe, tester.k0, [market], gasBudget)
+    assert len(batches) > 1
+    assert sorted(entry.address for batch in batches for entry in batch.entries) == sorted(entry.address for entry in entries)
+    for batch in batches:
+        assert batch.gas <= gasBudget
+
+    redeemBatches(universe, tester.k0, batches, gasBudget)
+    assert planRedemption(kitchenSinkFixture, universe, tester.k0, [market], tester.STARTGAS) == []
+
+def test_redeemStakeSkipsRedeemedEntries(kitchenSinkFixture, universe, market):
+    reputationToken = kitchenSinkFixture.applySignature("ReputationToken", universe.getReputationToken())
+    disputeAndFinalize(kitchenSinkFixture, market)
+    reportingParticipants = [market.getReportingParticipant(i) for i in range(market.getNumParticipants())]
+
+    startingGas = kitchenSinkFixture.chain.head_state.gas_used
+    assert universe.redeemStake(reportingParticipants, [])
+    firstRedemptionGas = kitchenSinkFixture.chain.head_state.gas_used - startingGas
+
+    # Every entry, the initial report included, has already paid out so the second call only does the balance checks
+    startingGas = kitchenSinkFixture.chain.head_state.gas_used
+    with TokenDelta(reputationToken, 0, tester.a0, "Redeeming again refunded REP"):
+        with EtherDelta(0, tester.a0, kitchenSinkFixture.chain, "Redeeming again paid out fees"):
+            assert universe.redeemStake(reportingParticipants, [])
+    secondRedemptionGas = kitchenSinkFixture.chain.head_state.gas_used - startingGas
+    assert secondRedemptionGas < firstRedemptionGas
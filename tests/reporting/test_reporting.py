@@ -182,13 +182,9 @@ def test_roundsOfReporting(rounds, localFixture, market, universe):
     (True, False),
     (False, False),
 ])
-def test_forking(finalizeByMigration, manuallyDisavow, localFixture, universe, cash, market, categoricalMarket, scalarMarket):
-    # Let's go into the one dispute round for the categorical market
-    proceedToNextRound(localFixture, categoricalMarket)
-    proceedToNextRound(localFixture, categoricalMarket)
-
-    # proceed to forking
-    proceedToFork(localFixture, market, universe)
+def test_forking(finalizeByMigration, manuallyDisavow, fixture, forkScenarioSnapshots):
+    # The categorical market went into one dispute round and then the yes/no market was disputed until it forked
+    localFixture, universe, cash, market, categoricalMarket, scalarMarket = branchFromForkScenario(fixture, forkScenarioSnapshots, 'disputedCategoricalForked')
 
     with raises(TransactionFailed):
         universe.fork()
@@ -317,17 +313,9 @@ def test_forking(finalizeByMigration, manuallyDisavow, localFixture, universe, c
 
     assert scalarMarket.finalize()
 
-def test_finalized_fork_migration(localFixture, universe, market, categoricalMarket):
-    # Make the categorical market finalized
-    proceedToNextRound(localFixture, categoricalMarket)
-    feeWindow = localFixture.applySignature('FeeWindow', categoricalMarket.getFeeWindow())
-
-    # Time marches on and the market can be finalized
-    localFixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
-    assert categoricalMarket.finalize()
-
-    # Proceed to Forking for the yesNo market and finalize it
-    proceedToFork(localFixture, market, universe)
+def test_finalized_fork_migration(fixture, forkScenarioSnapshots):
+    # The categorical market was finalized and then the yes/no market was disputed until it forked
+    localFixture, universe, cash, market, categoricalMarket, scalarMarket = branchFromForkScenario(fixture, forkScenarioSnapshots, 'finalizedCategoricalForked')
     finalizeFork(localFixture, market, universe)
 
     # The categorical market is finalized and cannot be migrated to the new universe
@@ -346,11 +334,10 @@ def test_finalized_fork_migration(localFixture, universe, market, categoricalMar
         market.disavowCrowdsourcers()
 
 
-def test_forking_values(localFixture, universe, market, cash):
-    reputationToken = localFixture.applySignature("ReputationToken", universe.getReputationToken())
-
+def test_forking_values(fixture, forkScenarioSnapshots):
     # proceed to forking
-    proceedToFork(localFixture, market, universe)
+    localFixture, universe, cash, market, categoricalMarket, scalarMarket = branchFromForkScenario(fixture, forkScenarioSnapshots, 'forked')
+    reputationToken = localFixture.applySignature("ReputationToken", universe.getReputationToken())
 
     # finalize the fork
     finalizeFork(localFixture, market, universe)
@@ -481,8 +468,8 @@ def test_fee_window_record_keeping(localFixture, universe, cash, market, categor
     assert feeWindow.getNumMarkets() == 3 if localFixture.subFork else 1
     assert feeWindow.getNumDesignatedReportNoShows() == 1
 
-def test_rep_migration_convenience_function(localFixture, universe, market):
-    proceedToFork(localFixture, market, universe)
+def test_rep_migration_convenience_function(fixture, forkScenarioSnapshots):
+    localFixture, universe, cash, market, categoricalMarket, scalarMarket = branchFromForkScenario(fixture, forkScenarioSnapshots, 'forked')
 
     payoutNumerators = [1, market.getNumTicks()-1]
     payoutDistributionHash = market.derivePayoutDistributionHash(payoutNumerators, False)
@@ -504,6 +491,11 @@ def test_rep_migration_convenience_function(localFixture, universe, market):
     bonus = 10 / localFixture.contracts["Constants"].FORK_MIGRATION_PERCENTAGE_BONUS_DIVISOR()
     assert newReputationToken.balanceOf(tester.a0) == 10 + bonus
 
+def branchFromForkScenario(fixture, forkScenarioSnapshots, scenarioName):
+    # Fork scenarios are played out once per run on top of the kitchen sink, see tests/fork_scenarios.py
+    contracts = fixture.branchFromSnapshot(forkScenarioSnapshots[scenarioName])
+    return fixture, contracts['universe'], contracts['cash'], contracts['yesNoMarket'], contracts['categoricalMarket'], contracts['scalarMarket']
+
 @fixture(scope="session")
 def localSnapshot(fixture, kitchenSinkSnapshot):
     fixture.resetToSnapshot(kitchenSinkSnapshot)
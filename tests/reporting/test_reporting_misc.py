@@ -1,6 +1,6 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import TransactionFailed
-from utils import captureFilteredLogs, bytesToHexString, AssertLog
+from utils import bytesToHexString, AssertLog
 from pytest import raises
 from reporting_utils import proceedToNextRound
 
@@ -6,6 +6,7 @@ from ethereum.tools.tester import TransactionFailed
 from pytest import fixture, mark, raises
 from datetime import timedelta
 from utils import bytesToHexString, longToHexString, PrintGasUsed, TokenDelta, EtherDelta
+from dispute_planner import planDisputeRoundsForMarket, submitDisputeRounds
 
 def proceedToDesignatedReporting(fixture, market):
     fixture.contracts["Time"].setTimestamp(market.getEndTime() + 1)
@@ -55,9 +56,13 @@ def proceedToNextRound(fixture, market, contributor = tester.k0, doGenerateFees
         fixture.contracts["Time"].setTimestamp(feeWindow.getStartTime() + 1)
 
 def proceedToFork(fixture, market, universe):
-    while (market.getForkingMarket() == longToHexString(0)):
+    if (market.getFeeWindow() == longToHexString(0)):
         proceedToNextRound(fixture, market)
 
+    # Every remaining round is planned up front and submitted without reading the market back in between
+    submitDisputeRounds(fixture, market, planDisputeRoundsForMarket(fixture, market))
+    assert market.getForkingMarket() == market.address
+
     for i in range(market.getNumParticipants()):
         reportingParticipant = fixture.applySignature("DisputeCrowdsourcer", market.getReportingParticipant(i))
         reportingParticipant.forkAndRedeem()
@@ -148,9 +153,16 @@ def getExpectedFees(fixture, cash, reportingParticipant, expectedRounds):
     feeToken = fixture.applySignature("FeeToken", feeWindow.getFeeToken())
     expectedFees = 0
     rounds = 0
-    while feeToken.balanceOf(reportingParticipant.address) > 0:
+    while True:
+        participantFeeTokens, feeWindowCash, feeTokenSupply = fixture.batchRead([
+            (feeToken, 'balanceOf', [reportingParticipant.address]),
+            (cash, 'balanceOf', [feeWindow.address]),
+            (feeToken, 'totalSupply', []),
+        ])
+        if participantFeeTokens == 0:
+            break
         rounds += 1
-        expectedFees += cash.balanceOf(feeWindow.address) * stake / feeToken.totalSupply()
+        expectedFees += feeWindowCash * stake / feeTokenSupply
         feeWindow = fixture.applySignature("FeeWindow", universe.getOrCreateFeeWindowBefore(feeWindow.address))
         feeToken = fixture.applySignature("FeeToken", feeWindow.getFeeToken())
     assert expectedRounds == rounds, "Had fees from " + str(rounds) + " rounds instead of " + str(expectedRounds)
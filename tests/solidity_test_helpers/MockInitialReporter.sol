@@ -58,6 +58,10 @@ contract MockInitialReporter is IInitialReporter {
         return reportTimestamp;
     }
 
+    function getFeeWindow() public view returns (IFeeWindow) {
+        return IFeeWindow(0);
+    }
+
     function getStake() public view returns (uint256) {
         return 0;
     }
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+from ethereum.tools import tester
+from ethereum.tools.tester import TransactionFailed
+from datetime import timedelta
+from json import dumps
+from pytest import raises
+from augur_indexer import AugurIndexer
+from utils import longTo32Bytes, fix, normalizeAddress
+from constants import BID, ASK, YES, NO
+
+def runScenario(fixture, universe, cash):
+    createOrder = fixture.contracts['CreateOrder']
+    cancelOrder = fixture.contracts['CancelOrder']
+    fillOrder = fixture.contracts['FillOrder']
+    completeSets = fixture.contracts['CompleteSets']
+
+    market = fixture.createReasonableYesNoMarket(universe, cash, description="indexed market")
+    numTicks = market.getNumTicks()
+    assert completeSets.publicBuyCompleteSets(market.address, fix(2), sender = tester.k1, value = fix(2, numTicks))
+    bidID = createOrder.publicCreateOrder(BID, fix(3), 4000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), "42", sender = tester.k1, value = fix(3, 4000))
+    askID = createOrder.publicCreateOrder(ASK, fix(1), 7000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), "42", sender = tester.k2, value = fix(1, 3000))
+    fillOrder.publicFillOrder(bidID, fix(1), "42", sender = tester.k2, value = fix(1, 6000))
+    assert cancelOrder.cancelOrder(askID, sender = tester.k2)
+    return market, bidID, askID
+
+def test_indexer(kitchenSinkFixture, universe, cash):
+    orders = kitchenSinkFixture.contracts['Orders']
+
+    with AugurIndexer(kitchenSinkFixture) as indexer:
+        market, bidID, askID = runScenario(kitchenSinkFixture, universe, cash)
+
+    indexedMarkets = indexer.getMarkets(creator=tester.a0)
+    assert [indexedMarket['market'] for indexedMarket in indexedMarkets] == [normalizeAddress(market.address)]
+    assert indexedMarkets[0]['description'] == "indexed market"
+    assert indexedMarkets[0]['numOutcomes'] == 2
+    assert indexedMarkets[0]['finalized'] == 0
+
+    # The partially filled bid is still open and the canceled ask is not
+    openOrders = indexer.getOpenOrders(creator=tester.a1)
+    assert [order['orderId'] for order in openOrders] == [bidID]
+    assert openOrders[0]['amount'] == orders.getAmount(bidID)
+    assert openOrders[0]['moneyEscrowed'] == orders.getOrderMoneyEscrowed(bidID)
+    assert openOrders[0]['sharesEscrowed'] == orders.getOrderSharesEscrowed(bidID)
+    assert openOrders[0]['market'] == normalizeAddress(market.address)
+    assert indexer.getOpenOrders(creator=tester.a2) == []
+    assert len(indexer.getOpenOrders(shareToken=market.getShareToken(YES), orderType=BID)) == 1
+
+    for outcome in [YES, NO]:
+        shareToken = kitchenSinkFixture.applySignature('ShareToken', market.getShareToken(outcome))
+        for account in [tester.a1, tester.a2, market.address]:
+            assert indexer.getBalance(shareToken.address, account) == shareToken.balanceOf(account)
+
+def test_indexerReplay(kitchenSinkFixture, universe, cash, tmpdir):
+    logPath = str(tmpdir.join('firedEvents'))
+    messages = []
+    kitchenSinkFixture.chain.head_state.log_listeners.append(messages.append)
+    with AugurIndexer(kitchenSinkFixture) as liveIndexer:
+        market, bidID, askID = runScenario(kitchenSinkFixture, universe, cash)
+    kitchenSinkFixture.chain.head_state.log_listeners.remove(messages.append)
+
+    with open(logPath, 'w') as logFile:
+        logFile.write(''.join(dumps(message.to_dict()) + '\n' for message in messages))
+    replayedIndexer = AugurIndexer(kitchenSinkFixture)
+    replayedIndexer.replayLogFile(logPath)
+
+    for query in ["SELECT * FROM markets", "SELECT * FROM orders ORDER BY orderId", "SELECT * FROM balances ORDER BY token, account", "SELECT * FROM feeWindows ORDER BY feeWindow"]:
+        assert replayedIndexer.query(query) == liveIndexer.query(query)
+
+def test_indexerMarketOutcomes(kitchenSinkFixture, universe, cash):
+    with AugurIndexer(kitchenSinkFixture) as indexer:
+        yesNoMarket = kitchenSinkFixture.createReasonableYesNoMarket(universe, cash)
+        categoricalMarket = kitchenSinkFixture.createReasonableCategoricalMarket(universe, 5, cash)
+        scalarMarket = kitchenSinkFixture.createReasonableScalarMarket(universe, 30, -10, 400000, cash)
+
+    numOutcomes = dict((indexedMarket['market'], indexedMarket['numOutcomes']) for indexedMarket in indexer.getMarkets(universe=universe.address))
+    for market in [yesNoMarket, categoricalMarket, scalarMarket]:
+        assert numOutcomes[normalizeAddress(market.address)] == market.getNumberOfOutcomes()
+
+def getGasUsed(fixture, transaction):
+    # Runs the transaction against a snapshot that is rolled back
+    snapshot = fixture.chain.snapshot()
+    startingGas = fixture.chain.head_state.gas_used
+    transaction()
+    gasUsed = fixture.chain.head_state.gas_used - startingGas
+    fixture.chain.revert(snapshot)
+    return gasUsed
+
+def test_indexerIgnoresRevertedTransactions(kitchenSinkFixture, universe, cash, market):
+    createOrder = kitchenSinkFixture.contracts['CreateOrder']
+    orderArgs = [BID, fix(1), 4000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), "42"]
+    marketArgs = [long(kitchenSinkFixture.contracts["Time"].getTimestamp() + timedelta(days=1).total_seconds()), 10**16, cash.address, tester.a0, "", "description", ""]
+    marketCreationFee = universe.getOrCacheMarketCreationCost()
+    createOrderGas = getGasUsed(kitchenSinkFixture, lambda: createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = fix(1, 4000)))
+    createMarketGas = getGasUsed(kitchenSinkFixture, lambda: universe.createYesNoMarket(*marketArgs, value = marketCreationFee))
+
+    # Running out of gas just short of what a transaction costs reverts it after its events have been logged
+    with AugurIndexer(kitchenSinkFixture) as indexer:
+        with raises(TransactionFailed):
+            createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = fix(1, 4000), startgas = createOrderGas - 1)
+        assert indexer.getOpenOrders(creator=tester.a1) == []
+
+        # The market created after a reverted one gets the reverted one's address
+        with raises(TransactionFailed):
+            universe.createYesNoMarket(*marketArgs, value = marketCreationFee, startgas = createMarketGas - 1)
+        assert indexer.getMarkets(creator=tester.a0) == []
+        newMarketAddress = universe.createYesNoMarket(*marketArgs, value = marketCreationFee)
+        orderID = createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = fix(1, 4000))
+
+    assert [order['orderId'] for order in indexer.getOpenOrders(creator=tester.a1)] == [orderID]
+    assert [indexedMarket['market'] for indexedMarket in indexer.getMarkets(creator=tester.a0)] == [normalizeAddress(newMarketAddress)]
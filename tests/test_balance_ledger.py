@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+from ethereum.tools import tester
+from ethereum.tools.tester import TransactionFailed
+from pytest import raises
+from balance_ledger import BalanceLedger
+from utils import fix, TokenDelta
+from constants import YES, NO
+
+def test_ledgerTracksDeltas(kitchenSinkFixture, universe, market, cash):
+    completeSets = kitchenSinkFixture.contracts['CompleteSets']
+    reputationToken = kitchenSinkFixture.applySignature('ReputationToken', universe.getReputationToken())
+    yesShareToken = kitchenSinkFixture.getShareToken(market, YES)
+    noShareToken = kitchenSinkFixture.getShareToken(market, NO)
+    numTicks = market.getNumTicks()
+
+    with BalanceLedger(kitchenSinkFixture) as ledger:
+        with TokenDelta(reputationToken, -fix(10), tester.a0, "Transferring REP didn't deduct REP", ledger=ledger):
+            with TokenDelta(reputationToken, fix(10), tester.a1, "Transferring REP didn't credit REP", ledger=ledger):
+                assert reputationToken.transfer(tester.a1, fix(10))
+
+        with TokenDelta(yesShareToken, fix(3), tester.a1, "Buying complete sets didn't mint shares", ledger=ledger):
+            assert completeSets.publicBuyCompleteSets(market.address, fix(3), sender = tester.k1, value = fix(3, numTicks))
+        with TokenDelta(noShareToken, -fix(1), tester.a1, "Selling complete sets didn't burn shares", ledger=ledger):
+            assert completeSets.publicSellCompleteSets(market.address, fix(1), sender = tester.k1)
+
+        # A transaction that reverts leaves no receipt logs behind, so nothing is replayed for it
+        with raises(TransactionFailed):
+            reputationToken.transfer(tester.a2, reputationToken.balanceOf(tester.a1) + 1, sender = tester.k1)
+        assert ledger.getDelta(reputationToken.address, tester.a2) == 0
+
+        assert ledger.getDelta(yesShareToken.address, tester.a1) == fix(2)
+        assert ledger.getBalance(reputationToken.address, tester.a1) == reputationToken.balanceOf(tester.a1)
+        assert ledger.getBalance(noShareToken.address, tester.a1) == noShareToken.balanceOf(tester.a1)
+
+def test_ledgerCrossCheck(kitchenSinkFixture, universe):
+    reputationToken = kitchenSinkFixture.applySignature('ReputationToken', universe.getReputationToken())
+
+    # A balance the ledger believes in that the chain doesn't have is reported when the ledger exits
+    with raises(AssertionError):
+        with BalanceLedger(kitchenSinkFixture) as ledger:
+            assert reputationToken.transfer(tester.a1, fix(5))
+            ledger.assertMatchesChain()
+            ledger.addToDelta(reputationToken.address, tester.a1, 1)
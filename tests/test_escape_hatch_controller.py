@@ -1,6 +1,6 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import TransactionFailed
-from utils import captureFilteredLogs, bytesToHexString, AssertLog, TokenDelta
+from utils import bytesToHexString, AssertLog, TokenDelta
 from pytest import raises, fixture
 
 def test_escape_hatch_controller(contractsFixture, universe, controller):
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+
+from utils import longToHexString
+from fork_scenarios import FORK_SCENARIOS
+
+def test_forkScenarios(fixture, forkScenarioSnapshots):
+    assert sorted(forkScenarioSnapshots) == sorted(FORK_SCENARIOS)
+    for scenarioName in FORK_SCENARIOS:
+        contracts = fixture.branchFromSnapshot(forkScenarioSnapshots[scenarioName])
+        assert contracts['universe'].getForkingMarket() == contracts['yesNoMarket'].address, "%s did not fork on the yes/no market" % scenarioName
+
+def test_forkScenarioBranchesAreIsolated(fixture, forkScenarioSnapshots):
+    contracts = fixture.branchFromSnapshot(forkScenarioSnapshots['forked'])
+    market = contracts['yesNoMarket']
+    payoutNumerators = [market.getNumTicks() / 2, market.getNumTicks() / 2]
+    payoutDistributionHash = market.derivePayoutDistributionHash(payoutNumerators, False)
+    assert contracts['universe'].createChildUniverse(payoutNumerators, False)
+    assert contracts['universe'].getChildUniverse(payoutDistributionHash) != longToHexString(0)
+
+    # The next branch starts from the cached world again
+    contracts = fixture.branchFromSnapshot(forkScenarioSnapshots['forked'])
+    assert contracts['universe'].getChildUniverse(payoutDistributionHash) == longToHexString(0)
@@ -1,40 +1,22 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import ABIContract, TransactionFailed
 from pytest import fixture, mark, raises
-from utils import longTo32Bytes, PrintGasUsed, fix
+from utils import longTo32Bytes, GasBenchmark, fix
 from constants import BID, ASK, YES, NO
 from datetime import timedelta
+from time import time
 from trading.test_claimTradingProceeds import acquireLongShares, finalizeMarket
+from order_book_mirror import OrderBookMirror
 from reporting_utils import proceedToNextRound, proceedToFork, finalizeFork, proceedToDesignatedReporting
 
-# Market Methods
-MARKET_CREATION =               1758793
-MARKET_FINALIZATION =           256677
-INITIAL_REPORT =                1061824
-FIRST_CONTRIBUTE =              812826
-FIRST_COMPLETED_CONTRIBUTE =    328081
-LAST_COMPLETED_CONTRIBUTE =     3407216
-FORKING_CONTRIBUTE =            980020
-
-# Redemption
-REPORTING_WINDOW_CREATE =           383330
-INITIAL_REPORT_REDEMPTION =         581468
-CROWDSOURCER_REDEMPTION =           418563
-PARTICIPATION_TOKEN_REDEMPTION =    115984
-
-# Trading
-CREATE_ORDER =      591818
-FILL_ORDER =        835790
-CLAIM_PROCEEDS =    1230099
-
-pytestmark = mark.skip(reason="Just for testing gas cost")
+pytestmark = mark.gasBenchmark
 
 tester.STARTGAS = long(6.7 * 10**6)
 
 def test_feeWindowCreation(localFixture, universe, cash):
     endTime = long(localFixture.chain.head_state.timestamp + timedelta(days=365).total_seconds())
 
-    with PrintGasUsed(localFixture, "REPORTING_WINDOW_CREATE", REPORTING_WINDOW_CREATE):
+    with GasBenchmark(localFixture, "Universe:getOrCreateFeeWindowByTimestamp"):
         universe.getOrCreateFeeWindowByTimestamp(endTime)
 
 def test_marketCreation(localFixture, universe, cash):
@@ -47,7 +29,7 @@ def test_marketCreation(localFixture, universe, cash):
     numTicks = 10 ** 18
     numOutcomes = 2
 
-    with PrintGasUsed(localFixture, "FeeWindow:createMarket", MARKET_CREATION):
+    with GasBenchmark(localFixture, "Universe:createYesNoMarket"):
         marketAddress = universe.createYesNoMarket(endTime, feePerEthInWei, denominationToken.address, designatedReporterAddress, "", "description", "", value = marketCreationFee)
 
 def test_marketFinalization(localFixture, universe, market):
@@ -56,7 +38,7 @@ def test_marketFinalization(localFixture, universe, market):
     feeWindow = localFixture.applySignature('FeeWindow', market.getFeeWindow())
     localFixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
 
-    with PrintGasUsed(localFixture, "Market:finalize", MARKET_FINALIZATION):
+    with GasBenchmark(localFixture, "Market:finalize"):
         assert market.finalize()
 
 @mark.parametrize('hints', [
@@ -66,20 +48,22 @@ def test_marketFinalization(localFixture, universe, market):
 def test_orderCreation(hints, localFixture, categoricalMarket):
     createOrder = localFixture.contracts['CreateOrder']
 
-    for i in range(3900, 4003):
-        createOrder.publicCreateOrder(BID, fix(1), i, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, i))
+    with OrderBookMirror(localFixture) as mirror:
+        for i in range(3900, 4003):
+            createOrder.publicCreateOrder(BID, fix(1), i, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, i))
 
-    worseOrderId = createOrder.publicCreateOrder(BID, fix(1), 4004, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4004))
-    betterOrderId = createOrder.publicCreateOrder(BID, fix(1), 4006, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4006))
+        worseOrderId = createOrder.publicCreateOrder(BID, fix(1), 4004, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4004))
+        betterOrderId = createOrder.publicCreateOrder(BID, fix(1), 4006, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4006))
 
-    for i in range(4007, 4107):
-        createOrder.publicCreateOrder(BID, fix(1), i, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, i))
+        for i in range(4007, 4107):
+            createOrder.publicCreateOrder(BID, fix(1), i, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, i))
 
     if not hints:
-        with PrintGasUsed(localFixture, "CreateOrder:publicCreateOrder NO Hints", CREATE_ORDER):
+        with GasBenchmark(localFixture, "CreateOrder:publicCreateOrder:noHints"):
             orderID = createOrder.publicCreateOrder(BID, fix(1), 4005, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4005))
     else:
-        with PrintGasUsed(localFixture, "CreateOrder:publicCreateOrder HINTS", CREATE_ORDER):
+        assert mirror.getBoundingOrders(BID, 4005, categoricalMarket, 1) == (betterOrderId, worseOrderId)
+        with GasBenchmark(localFixture, "CreateOrder:publicCreateOrder:hints"):
             orderID = createOrder.publicCreateOrder(BID, fix(1), 4005, categoricalMarket.address, 1, betterOrderId, worseOrderId, "7", value = fix(1, 4005))
 
 def test_orderFilling(localFixture, market):
@@ -93,40 +77,62 @@ def test_orderFilling(localFixture, market):
     # create order
     orderID = createOrder.publicCreateOrder(ASK, fix(2), 6000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=creatorCost)
 
-    with PrintGasUsed(localFixture, "FillOrder:publicFillOrder", FILL_ORDER):
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder"):
         fillOrderID = fillOrder.publicFillOrder(orderID, fix(2), tradeGroupID, sender = tester.k2, value=fillerCost)
 
+@mark.parametrize('numOrders', [
+    3,
+    100
+])
+def test_orderBookReads(numOrders, localFixture, market):
+    createOrder = localFixture.contracts['CreateOrder']
+    ordersFinder = localFixture.contracts['OrdersFinder']
+
+    for i in range(numOrders):
+        createOrder.publicCreateOrder(BID, fix(1), 1000 + i, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 1000 + i))
+
+    # The fixed size reads encode the whole array no matter how many orders there are, the paged reads only encode what they found
+    for name, read in [
+        ("getExistingOrders1000", lambda: ordersFinder.getExistingOrders1000(BID, market.address, YES)),
+        ("getOrders", lambda: ordersFinder.getOrders(BID, market.address, YES, longTo32Bytes(0), 100)),
+        ("getOrdersWithDetails", lambda: ordersFinder.getOrdersWithDetails(BID, market.address, YES, longTo32Bytes(0), 100)),
+        ("getOrderBook", lambda: ordersFinder.getOrderBook(market.address))]:
+        startTime = time()
+        with GasBenchmark(localFixture, "OrdersFinder:%s:%iOrders" % (name, numOrders)):
+            read()
+        print "%s with %i orders took %.3fs" % (name, numOrders, time() - startTime)
+
 def test_winningShareRedmption(localFixture, cash, market):
     claimTradingProceeds = localFixture.contracts['ClaimTradingProceeds']
 
     acquireLongShares(localFixture, cash, market, YES, 1, claimTradingProceeds.address, sender = tester.k1)
     finalizeMarket(localFixture, market, [0,market.getNumTicks()])
 
-    with PrintGasUsed(localFixture, "ClaimTradingProceeds:claimTradingProceeds", CLAIM_PROCEEDS):
+    with GasBenchmark(localFixture, "ClaimTradingProceeds:claimTradingProceeds"):
         claimTradingProceeds.claimTradingProceeds(market.address, tester.a1)
 
 def test_initial_report(localFixture, universe, cash, market):
     proceedToDesignatedReporting(localFixture, market)
 
-    with PrintGasUsed(localFixture, "Market:doInitialReport", INITIAL_REPORT):
+    with GasBenchmark(localFixture, "Market:doInitialReport"):
         market.doInitialReport([0, market.getNumTicks()], False)
 
 def test_contribute(localFixture, universe, cash, market):
     proceedToNextRound(localFixture, market)
 
-    with PrintGasUsed(localFixture, "Market.contribute", FIRST_CONTRIBUTE):
+    with GasBenchmark(localFixture, "Market:contribute:first"):
         market.contribute([0, market.getNumTicks()], False, 1)
 
-    with PrintGasUsed(localFixture, "Market.contribute", FIRST_COMPLETED_CONTRIBUTE):
+    with GasBenchmark(localFixture, "Market:contribute:firstCompleted"):
         market.contribute([0, market.getNumTicks()], False, market.getParticipantStake())
 
     for i in range(9):
         proceedToNextRound(localFixture, market, randomPayoutNumerators = True)
 
-    with PrintGasUsed(localFixture, "Market.contribute", LAST_COMPLETED_CONTRIBUTE):
+    with GasBenchmark(localFixture, "Market:contribute:lastCompleted"):
         proceedToNextRound(localFixture, market, randomPayoutNumerators = True)
 
-    with PrintGasUsed(localFixture, "Market.contribute", FORKING_CONTRIBUTE):
+    with GasBenchmark(localFixture, "Market:contribute:forking"):
         market.contribute([market.getNumTicks() / 2, market.getNumTicks() / 2], False, market.getParticipantStake())
 
 def test_redeem(localFixture, universe, cash, market):
@@ -146,13 +152,13 @@ def test_redeem(localFixture, universe, cash, market):
     localFixture.contracts["Time"].setTimestamp(feeWindow.getEndTime() + 1)
     assert market.finalize()
 
-    with PrintGasUsed(localFixture, "InitialReporter:redeem", INITIAL_REPORT_REDEMPTION):
+    with GasBenchmark(localFixture, "InitialReporter:redeem"):
         initialReporter.redeem(tester.a0)
 
-    with PrintGasUsed(localFixture, "DisputeCrowdsourcer:redeem", CROWDSOURCER_REDEMPTION):
+    with GasBenchmark(localFixture, "DisputeCrowdsourcer:redeem"):
         winningDisputeCrowdsourcer1.redeem(tester.a0)
 
-    with PrintGasUsed(localFixture, "FeeWindow:redeem", PARTICIPATION_TOKEN_REDEMPTION):
+    with GasBenchmark(localFixture, "FeeWindow:redeem"):
         feeWindow.redeem(tester.a0)
 
 
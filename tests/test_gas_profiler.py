@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+
+from gas_profiler import GasProfiler, decompressSourceMap, getInstructionIndexes
+
+def test_decompressSourceMap():
+    assert decompressSourceMap("1:2:0:-;:3;5::1;;") == [(1, 2, 0), (1, 3, 0), (5, 3, 1), (5, 3, 1), (5, 3, 1)]
+    assert decompressSourceMap("") == []
+
+def test_getInstructionIndexes():
+    # PUSH2 0x0102, PUSH1 0x03, ADD
+    assert getInstructionIndexes('\x61\x01\x02\x60\x03\x01') == { 0: 0, 3: 1, 5: 2 }
+
+def test_profileDeposit(kitchenSinkFixture, cash):
+    with GasProfiler(kitchenSinkFixture) as profiler:
+        assert cash.depositEther(value=100)
+
+    collapsedStacks = profiler.getCollapsedStacks()
+    assert any('Cash.depositEther;SSTORE ' in stack for stack in collapsedStacks)
+    assert profiler.opcodeClassGas['SSTORE'] > 0
+    assert profiler.opcodeClassGas['LOG'] > 0
+    assert any(sourceLine.startswith(kitchenSinkFixture.resolveUploadPath('../source/contracts/trading/Cash.sol')) for sourceLine in profiler.sourceLineGas)
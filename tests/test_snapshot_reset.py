@@ -0,0 +1,57 @@
+from ethereum.tools import tester
+from utils import fix, longTo32Bytes
+from constants import BID
+
+def test_resetToSnapshotIsolatesBase(fixture, baseSnapshot):
+    fixture.resetToSnapshot(baseSnapshot)
+    baseDb = baseSnapshot['copyOnWriteBase']['db']
+    baseEntries = dict(baseDb.kv)
+    startingBalance = fixture.chain.head_state.get_balance(tester.a1)
+    startingBlockNumber = fixture.chain.head_state.block_number
+
+    # Mining commits the state, which must stay in the overlay rather than reach the snapshot's base
+    fixture.chain.tx(sender=tester.k0, to=tester.a1, value=10**18)
+    fixture.chain.mine()
+    assert fixture.chain.head_state.get_balance(tester.a1) == startingBalance + 10**18
+    assert fixture.chain.head_state.block_number == startingBlockNumber + 1
+    assert baseDb.kv == baseEntries
+
+    fixture.resetToSnapshot(baseSnapshot)
+    assert fixture.chain.head_state.get_balance(tester.a1) == startingBalance
+    assert fixture.chain.head_state.block_number == startingBlockNumber
+
+    # A second round of changes starts from the original state again
+    fixture.chain.tx(sender=tester.k0, to=tester.a1, value=2 * 10**18)
+    fixture.chain.mine(2)
+    assert fixture.chain.head_state.get_balance(tester.a1) == startingBalance + 2 * 10**18
+    assert baseDb.kv == baseEntries
+
+    fixture.resetToSnapshot(baseSnapshot)
+    assert fixture.chain.head_state.get_balance(tester.a1) == startingBalance
+    assert fixture.chain.head_state.block_number == startingBlockNumber
+
+def test_redeployChangedContracts(fixture, kitchenSinkSnapshot):
+    market = fixture.branchFromSnapshot(kitchenSinkSnapshot)['yesNoMarket']
+    controller = fixture.contracts['Controller']
+    oldCreateOrderAddress = fixture.contracts['CreateOrder'].address
+
+    # Pretend CreateOrder was compiled from different source so it is the only contract that gets redeployed
+    fixture.deployments['CreateOrder'] = dict(fixture.deployments['CreateOrder'], bytecodeHash = '0' * 64)
+    assert fixture.redeployChangedContracts()
+
+    createOrder = fixture.contracts['CreateOrder']
+    assert createOrder.address != oldCreateOrderAddress
+    assert controller.lookup('CreateOrder'.ljust(32, '\x00')) == createOrder.address
+    assert controller.assertIsWhitelisted(createOrder.address)
+    assert createOrder.getController() == controller.address
+    assert fixture.deployments['CreateOrder']['bytecodeHash'] != '0' * 64
+
+    # The rest of the world picks up the new contract through the Controller
+    orders = fixture.contracts['Orders']
+    orderId = createOrder.publicCreateOrder(BID, fix(1), 4000, market.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4000))
+    assert orders.getAmount(orderId) == fix(1)
+    assert orders.getBestOrderId(BID, market.address, 1) == orderId
+
+    # Nothing else changed, so a second pass has nothing to do
+    assert fixture.redeployChangedContracts()
+    assert fixture.contracts['CreateOrder'].address == createOrder.address
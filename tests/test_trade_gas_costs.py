@@ -1,95 +1,13 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import ABIContract, TransactionFailed
 from pytest import fixture, mark, raises
-from utils import longTo32Bytes, PrintGasUsed, fix
-from constants import BID, ASK, YES, NO
+from utils import longTo32Bytes, GasBenchmark, fix
+from constants import BID, ASK, YES, NO, SHORT
 from datetime import timedelta
 from trading.test_claimTradingProceeds import acquireLongShares, finalizeMarket
 from reporting_utils import proceedToNextRound, proceedToFork, finalizeFork, proceedToDesignatedReporting
 
-pytestmark = mark.skip(reason="Just for testing gas cost")
-
-# Trading Max Costs
-
-CREATE_ORDER_BEST_CASE    =   [
-    547694,
-    562138,
-    576582,
-    591026,
-    605470,
-    619914,
-    634358,
-]
-
-CREATE_ORDER_MAXES    =   [
-    695034,
-    794664,
-    894294,
-    993924,
-    1093554,
-    1193184,
-    1292814,
-]
-
-CANCEL_ORDER_MAXES    =   [
-    289826,
-    379095,
-    468364,
-    557633,
-    646902,
-    736171,
-    825440,
-]
-
-FILL_ORDER_TAKE_SHARES   =   [
-    464780,
-    479514,
-    494248,
-    508981,
-    523715,
-    538449,
-    553183,
-]
-
-FILL_ORDER_BOTH_ETH    =   [
-    839050,
-    1029970,
-    1220890,
-    1411809,
-    1602729,
-    1793649,
-    1984569,
-]
-
-FILL_ORDER_MAKER_REVERSE_POSITION    =   [
-    933495,
-    1172245,
-    1410995,
-    1649744,
-    1888494,
-    2127244,
-    2365994,
-]
-
-FILL_ORDER_TAKER_REVERSE_POSITION    =   [
-    939239,
-    1115159,
-    1291079,
-    1466998,
-    1642918,
-    1818838,
-    1994758,
-]
-
-FILL_ORDER_DOUBLE_REVERSE_POSITION    =   [
-    2134777,
-    2455117,
-    2775457,
-    3095796,
-    3416136,
-    3736476,
-    4056816,
-]
+pytestmark = mark.gasBenchmark
 
 tester.STARTGAS = long(6.7 * 10**6)
 
@@ -100,16 +18,12 @@ def test_order_creation_best_case(numOutcomes, localFixture, markets):
     marketIndex = numOutcomes - 2
     market = markets[marketIndex]
 
-    maxGas = 0
     cost = fix('1', '5000')
 
     outcome = 0
 
-    startGas = localFixture.chain.head_state.gas_used
-    orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == CREATE_ORDER_BEST_CASE[marketIndex]
+    with GasBenchmark(localFixture, "CreateOrder:publicCreateOrder:bestCase:%iOutcomes" % numOutcomes):
+        orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_orderCreationMax(numOutcomes, localFixture, markets):
@@ -118,7 +32,6 @@ def test_orderCreationMax(numOutcomes, localFixture, markets):
     marketIndex = numOutcomes - 2
     market = markets[marketIndex]
 
-    maxGas = 0
     cost = fix('1', '5000')
 
     assert completeSets.publicBuyCompleteSets(market.address, 100, value=1000000)
@@ -126,11 +39,8 @@ def test_orderCreationMax(numOutcomes, localFixture, markets):
     shareToken = localFixture.applySignature('ShareToken', market.getShareToken(outcome))
     shareToken.transfer(tester.a7, 100)
 
-    startGas = localFixture.chain.head_state.gas_used
-    orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == CREATE_ORDER_MAXES[marketIndex]
+    with GasBenchmark(localFixture, "CreateOrder:publicCreateOrder:max:%iOutcomes" % numOutcomes):
+        orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_orderCancelationMax(numOutcomes, localFixture, markets):
@@ -147,11 +57,69 @@ def test_orderCancelationMax(numOutcomes, localFixture, markets):
 
     orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
-    startGas = localFixture.chain.head_state.gas_used
-    cancelOrder.cancelOrder(orderID)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
+    with GasBenchmark(localFixture, "CancelOrder:cancelOrder:max:%iOutcomes" % numOutcomes):
+        cancelOrder.cancelOrder(orderID)
 
-    assert maxGas == CANCEL_ORDER_MAXES[marketIndex]
+BATCH_SIZES = range(1, 51)
+
+def test_batchOrderCreationAndCancelation(localFixture, markets):
+    createOrder = localFixture.contracts['CreateOrder']
+    cancelOrder = localFixture.contracts['CancelOrder']
+    market = markets[1]
+    numOutcomes = market.getNumberOfOutcomes()
+    nullOrderId = longTo32Bytes(0)
+    createCosts = {}
+    cancelCosts = {}
+
+    for batchSize in BATCH_SIZES:
+        snapshot = localFixture.chain.snapshot()
+        # Every bid is better than the ones before it on its outcome so each order takes the best case path through the book
+        outcomes = [i % numOutcomes for i in range(batchSize)]
+        prices = [1000 + i for i in range(batchSize)]
+        value = sum(fix(1, price) for price in prices)
+        # Large batches go over the mainnet block gas limit, they are measured anyway to show the per order cost settling
+        with GasBenchmark(localFixture, "CreateOrder:publicCreateOrders:%iOrders" % batchSize) as benchmark:
+            orderIDs = createOrder.publicCreateOrders(market.address, outcomes, [BID] * batchSize, [fix(1)] * batchSize, prices, [nullOrderId] * batchSize, [nullOrderId] * batchSize, "7", value = value, startgas = long(6.7 * 10**7))
+        createCosts[batchSize] = benchmark.gasUsed
+        with GasBenchmark(localFixture, "CancelOrder:cancelOrders:%iOrders" % batchSize) as benchmark:
+            cancelOrder.cancelOrders(orderIDs, startgas = long(6.7 * 10**7))
+        cancelCosts[batchSize] = benchmark.gasUsed
+        localFixture.chain.revert(snapshot)
+
+    # The first order pays for the transaction and the checks done once per batch, every order after it only adds its marginal cost over the batch one smaller
+    for batchSize in BATCH_SIZES[1:]:
+        print "BATCH OF %i: CREATE %i PER ORDER, %i MARGINAL. CANCEL %i PER ORDER, %i MARGINAL" % (batchSize,
+            createCosts[batchSize] / batchSize, createCosts[batchSize] - createCosts[batchSize - 1],
+            cancelCosts[batchSize] / batchSize, cancelCosts[batchSize] - cancelCosts[batchSize - 1])
+    assert createCosts[BATCH_SIZES[-1]] / BATCH_SIZES[-1] < createCosts[1]
+    assert cancelCosts[BATCH_SIZES[-1]] / BATCH_SIZES[-1] < cancelCosts[1]
+
+def test_resumableFillOfDeepBook(localFixture, markets):
+    createOrder = localFixture.contracts['CreateOrder']
+    trade = localFixture.contracts['Trade']
+    market = markets[0]
+    totalCosts = {}
+
+    for depth in [10, 20, 40]:
+        snapshot = localFixture.chain.snapshot()
+        for i in range(depth):
+            createOrder.publicCreateOrder(BID, fix(1), 6000 + i, market.address, 0, longTo32Bytes(0), longTo32Bytes(0), "7", sender = tester.k1, value = fix(1, 6000 + i))
+
+        # Each call is capped well below what the whole book needs and the next one carries on with what is left
+        remaining = fix(depth)
+        calls = 0
+        with GasBenchmark(localFixture, "Trade:publicFillBestOrderResumable:%iOrders" % depth) as benchmark:
+            while remaining > 0:
+                remaining, nextOrderID = trade.publicFillBestOrderResumable(SHORT, market.address, 0, remaining, 6000, "7", sender = tester.k2, value = remaining * 4000, startgas = long(6.7 * 10**6))
+                calls += 1
+                assert remaining == 0 or nextOrderID != longTo32Bytes(0)
+        totalCosts[depth] = benchmark.gasUsed
+        print "RESUMABLE FILL OF %i ORDERS: %i CALLS, %i GAS, %i PER ORDER" % (depth, calls, benchmark.gasUsed, benchmark.gasUsed / depth)
+        localFixture.chain.revert(snapshot)
+
+    # Every call starts at the best order and filled orders have left the book, so the total grows linearly with its depth
+    perOrderCosts = [totalCosts[depth] / depth for depth in sorted(totalCosts)]
+    assert max(perOrderCosts) < min(perOrderCosts) * 1.1
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_order_filling_take_shares(numOutcomes, localFixture, markets):
@@ -168,11 +136,8 @@ def test_order_filling_take_shares(numOutcomes, localFixture, markets):
     outcome = 0
     orderID = createOrder.publicCreateOrder(ASK, 100, 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = cost)
 
-    startGas = localFixture.chain.head_state.gas_used
-    fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == FILL_ORDER_TAKE_SHARES[marketIndex]
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder:takeShares:%iOutcomes" % numOutcomes):
+        fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_order_filling_both_eth(numOutcomes, localFixture, markets):
@@ -188,11 +153,8 @@ def test_order_filling_both_eth(numOutcomes, localFixture, markets):
     outcome = 0
     orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
-    startGas = localFixture.chain.head_state.gas_used
-    fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == FILL_ORDER_BOTH_ETH[marketIndex]
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder:bothEth:%iOutcomes" % numOutcomes):
+        fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_order_filling_maker_reverse(numOutcomes, localFixture, markets):
@@ -211,11 +173,8 @@ def test_order_filling_maker_reverse(numOutcomes, localFixture, markets):
     shareToken.transfer(tester.a2, 100)
     orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
-    startGas = localFixture.chain.head_state.gas_used
-    fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == FILL_ORDER_MAKER_REVERSE_POSITION[marketIndex]
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder:makerReversePosition:%iOutcomes" % numOutcomes):
+        fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_order_filling_taker_reverse(numOutcomes, localFixture, markets):
@@ -234,11 +193,8 @@ def test_order_filling_taker_reverse(numOutcomes, localFixture, markets):
     shareToken.transfer(tester.a1, 100, sender = tester.k2)
     orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
-    startGas = localFixture.chain.head_state.gas_used
-    fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == FILL_ORDER_TAKER_REVERSE_POSITION[marketIndex]
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder:takerReversePosition:%iOutcomes" % numOutcomes):
+        fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
 
 @mark.parametrize('numOutcomes', range(2,9))
 def test_order_filling_double_reverse(numOutcomes, localFixture, markets):
@@ -257,11 +213,8 @@ def test_order_filling_double_reverse(numOutcomes, localFixture, markets):
     shareToken.transfer(tester.a1, 100)
     orderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, outcome, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 5000))
 
-    startGas = localFixture.chain.head_state.gas_used
-    fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
-    maxGas = localFixture.chain.head_state.gas_used - startGas
-
-    assert maxGas == FILL_ORDER_DOUBLE_REVERSE_POSITION[marketIndex]
+    with GasBenchmark(localFixture, "FillOrder:publicFillOrder:doubleReversePosition:%iOutcomes" % numOutcomes):
+        fillOrder.publicFillOrder(orderID, fix(1), tradeGroupID, sender = tester.k1, value=cost)
 
 
 @fixture(scope="session")
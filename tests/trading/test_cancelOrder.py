@@ -3,7 +3,7 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import TransactionFailed
 from pytest import raises, mark
-from utils import longTo32Bytes, longToHexString, fix, AssertLog, bytesToHexString
+from utils import longTo32Bytes, longToHexString, fix, AssertLog, bytesToHexString, EtherDelta
 from constants import BID, ASK, YES, NO
 
 tester.STARTGAS = long(6.7 * 10**6)
@@ -247,3 +247,31 @@ def test_exceptions(contractsFixture, cash, market):
     assert(cancelOrder.cancelOrder(orderID, sender=tester.k1) == 1), "cancelOrder should succeed"
     with raises(TransactionFailed):
         cancelOrder.cancelOrder(orderID, sender=tester.k1)
+
+def test_cancelOrders(contractsFixture, cash, market):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    cancelOrder = contractsFixture.contracts['CancelOrder']
+    orders = contractsFixture.contracts['Orders']
+    tradeGroupID = "42"
+
+    bidID = createOrder.publicCreateOrder(BID, fix(1), 6000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k1, value=fix(1, 6000))
+    askID = createOrder.publicCreateOrder(ASK, fix(2), 7000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k1, value=fix(2, 3000))
+    otherID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, NO, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k2, value=fix(1, 5000))
+    marketInitialCash = cash.balanceOf(market.address)
+
+    # The batch is all or nothing, so including an order owned by someone else cancels none of them
+    with raises(TransactionFailed):
+        cancelOrder.cancelOrders([bidID, askID, otherID], sender=tester.k1)
+    assert orders.getAmount(bidID) == fix(1)
+
+    with raises(TransactionFailed):
+        cancelOrder.cancelOrders([bidID, bidID], sender=tester.k1)
+
+    with EtherDelta(fix(1, 6000) + fix(2, 3000), tester.a1, contractsFixture.chain):
+        assert cancelOrder.cancelOrders([bidID, askID], sender=tester.k1)
+
+    assert orders.getAmount(bidID) == 0
+    assert orders.getAmount(askID) == 0
+    assert orders.getAmount(otherID) == fix(1)
+    assert cash.balanceOf(market.address) == marketInitialCash - fix(1, 6000) - fix(2, 3000)
+    assert cancelOrder.cancelOrders([], sender=tester.k1)
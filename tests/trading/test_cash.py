@@ -112,3 +112,16 @@ def test_transferFrom_failures(contractsFixture, cash):
 def test_setController_failure(contractsFixture, cash):
     with raises(TransactionFailed):
         cash.setController(tester.a1, sender = tester.k1)
+
+def test_batchRead(contractsFixture, cash):
+    cash.depositEther(value = 7)
+    balance = cash.balanceOf(tester.a0)
+
+    assert contractsFixture.batchRead([(cash, 'balanceOf', [tester.a0]), (cash, 'totalSupply', []), (cash, 'name', [])]) == [balance, cash.totalSupply(), cash.name()]
+
+    # Every read sees the same state and nothing is committed
+    assert contractsFixture.batchRead([(cash, 'withdrawEther', [5]), (cash, 'balanceOf', [tester.a0])]) == [True, balance]
+    assert cash.balanceOf(tester.a0) == balance
+
+    with raises(TransactionFailed):
+        contractsFixture.batchRead([(cash, 'withdrawEther', [balance + 1])])
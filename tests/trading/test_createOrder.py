@@ -196,3 +196,49 @@ def test_duplicate_creation_transaction(contractsFixture, cash, market):
 
     with raises(TransactionFailed):
         createOrder.publicCreateOrder(BID, fix(1), 4000, market.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 4000))
+
+def test_publicCreateOrders(contractsFixture, cash, categoricalMarket):
+    orders = contractsFixture.contracts['Orders']
+    createOrder = contractsFixture.contracts['CreateOrder']
+    nullOrderId = longTo32Bytes(0)
+
+    outcomes = [0, 1, 2, 2]
+    types = [BID, ASK, BID, BID]
+    amounts = [fix(1), fix(2), fix(3), fix(4)]
+    prices = [4000, 6000, 3000, 3500]
+    cost = fix(1, 4000) + fix(2, 4000) + fix(3, 3000) + fix(4, 3500)
+
+    with EtherDelta(-cost, tester.a1, contractsFixture.chain):
+        orderIDs = createOrder.publicCreateOrders(categoricalMarket.address, outcomes, types, amounts, prices, [nullOrderId] * 4, [nullOrderId] * 4, "7", sender = tester.k1, value = cost)
+
+    assert len(orderIDs) == 4
+    for orderID, outcome, orderType, amount, price in zip(orderIDs, outcomes, types, amounts, prices):
+        assert orders.getOutcome(orderID) == outcome
+        assert orders.getOrderType(orderID) == orderType
+        assert orders.getAmount(orderID) == amount
+        assert orders.getPrice(orderID) == price
+        assert orders.getOrderCreator(orderID) == bytesToHexString(tester.a1)
+
+    # Orders later in the batch are placed relative to the ones before them
+    assert orders.getBestOrderId(BID, categoricalMarket.address, 2) == orderIDs[3]
+    assert orders.getWorseOrderId(orderIDs[3]) == orderIDs[2]
+
+def test_publicCreateOrders_failure(contractsFixture, cash, categoricalMarket):
+    orders = contractsFixture.contracts['Orders']
+    createOrder = contractsFixture.contracts['CreateOrder']
+    nullOrderId = longTo32Bytes(0)
+
+    # Arrays of different lengths
+    with raises(TransactionFailed):
+        createOrder.publicCreateOrders(categoricalMarket.address, [0, 1], [BID], [fix(1), fix(1)], [4000, 4000], [nullOrderId] * 2, [nullOrderId] * 2, "7", value = fix(2, 4000))
+
+    # One bad order reverts the whole batch
+    with raises(TransactionFailed):
+        createOrder.publicCreateOrders(categoricalMarket.address, [0, 5], [BID, BID], [fix(1), fix(1)], [4000, 4000], [nullOrderId] * 2, [nullOrderId] * 2, "7", value = fix(2, 4000))
+    assert orders.getBestOrderId(BID, categoricalMarket.address, 0) == nullOrderId
+
+    # As do two identical orders since they get the same ID
+    with raises(TransactionFailed):
+        createOrder.publicCreateOrders(categoricalMarket.address, [0, 0], [BID, BID], [fix(1), fix(1)], [4000, 4000], [nullOrderId] * 2, [nullOrderId] * 2, "7", value = fix(2, 4000))
+
+    assert createOrder.publicCreateOrders(categoricalMarket.address, [], [], [], [], [], [], "7") == []
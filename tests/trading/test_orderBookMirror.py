@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+from ethereum.tools import tester
+from ethereum.tools.tester import TransactionFailed
+from pytest import raises
+from random import Random
+from utils import longTo32Bytes, fix
+from constants import BID, ASK, YES
+from order_book_mirror import OrderBookMirror
+
+def getOnChainOrderIds(orders, orderType, market, outcome):
+    orderIds = []
+    orderId = orders.getBestOrderId(orderType, market.address, outcome)
+    while orderId != longTo32Bytes(0):
+        orderIds.append(orderId)
+        orderId = orders.getWorseOrderId(orderId)
+    return orderIds
+
+def assertHintsAreAdjacent(orders, orderType, market, outcome, betterOrderId, worseOrderId):
+    # Adjacent hints are returned by findBoundingOrders as they are, without walking the list
+    if betterOrderId == longTo32Bytes(0):
+        assert worseOrderId == orders.getBestOrderId(orderType, market.address, outcome)
+    elif worseOrderId == longTo32Bytes(0):
+        assert betterOrderId == orders.getWorstOrderId(orderType, market.address, outcome)
+    else:
+        assert orders.getWorseOrderId(betterOrderId) == worseOrderId
+        assert orders.getBetterOrderId(worseOrderId) == betterOrderId
+
+def test_mirrorTracksOrderBooks(contractsFixture, cash, market):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    cancelOrder = contractsFixture.contracts['CancelOrder']
+    fillOrder = contractsFixture.contracts['FillOrder']
+    orders = contractsFixture.contracts['Orders']
+    numTicks = market.getNumTicks()
+    random = Random(42)
+    openOrderIds = []
+
+    with OrderBookMirror(contractsFixture) as mirror:
+        for step in range(60):
+            action = random.random()
+            if action < 0.6 or not openOrderIds:
+                orderType = random.choice([BID, ASK])
+                # Few distinct prices so price levels fill up with equal priced orders
+                price = random.choice([numTicks / 4, numTicks / 3, numTicks / 2, numTicks * 2 / 3]) if orderType == BID else random.choice([numTicks * 2 / 3, numTicks * 3 / 4, numTicks * 4 / 5])
+                amount = fix(random.randint(1, 3))
+                betterOrderId, worseOrderId = mirror.getBoundingOrders(orderType, price, market, YES)
+                assertHintsAreAdjacent(orders, orderType, market, YES, betterOrderId, worseOrderId)
+                orderId = createOrder.publicCreateOrder(orderType, amount, price, market.address, YES, betterOrderId, worseOrderId, "42", sender = tester.k1, value = amount * numTicks)
+                openOrderIds.append(orderId)
+            elif action < 0.8:
+                orderId = random.choice(openOrderIds)
+                openOrderIds.remove(orderId)
+                assert cancelOrder.cancelOrder(orderId, sender = tester.k1)
+            else:
+                orderId = random.choice(openOrderIds)
+                amount = orders.getAmount(orderId)
+                fillAmount = random.choice([amount, amount / 2])
+                fillOrder.publicFillOrder(orderId, fillAmount, "42", sender = tester.k2, value = fillAmount * numTicks)
+                if fillAmount == amount:
+                    openOrderIds.remove(orderId)
+
+            for orderType in [BID, ASK]:
+                assert mirror.getOrderIds(orderType, market, YES) == getOnChainOrderIds(orders, orderType, market, YES)
+
+def test_mirrorIgnoresRevertedOrders(contractsFixture, cash, market):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    augur = contractsFixture.contracts['Augur']
+    numTicks = market.getNumTicks()
+    price = numTicks / 2
+    amount = fix(1)
+    orderArgs = [BID, amount, price, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), "42"]
+
+    # Running out of gas just short of what the order costs reverts it after the order has been logged
+    snapshot = contractsFixture.chain.snapshot()
+    startingGas = contractsFixture.chain.head_state.gas_used
+    createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = amount * numTicks)
+    gasUsed = contractsFixture.chain.head_state.gas_used - startingGas
+    contractsFixture.chain.revert(snapshot)
+
+    emittedLogs = []
+    contractsFixture.chain.head_state.log_listeners.append(emittedLogs.append)
+    with OrderBookMirror(contractsFixture) as mirror:
+        with raises(TransactionFailed):
+            createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = amount * numTicks, startgas = gasUsed - 1)
+        assert mirror.getOrderIds(BID, market, YES) == []
+        assert mirror.getBoundingOrders(BID, price, market, YES) == (longTo32Bytes(0), longTo32Bytes(0))
+
+        orderId = createOrder.publicCreateOrder(*orderArgs, sender = tester.k1, value = amount * numTicks)
+        assert mirror.getOrderIds(BID, market, YES) == [orderId]
+    contractsFixture.chain.head_state.log_listeners.remove(emittedLogs.append)
+    orderCreatedLogs = [message for message in emittedLogs if message.topics and augur.translator.event_data.get(message.topics[0], {}).get('name') == 'OrderCreated']
+    assert len(orderCreatedLogs) == 2, "The reverted order was not logged, so this test did not exercise a reverted log"
+
+def test_mirrorHintsSaveGas(contractsFixture, cash, categoricalMarket):
+    createOrder = contractsFixture.contracts['CreateOrder']
+
+    with OrderBookMirror(contractsFixture) as mirror:
+        for i in range(3900, 3950):
+            createOrder.publicCreateOrder(BID, fix(1), i, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, i))
+
+        startingGas = contractsFixture.chain.head_state.gas_used
+        createOrder.publicCreateOrder(BID, fix(1), 3901, categoricalMarket.address, 1, longTo32Bytes(0), longTo32Bytes(0), "7", value = fix(1, 3901))
+        noHintsGas = contractsFixture.chain.head_state.gas_used - startingGas
+
+        betterOrderId, worseOrderId = mirror.getBoundingOrders(BID, 3902, categoricalMarket, 1)
+        startingGas = contractsFixture.chain.head_state.gas_used
+        createOrder.publicCreateOrder(BID, fix(1), 3902, categoricalMarket.address, 1, betterOrderId, worseOrderId, "7", value = fix(1, 3902))
+        hintsGas = contractsFixture.chain.head_state.gas_used - startingGas
+
+    assert hintsGas < noHintsGas
@@ -369,3 +369,26 @@ def test_removeOrder(contractsFixture, market):
     assert orders.getWorseOrderId(orderId3) == longTo32Bytes(0)
     assert(orders.removeOrder(orderId1) == 1), "Remove order 1"
     assert(orders.removeOrder(orderId2) == 1), "Remove order 2"
+
+@mark.parametrize('orderType', [BID, ASK])
+def test_worstOrderAfterEqualPrice(orderType, contractsFixture, market):
+    orders = contractsFixture.contracts['Orders']
+
+    # An order with the same price as the worst order is appended behind it and must become the worst order itself
+    orderId1 = orders.saveOrder(orderType, market.address, fix('10'), 5000, tester.a1, YES, 0, fix('10'), longTo32Bytes(0), longTo32Bytes(0), "1")
+    orderId2 = orders.saveOrder(orderType, market.address, fix('10'), 5000, tester.a2, YES, 0, fix('10'), longTo32Bytes(0), longTo32Bytes(0), "1")
+    assert orders.getBestOrderId(orderType, market.address, YES) == orderId1
+    assert orders.getWorstOrderId(orderType, market.address, YES) == orderId2
+    assert orders.getWorseOrderId(orderId1) == orderId2
+    assert orders.getBetterOrderId(orderId2) == orderId1
+
+    # Removing the best order leaves the remaining order as both best and worst
+    assert orders.removeOrder(orderId1) == 1
+    assert orders.getBestOrderId(orderType, market.address, YES) == orderId2
+    assert orders.getWorstOrderId(orderType, market.address, YES) == orderId2
+
+    orderId3 = orders.saveOrder(orderType, market.address, fix('10'), 5000, tester.a3, YES, 0, fix('10'), longTo32Bytes(0), longTo32Bytes(0), "1")
+    assert orders.getBestOrderId(orderType, market.address, YES) == orderId2
+    assert orders.getWorstOrderId(orderType, market.address, YES) == orderId3
+    assert orders.getWorseOrderId(orderId2) == orderId3
+    assert orders.getBetterOrderId(orderId3) == orderId2
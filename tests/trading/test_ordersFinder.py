@@ -69,3 +69,112 @@ def test_overflow(contractsFixture, cash, market, universe):
         orderIds = ordersFinder.getExistingOrders5(BID, market.address, 1)
 
     orderIds = ordersFinder.getExistingOrders10(BID, market.address, 1)
+
+def test_getOrders_pages(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    ordersFinder = contractsFixture.contracts['OrdersFinder']
+    tradeGroupID = "42"
+    nullAddress = longTo32Bytes(0)
+
+    orderIDs = [createOrder.publicCreateOrder(BID, fix(1), price, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, value=fix('1', price)) for price in range(7, 0, -1)]
+
+    # Only the orders found are returned along with a cursor for the next page
+    orderIds, nextOrderId = ordersFinder.getOrders(BID, market.address, YES, nullAddress, 3)
+    assert orderIds == orderIDs[:3]
+    assert nextOrderId == orderIDs[3]
+
+    orderIds, nextOrderId = ordersFinder.getOrders(BID, market.address, YES, nextOrderId, 3)
+    assert orderIds == orderIDs[3:6]
+    assert nextOrderId == orderIDs[6]
+
+    orderIds, nextOrderId = ordersFinder.getOrders(BID, market.address, YES, nextOrderId, 3)
+    assert orderIds == orderIDs[6:]
+    assert nextOrderId == nullAddress
+
+    orderIds, nextOrderId = ordersFinder.getOrders(BID, market.address, YES, nullAddress, 100)
+    assert orderIds == orderIDs
+    assert nextOrderId == nullAddress
+
+    orderIds, nextOrderId = ordersFinder.getOrders(ASK, market.address, YES, nullAddress, 100)
+    assert orderIds == []
+    assert nextOrderId == nullAddress
+
+def test_getOrdersWithDetails(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    ordersFinder = contractsFixture.contracts['OrdersFinder']
+    tradeGroupID = "42"
+    nullAddress = longTo32Bytes(0)
+
+    orderID1 = createOrder.publicCreateOrder(ASK, fix(1), 6000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k1, value=fix('1', '4000'))
+    orderID2 = createOrder.publicCreateOrder(ASK, fix(2), 7000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k2, value=fix('2', '3000'))
+
+    orderIds, amounts, prices, creators, nextOrderId = ordersFinder.getOrdersWithDetails(ASK, market.address, YES, nullAddress, 1)
+    assert orderIds == [orderID1]
+    assert amounts == [fix(1)]
+    assert prices == [6000]
+    assert creators == [bytesToHexString(tester.a1)]
+    assert nextOrderId == orderID2
+
+    orderIds, amounts, prices, creators, nextOrderId = ordersFinder.getOrdersWithDetails(ASK, market.address, YES, nextOrderId, 5)
+    assert orderIds == [orderID2]
+    assert amounts == [fix(2)]
+    assert prices == [7000]
+    assert creators == [bytesToHexString(tester.a2)]
+    assert nextOrderId == nullAddress
+
+def test_getOrders_staleCursor(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    cancelOrder = contractsFixture.contracts['CancelOrder']
+    ordersFinder = contractsFixture.contracts['OrdersFinder']
+    tradeGroupID = "42"
+    nullAddress = longTo32Bytes(0)
+
+    orderID1 = createOrder.publicCreateOrder(BID, fix(1), 3000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, value=fix('1', '3000'))
+    orderID2 = createOrder.publicCreateOrder(BID, fix(1), 2000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, value=fix('1', '2000'))
+
+    orderIds, nextOrderId = ordersFinder.getOrders(BID, market.address, YES, nullAddress, 1)
+    assert nextOrderId == orderID2
+
+    # A cursor from another book is rejected
+    with raises(TransactionFailed):
+        ordersFinder.getOrders(ASK, market.address, YES, nextOrderId, 1)
+    with raises(TransactionFailed):
+        ordersFinder.getOrders(BID, market.address, NO, nextOrderId, 1)
+
+    # So is one whose order is no longer on the book
+    assert cancelOrder.cancelOrder(orderID2)
+    with raises(TransactionFailed):
+        ordersFinder.getOrders(BID, market.address, YES, nextOrderId, 1)
+    with raises(TransactionFailed):
+        ordersFinder.getOrdersWithDetails(BID, market.address, YES, nextOrderId, 1)
+
+def test_getOrderBook(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    orders = contractsFixture.contracts['Orders']
+    ordersFinder = contractsFixture.contracts['OrdersFinder']
+    tradeGroupID = "42"
+
+    yesBid1 = createOrder.publicCreateOrder(BID, fix(1), 3000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, value=fix('1', '3000'))
+    yesBid2 = createOrder.publicCreateOrder(BID, fix(2), 3500, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k1, value=fix('2', '3500'))
+    yesAsk = createOrder.publicCreateOrder(ASK, fix(3), 6000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender=tester.k2, value=fix('3', '4000'))
+    noBid = createOrder.publicCreateOrder(BID, fix(4), 2000, market.address, NO, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, value=fix('4', '2000'))
+
+    orderIds, outcomes, orderTypes, amounts, prices, creators, moneyEscrowed, sharesEscrowed = ordersFinder.getOrderBook(market.address)
+
+    # Grouped by outcome, bids before asks, best first
+    assert orderIds == [noBid, yesBid2, yesBid1, yesAsk]
+    assert outcomes == [NO, YES, YES, YES]
+    assert orderTypes == [BID, BID, BID, ASK]
+    for index, orderId in enumerate(orderIds):
+        assert amounts[index] == orders.getAmount(orderId)
+        assert prices[index] == orders.getPrice(orderId)
+        assert creators[index] == orders.getOrderCreator(orderId)
+        assert moneyEscrowed[index] == orders.getOrderMoneyEscrowed(orderId)
+        assert sharesEscrowed[index] == orders.getOrderSharesEscrowed(orderId)
+    assert amounts == [fix(4), fix(2), fix(1), fix(3)]
+    assert creators == [bytesToHexString(tester.a0), bytesToHexString(tester.a1), bytesToHexString(tester.a0), bytesToHexString(tester.a2)]
+
+def test_getOrderBook_empty(contractsFixture, cash, market, universe):
+    ordersFinder = contractsFixture.contracts['OrdersFinder']
+
+    assert ordersFinder.getOrderBook(market.address) == [[], [], [], [], [], [], [], []]
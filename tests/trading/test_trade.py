@@ -3,7 +3,7 @@
 from ethereum.tools import tester
 from ethereum.tools.tester import TransactionFailed
 from utils import longTo32Bytes, longToHexString, bytesToHexString, fix, AssertLog, stringToBytes, EtherDelta, PrintGasUsed
-from constants import ASK, BID, YES, NO
+from constants import ASK, BID, YES, NO, SHORT
 from pytest import raises, fixture, mark
 from pprint import pprint
 
@@ -731,4 +731,62 @@ def test_trade_with_self_take_order_make_order(contractsFixture, cash, market, u
     # Note that we never ended up with the original orders shares. The ETH escrowed for those was simply returned to us for this case.
     assert orders.getOrderSharesEscrowed(fillOrderID) == 0
     assert orders.getBetterOrderId(fillOrderID) == longTo32Bytes(0)
-    assert orders.getWorseOrderId(fillOrderID) == longTo32Bytes(0)
\ No newline at end of file
+    assert orders.getWorseOrderId(fillOrderID) == longTo32Bytes(0)
+
+def test_fill_best_order_resumable(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    trade = contractsFixture.contracts['Trade']
+    orders = contractsFixture.contracts['Orders']
+    tradeGroupID = "42"
+
+    orderIDs = [createOrder.publicCreateOrder(BID, fix(1), price, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=fix('1', price)) for price in range(6005, 5999, -1)]
+
+    # With only enough gas for a few fills each call stops early and hands back what is left to fill
+    remaining = fix(6)
+    calls = 0
+    while True:
+        remaining, nextOrderID = trade.publicFillBestOrderResumable(SHORT, market.address, YES, remaining, 6000, tradeGroupID, sender = tester.k2, value=remaining * 4000, startgas=long(4.5 * 10**6))
+        calls += 1
+        if nextOrderID == longTo32Bytes(0):
+            break
+        # Filled orders leave the book so the next call starts from the new best order
+        assert nextOrderID == orders.getBestOrderId(BID, market.address, YES)
+
+    assert calls > 1
+    assert remaining == 0
+    for orderID in orderIDs:
+        assert orders.getAmount(orderID) == 0
+    assert orders.getBestOrderId(BID, market.address, YES) == longTo32Bytes(0)
+
+def test_fill_best_order_resumable_price_limit(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    trade = contractsFixture.contracts['Trade']
+    orders = contractsFixture.contracts['Orders']
+    tradeGroupID = "42"
+
+    goodOrderID = createOrder.publicCreateOrder(BID, fix(1), 6000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=fix('1', '6000'))
+    badOrderID = createOrder.publicCreateOrder(BID, fix(1), 5000, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=fix('1', '5000'))
+
+    # Nothing more can be filled at this price so there is no continuation even though some of the amount is left
+    remaining, nextOrderID = trade.publicFillBestOrderResumable(SHORT, market.address, YES, fix(2), 5500, tradeGroupID, sender = tester.k2, value=fix('2', '4500'))
+    assert remaining == fix(1)
+    assert nextOrderID == longTo32Bytes(0)
+    assert orders.getAmount(goodOrderID) == 0
+    assert orders.getAmount(badOrderID) == fix(1)
+
+def test_fill_best_order_resumable_new_best_order(contractsFixture, cash, market, universe):
+    createOrder = contractsFixture.contracts['CreateOrder']
+    trade = contractsFixture.contracts['Trade']
+    orders = contractsFixture.contracts['Orders']
+    tradeGroupID = "42"
+
+    for price in range(6005, 5999, -1):
+        createOrder.publicCreateOrder(BID, fix(1), price, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=fix('1', price))
+    remaining, nextOrderID = trade.publicFillBestOrderResumable(SHORT, market.address, YES, fix(6), 6000, tradeGroupID, sender = tester.k2, value=fix('6', '4000'), startgas=long(4.5 * 10**6))
+    assert nextOrderID != longTo32Bytes(0)
+
+    # A better order placed between calls is filled first by the next call
+    betterOrderID = createOrder.publicCreateOrder(BID, fix(1), 6010, market.address, YES, longTo32Bytes(0), longTo32Bytes(0), tradeGroupID, sender = tester.k1, value=fix('1', '6010'))
+    assert orders.getBestOrderId(BID, market.address, YES) == betterOrderID
+    remaining, nextOrderID = trade.publicFillBestOrderResumable(SHORT, market.address, YES, remaining, 6000, tradeGroupID, sender = tester.k2, value=remaining * 4000, startgas=long(4.5 * 10**6))
+    assert orders.getAmount(betterOrderID) == 0
@@ -32,33 +32,81 @@ def bytesToLong(value):
 def bytesToHexString(value):
     return longToHexString(bytesToLong(value))
 
-def captureFilteredLogs(state, contract, logs):
-    def captureLog(contract, logs, message):
-        translated = contract.translator.listen(message)
-        if not translated: return
-        logs.append(translated)
-    state.log_listeners.append(lambda x: captureLog(contract, logs, x))
+def normalizeAddress(address):
+    return bytesToHexString(address) if len(address) == 20 else address.lower()
+
+class LogCapture():
+    """
+    Captures the logs a contract's translator knows about while the block runs.  The listener is removed on exit.  Logs are indexed by event name and emitting address as they fire, but each one is only decoded the first time it is looked up.
+    """
+
+    def __init__(self, state, contract):
+        self.state = state
+        self.translator = contract.translator
+        self.messagesByEventName = {}
+        self.messagesByAddress = {}
+        self.decodedLogs = {}
+
+    def __enter__(self):
+        self.state.log_listeners.append(self.captureLog)
+        return self
+
+    def __exit__(self, *args):
+        self.state.log_listeners.remove(self.captureLog)
+        if args[1]:
+            raise args[1]
+
+    def captureLog(self, message):
+        if not message.topics:
+            return
+        eventData = self.translator.event_data.get(message.topics[0])
+        if not eventData:
+            return
+        self.messagesByEventName.setdefault(eventData['name'], []).append(message)
+        self.messagesByAddress.setdefault(normalizeAddress(message.address), []).append(message)
+
+    def decode(self, message):
+        if id(message) not in self.decodedLogs:
+            self.decodedLogs[id(message)] = self.translator.listen(message)
+        return self.decodedLogs[id(message)]
+
+    def getLogs(self, eventName, address=None):
+        messages = self.messagesByEventName.get(eventName, [])
+        if address:
+            address = normalizeAddress(address)
+            messages = [message for message in messages if normalizeAddress(message.address) == address]
+        return [self.decode(message) for message in messages]
+
+    def getLogsFromAddress(self, address):
+        return [self.decode(message) for message in self.messagesByAddress.get(normalizeAddress(address), [])]
 
 class TokenDelta():
 
-    def __init__(self, token, delta, account, err=""):
+    def __init__(self, token, delta, account, err="", ledger=None):
         self.account = account
         self.token = token
         self.delta = delta
         self.err = err
+        self.ledger = ledger
 
     def __enter__(self):
-        self.originalBalance = self.token.balanceOf(self.account)
+        self.originalBalance = self.getBalance()
 
     def __exit__(self, *args):
         if args[1]:
             raise args[1]
         originalBalance = self.originalBalance
-        newBalance = self.token.balanceOf(self.account)
+        newBalance = self.getBalance()
         delta = self.delta
         resultDelta = newBalance - originalBalance
         assert resultDelta == delta, self.err + ". Delta EXPECTED: %i ACTUAL: %i DIFF: %i" % (delta, resultDelta, delta - resultDelta)
 
+    def getBalance(self):
+        # With a BalanceLedger the change is read from the token logs it has already replayed rather than from the chain
+        if self.ledger:
+            return self.ledger.getDelta(self.token.address, self.account)
+        return self.token.balanceOf(self.account)
+
 class EtherDelta():
 
     def __init__(self, delta, account, chain, err=""):
@@ -98,6 +146,22 @@ class PrintGasUsed():
         else:
             print "GAS USED WITH %s : %i" % (self.action, gasUsed)
 
+class GasBenchmark():
+
+    def __init__(self, fixture, scenario):
+        self.fixture = fixture
+        self.scenario = scenario
+
+    def __enter__(self):
+        self.startingGas = self.fixture.chain.head_state.gas_used
+        return self
+
+    def __exit__(self, *args):
+        if args[1]:
+            raise args[1]
+        self.gasUsed = self.fixture.chain.head_state.gas_used - self.startingGas
+        self.fixture.recordGasUsed(self.scenario, self.gasUsed)
+
 class AssertLog():
 
     def __init__(self, fixture, eventName, data, skip=0, contract=None):
@@ -108,27 +172,21 @@ class AssertLog():
         self.contract = contract
         if not self.contract:
             self.contract = fixture.contracts['Augur']
-        self.logs = []
 
     def __enter__(self):
-        captureFilteredLogs(self.fixture.chain.head_state, self.contract, self.logs)
+        self.logCapture = LogCapture(self.fixture.chain.head_state, self.contract)
+        self.logCapture.__enter__()
 
     def __exit__(self, *args):
+        self.logCapture.__exit__(None, None, None)
         if args[1]:
             raise args[1]
 
-        foundLog = None
-        for log in self.logs:
-            if (log["_event_type"] == self.eventName):
-                if (self.skip == 0):
-                    foundLog = log
-                    break
-                else:
-                    self.skip -= 1
-
-        if not foundLog:
+        logs = self.logCapture.getLogs(self.eventName)
+        if len(logs) <= self.skip:
             raise Exception("Assert log failed to find the log with event name %s" % (self.eventName))
+        log = logs[self.skip]
 
         for (key, expectedValue) in self.data.items():
             actualValue = log.get(key)
-            assert actualValue == expectedValue, "%s Log had incorrect value for key \"%s\". Expected: %s. Actual: %s" % (self.eventName, key, expectedValue, actualValue)
\ No newline at end of file
+            assert actualValue == expectedValue, "%s Log had incorrect value for key \"%s\". Expected: %s. Actual: %s" % (self.eventName, key, expectedValue, actualValue)